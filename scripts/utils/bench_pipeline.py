@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+get_verb.py 后处理流水线的基准测试（不请求模型）。
+
+用 server/src/verbs.json 当作模型回复回放（去掉复合时态，模拟 LLM 原始输出），
+按需循环放大到 1 万 / 10 万个动词，逐阶段计时：
+  - normalize           normalize_verb_data（第一遍）
+  - compound_tenses     add_compound_tenses
+  - normalize_compound  normalize_verb_data（第二遍，规范化复合时态）
+  - reorder             reorder_top_level_fields
+  - document            整块 json_writer.dumps（tag_pronoun_support.py 的写文件方式），不参与后续阶段
+  - encode              单个动词 json_writer.dumps（get_verb.py 流式写文件的方式）
+
+为了 10 万规模下内存可控，数据按 --chunk-size 分块生成：每块的输入在计时外从 JSON 文本解出，
+各阶段只对该块计时后累加；document 阶段也按块（每块当作一个文件）计时。
+峰值内存单独跑一遍 tracemalloc（只在第一块上测，避免影响计时），另报进程最大 RSS。
+
+结果可以写成 JSON（--json-out），带上 git commit 和运行环境，用 --baseline 与之前的结果对比：
+  python3 scripts/utils/bench_pipeline.py --scale 10000,100000 --json-out /tmp/bench_new.json
+  python3 scripts/utils/bench_pipeline.py --scale 10000 --baseline /tmp/bench_old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import json_writer
+from get_verb import (
+    add_compound_tenses,
+    normalize_verb_data,
+    reorder_top_level_fields,
+)
+
+DEFAULT_SOURCE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "src", "verbs.json"
+)
+DEFAULT_SCALES = "10000"
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_REPEAT = 3
+
+# 模型不会返回的字段：复合时态由脚本生成，supports_* 由 tag_pronoun_support.py 补充
+LLM_DROP_KEYS = ("compound_indicative", "compound_subjunctive", "supports_do", "supports_io", "supports_do_io")
+
+
+# (阶段名, 模式, 函数)
+# - "item":  对块里每个元素调用，结果作为下一阶段的输入
+# - "chunk": 对整块调用一次，结果丢弃（旁路阶段，不改变后续输入）
+STAGES = [
+    ("normalize", "item", normalize_verb_data),
+    ("compound_tenses", "item", add_compound_tenses),
+    ("normalize_compound", "item", normalize_verb_data),
+    ("reorder", "item", reorder_top_level_fields),
+    ("document", "chunk", json_writer.dumps),
+    ("encode", "item", json_writer.dumps),
+]
+
+
+def load_templates(path: str) -> list:
+    """读取 verbs.json，转成模拟 LLM 回复的 JSON 文本（每个动词一条）。"""
+    with open(path, "r", encoding="utf-8") as f:
+        verbs = json.load(f)
+    templates = []
+    for verb in verbs:
+        if not isinstance(verb, dict):
+            continue
+        raw = {k: v for k, v in verb.items() if k not in LLM_DROP_KEYS}
+        templates.append(json.dumps(raw, ensure_ascii=False))
+    if not templates:
+        raise ValueError(f"No verb objects found in {path}")
+    return templates
+
+
+def iter_chunks(templates: list, scale: int, chunk_size: int):
+    """按顺序循环 templates，生成 scale 个动词，每次产出一块新解出的 dict。"""
+    for start in range(0, scale, chunk_size):
+        end = min(scale, start + chunk_size)
+        yield [json.loads(templates[i % len(templates)]) for i in range(start, end)]
+
+
+def run_stages(chunk: list, timings: dict) -> None:
+    items = chunk
+    for name, mode, func in STAGES:
+        started = time.perf_counter()
+        if mode == "item":
+            items = [func(item) for item in items]
+        else:
+            func(items)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def measure_peak_memory(chunk: list) -> dict:
+    """在一块数据上逐阶段测 tracemalloc 峰值（相对阶段开始时的增量，KB）。"""
+    peaks = {}
+    items = chunk
+    tracemalloc.start()
+    try:
+        for name, mode, func in STAGES:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            if mode == "item":
+                items = [func(item) for item in items]
+            else:
+                func(items)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[name] = max(0, peak - baseline) // 1024
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench_scale(templates: list, scale: int, chunk_size: int, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        timings = {}
+        for chunk in iter_chunks(templates, scale, chunk_size):
+            run_stages(chunk, timings)
+        if best is None or sum(timings.values()) < sum(best.values()):
+            best = timings
+
+    first_chunk = next(iter_chunks(templates, min(scale, chunk_size), chunk_size))
+    peaks = measure_peak_memory(first_chunk)
+
+    stages = {}
+    for name, _, _ in STAGES:
+        seconds = best.get(name, 0.0)
+        stages[name] = {
+            "seconds": round(seconds, 6),
+            "us_per_verb": round(seconds / scale * 1e6, 3),
+            "peak_kb": peaks.get(name, 0),
+        }
+    return {
+        "verbs": scale,
+        "total_seconds": round(sum(best.values()), 6),
+        "stages": stages,
+    }
+
+
+def git_revision() -> dict:
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--", "."], cwd=here, capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    for scale_key, result in report["results"].items():
+        base_result = (baseline or {}).get("results", {}).get(scale_key)
+        print(f"\n== {result['verbs']} verbs（分块 {report['chunk_size']}，取 {report['repeat']} 次中最快）==")
+        header = f"{'stage':<20}{'seconds':>10}{'us/verb':>12}{'peak KB':>10}"
+        if base_result:
+            header += f"{'vs base':>10}"
+        print(header)
+        for name, stage in result["stages"].items():
+            line = f"{name:<20}{stage['seconds']:>10.3f}{stage['us_per_verb']:>12.1f}{stage['peak_kb']:>10}"
+            base_stage = base_result["stages"].get(name) if base_result else None
+            if base_stage and base_stage["seconds"] > 0:
+                line += f"{stage['seconds'] / base_stage['seconds']:>9.2f}x"
+            elif base_result:
+                line += f"{'-':>10}"
+            print(line)
+        total_line = f"{'total':<20}{result['total_seconds']:>10.3f}"
+        if base_result and base_result["total_seconds"] > 0:
+            total_line += f"{'':>22}{result['total_seconds'] / base_result['total_seconds']:>9.2f}x"
+        print(total_line)
+    print(f"\n进程最大 RSS：{report['max_rss_kb'] / 1024:.1f} MB")
+    if baseline:
+        print(f"对比基线：commit {baseline.get('commit')}（{baseline.get('created_at')}）")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="get_verb.py 后处理流水线基准测试。")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="回放用的 verbs.json（默认 server/src/verbs.json）")
+    parser.add_argument(
+        "--scale",
+        default=DEFAULT_SCALES,
+        help=f"逗号分隔的动词数量，循环放大 source（默认 {DEFAULT_SCALES}）",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"分块大小（默认 {DEFAULT_CHUNK_SIZE}）")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"每个规模重复次数，取最快一次（默认 {DEFAULT_REPEAT}）")
+    parser.add_argument("--json-out", help="把结果写成 JSON，便于跨 commit 对比")
+    parser.add_argument("--baseline", help="之前 --json-out 写出的结果，逐阶段打印耗时比值")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    scales = [int(s) for s in args.scale.split(",") if s.strip()]
+    chunk_size = max(1, args.chunk_size)
+    repeat = max(1, args.repeat)
+
+    templates = load_templates(args.source)
+    print(f"回放源：{args.source}（{len(templates)} 个动词）")
+
+    report = {
+        **git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "source_verbs": len(templates),
+        "chunk_size": chunk_size,
+        "repeat": repeat,
+        "results": {},
+    }
+    for scale in scales:
+        print(f"正在测 {scale} 个动词…", flush=True)
+        report["results"][str(scale)] = bench_scale(templates, scale, chunk_size, repeat)
+    report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"已写入：{args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
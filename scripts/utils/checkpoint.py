@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+追加写的 JSONL 检查点（sidecar）。
+
+每条结果只序列化、写入一次（一行一个 JSON 对象），写完立即 flush + fsync，
+总 IO 与结果数成线性关系；最终的 verbs.json 形状文档只在结束时（或按需）构建一次。
+"""
+
+import json
+import os
+
+from json_stream import iter_json_array
+
+
+def default_checkpoint_path(output_path: str) -> str:
+    """输出文件旁边的检查点路径：<output>.checkpoint.jsonl"""
+    return output_path + ".checkpoint.jsonl"
+
+
+class JsonlCheckpoint:
+    """
+    用法：
+        with JsonlCheckpoint(path, reset=True) as ckpt:
+            ckpt.append({"infinitive": "hablar", ...})
+        records = JsonlCheckpoint(path).load()
+    """
+
+    def __init__(self, path: str, reset: bool = False):
+        self.path = path
+        self._file = None
+        if reset and os.path.exists(path):
+            os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, record: dict) -> None:
+        """追加一条记录并落盘。"""
+        self.open()
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def load(self) -> list:
+        """
+        读出全部记录（按写入顺序）。
+        进程中途被杀时最后一行可能不完整，直接忽略该行。
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+        return records
+
+
+def load_partial_json_array(path: str) -> list:
+    """
+    读取一个可能不完整的 JSON 数组文件（流式写入中途崩溃时常见：缺少结尾的 ]，
+    最后一个对象只写了一半）。能完整解析的元素全部返回，其余忽略。
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return list(iter_json_array(f, allow_truncated=True))
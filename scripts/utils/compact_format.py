@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+模型回复的紧凑格式（get_verb.py --compact）：system prompt 更短，每个时态写成按固定人称顺序的数组，
+不再重复 7 个人称 key，取回后在本地展开成原来的 dict 形状，后面的校验 / normalize 完全不变。
+
+每个时态：
+    [regular, first_singular, second_singular, second_singular_vos_form,
+     third_singular, first_plural, second_plural, third_plural]
+例如 "present": [true, ["hablo"], ["hablas"], ["hablás"], ["habla"], ["hablamos"], ["habláis"], ["hablan"]]
+
+infinitive / is_reflexive 不让模型写（finalize 时反正会覆盖）。
+
+用法：
+    raw = expand_compact_verb(parse_json_reply(reply))   # 格式不对时抛 ValueError，由重试层重新请求
+    compact = compress_verb(verb)                  # 反向，mock_llm_server.py 用它合成紧凑回复
+"""
+
+import compound_tenses
+
+PERSON_KEYS = compound_tenses.PERSON_KEYS
+
+# 模型需要给出的语气和时态（与完整 prompt 一致）
+SIMPLE_TENSES = {
+    "indicative": ("present", "imperfect", "preterite", "future", "conditional"),
+    "subjunctive": ("present", "imperfect", "future"),
+    "imperative": ("affirmative", "negative"),
+}
+
+# 每个时态数组的长度：regular + 7 个人称
+ROW_LENGTH = 1 + len(PERSON_KEYS)
+
+COMPACT_SYSTEM_PROMPT = """
+You are an expert Spanish linguist and a strict JSON generator.
+
+Given ONE Spanish verb (infinitive, non-reflexive), output ONE JSON object:
+{"gerund": str, "participle": [str], "has_tr_use": bool, "has_intr_use": bool,
+ "indicative": {"present": T, "imperfect": T, "preterite": T, "future": T, "conditional": T},
+ "subjunctive": {"present": T, "imperfect": T, "future": T},
+ "imperative": {"affirmative": T, "negative": T}}
+
+Each T is an array of 8 items, in this order:
+[regular (bool), yo, tú, vos, él, nosotros, vosotros, ellos]
+and every person item is an array of strings, e.g.
+"present": [true, ["hablo"], ["hablas"], ["hablás"], ["habla"], ["hablamos"], ["habláis"], ["hablan"]]
+
+Rules:
+- "participle": 1 or 2 forms; if 2, the regular one first.
+- subjunctive imperfect: every person has exactly 2 forms, -ra then -se.
+- imperative: yo is []; negative forms include "no".
+- No compound tenses, no comments, JSON only.
+"""
+
+
+def is_compact_prompt(system_prompt: str) -> bool:
+    """system prompt 是否要求紧凑格式（单动词或批量）。"""
+    return system_prompt.startswith(COMPACT_SYSTEM_PROMPT)
+
+
+def expand_compact_verb(data) -> dict:
+    """
+    紧凑格式 -> get_verb.py 原来的 raw 形状（每个时态是带 regular 和人称 key 的 dict）。
+    已经是 dict 的时态原样保留（交给后面的结构校验）；数组长度不对抛 ValueError。
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Compact reply is not an object: {str(data)[:200]}")
+    expanded = dict(data)
+    for mood, tenses in SIMPLE_TENSES.items():
+        mood_obj = data.get(mood)
+        if not isinstance(mood_obj, dict):
+            continue
+        expanded_mood = {}
+        for tense, row in mood_obj.items():
+            if isinstance(row, list):
+                if len(row) != ROW_LENGTH:
+                    raise ValueError(f"{mood}.{tense}: expected {ROW_LENGTH} items, got {len(row)}")
+                row = {"regular": row[0], **dict(zip(PERSON_KEYS, row[1:]))}
+            expanded_mood[tense] = row
+        expanded[mood] = expanded_mood
+    return expanded
+
+
+def compress_verb(verb: dict) -> dict:
+    """verbs.json 记录（或 raw 回复）-> 紧凑格式，只保留模型需要给出的字段。"""
+    compact = {key: verb[key] for key in ("gerund", "participle", "has_tr_use", "has_intr_use") if key in verb}
+    for mood, tenses in SIMPLE_TENSES.items():
+        mood_obj = verb.get(mood)
+        if not isinstance(mood_obj, dict):
+            continue
+        compact[mood] = {
+            tense: [mood_obj[tense].get("regular")] + [mood_obj[tense].get(person, []) for person in PERSON_KEYS]
+            for tense in tenses
+            if isinstance(mood_obj.get(tense), dict)
+        }
+    return compact
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+复合时态的推导规则：haber 的固定变位（HABER_FORMS）+ 动词的过去分词。
+
+复合时态的每个形式都是 "助动词 分词"，所以不必为每个动词都存 8 个时态 × 7 人称 × 最多 4 个字符串，
+只存 participle，再加一份所有动词共用的规则表（COMPOUND_TENSE_RULES）即可按需展开：
+
+    compound_forms(["impreso", "imprimido"], "compound_subjunctive", "pluperfect", "first_singular")
+    expand_compound_tenses(verb)    # 在 verb 上补齐 compound_indicative / compound_subjunctive（完整形式）
+    strip_compound_tenses(verb)     # 去掉可推导的复合时态，只留 participle
+
+展开结果与 get_verb.py 原来的完整输出逐字段一致：
+- participle[0] 视为主分词；有第二个分词时 regular = false
+- use_all_participles 的时态（preterite_anterior、subjunctive pluperfect）按 分词 × 助动词 展开
+- vos 与 second_singular 相同
+
+命令行（流式读写 verbs.json 形状的文件）：
+    python3 scripts/utils/compound_tenses.py strip  verbs.json verbs.derived.json
+    python3 scripts/utils/compound_tenses.py expand verbs.derived.json verbs.json   # 兼容路径：还原完整形式
+"""
+
+import argparse
+import os
+
+from json_stream import JsonArrayWriter, iter_json_array
+
+# 7 个人称 key（与 get_verb.PERSON_KEYS 顺序一致）
+PERSON_KEYS = [
+    "first_singular",
+    "second_singular",
+    "second_singular_vos_form",
+    "third_singular",
+    "first_plural",
+    "second_plural",
+    "third_plural",
+]
+
+COMPOUND_MOODS = ("compound_indicative", "compound_subjunctive")
+
+# haber 的简单时态（不含 vos），用于复合时态强规则生成
+HABER_FORMS = {
+    "indicative": {
+        "present": {
+            "first_singular": "he",
+            "second_singular": "has",
+            "third_singular": "ha",
+            "first_plural": "hemos",
+            "second_plural": "habéis",
+            "third_plural": "han",
+        },
+        "imperfect": {
+            "first_singular": "había",
+            "second_singular": "habías",
+            "third_singular": "había",
+            "first_plural": "habíamos",
+            "second_plural": "habíais",
+            "third_plural": "habían",
+        },
+        "future": {
+            "first_singular": "habré",
+            "second_singular": "habrás",
+            "third_singular": "habrá",
+            "first_plural": "habremos",
+            "second_plural": "habréis",
+            "third_plural": "habrán",
+        },
+        "conditional": {
+            "first_singular": "habría",
+            "second_singular": "habrías",
+            "third_singular": "habría",
+            "first_plural": "habríamos",
+            "second_plural": "habríais",
+            "third_plural": "habrían",
+        },
+        # haber 的 pretérito，用于 pretérito anterior
+        "preterite": {
+            "first_singular": "hube",
+            "second_singular": "hubiste",
+            "third_singular": "hubo",
+            "first_plural": "hubimos",
+            "second_plural": "hubisteis",
+            "third_plural": "hubieron",
+        },
+    },
+    "subjunctive": {
+        "present": {
+            "first_singular": "haya",
+            "second_singular": "hayas",
+            "third_singular": "haya",
+            "first_plural": "hayamos",
+            "second_plural": "hayáis",
+            "third_plural": "hayan",
+        },
+        # subjunctive imperfect 有双形：hubiera / hubiese
+        "imperfect": {
+            "first_singular": ["hubiera", "hubiese"],
+            "second_singular": ["hubieras", "hubieses"],
+            "third_singular": ["hubiera", "hubiese"],
+            "first_plural": ["hubiéramos", "hubiésemos"],
+            "second_plural": ["hubierais", "hubieseis"],
+            "third_plural": ["hubieran", "hubiesen"],
+        },
+        "future": {
+            "first_singular": "hubiere",
+            "second_singular": "hubieres",
+            "third_singular": "hubiere",
+            "first_plural": "hubiéremos",
+            "second_plural": "hubiereis",
+            "third_plural": "hubieren",
+        },
+    },
+}
+
+# 复合语气 -> 时态 -> (haber 的语气, haber 的时态, 是否展开所有分词)，顺序即输出顺序
+COMPOUND_TENSE_RULES = {
+    "compound_indicative": {
+        "preterite_perfect": ("indicative", "present", False),
+        "pluperfect": ("indicative", "imperfect", False),
+        "future_perfect": ("indicative", "future", False),
+        "conditional_perfect": ("indicative", "conditional", False),
+        # 单分词 → 1 形；双分词 → 2 形
+        "preterite_anterior": ("indicative", "preterite", True),
+    },
+    "compound_subjunctive": {
+        "preterite_perfect": ("subjunctive", "present", False),
+        # 单分词 → 2 形（hubiera X, hubiese X）；双分词 → 4 形
+        "pluperfect": ("subjunctive", "imperfect", True),
+        "future_perfect": ("subjunctive", "future", False),
+    },
+}
+
+
+def _aux_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def compound_forms(participles: list, mood: str, tense: str, person: str) -> list:
+    """
+    一个复合时态槽位的全部形式，例如
+    compound_forms(["impreso", "imprimido"], "compound_subjunctive", "pluperfect", "first_singular")
+    -> ["hubiera impreso", "hubiese impreso", "hubiera imprimido", "hubiese imprimido"]
+    """
+    if not participles:
+        return []
+    aux_mood, aux_tense, use_all_participles = COMPOUND_TENSE_RULES[mood][tense]
+    if person == "second_singular_vos_form":
+        person = "second_singular"
+    aux_forms = HABER_FORMS[aux_mood][aux_tense]
+    if person not in aux_forms:
+        return []
+    aux_list = _aux_list(aux_forms[person])
+    # 先按分词再按助动词排，读起来更自然：["hubiera impreso","hubiese impreso","hubiera imprimido",...]
+    used = participles if use_all_participles else participles[:1]
+    return [f"{aux} {p}" for p in used for aux in aux_list]
+
+
+def build_compound_tense(participles: list, mood: str, tense: str) -> dict:
+    """一个复合时态的完整对象：regular + 7 人称 list。"""
+    tense_obj = {"regular": len(participles) <= 1}
+    for person in PERSON_KEYS:
+        tense_obj[person] = compound_forms(participles, mood, tense, person)
+    return tense_obj
+
+
+def expand_compound_tenses(verb: dict, overwrite: bool = True) -> dict:
+    """
+    按 participle 写入完整的 compound_indicative / compound_subjunctive；没有分词时原样返回。
+    - overwrite=False 时保留 verb 里已有的复合时态（只补缺的）
+    - 新加的语气放在 imperative 之后，与 verbs.json 的字段顺序一致
+    """
+    participles = verb.get("participle") or []
+    if not isinstance(participles, list):
+        participles = [participles]
+    if not participles:
+        return verb
+
+    expanded = {
+        mood: {tense: build_compound_tense(participles, mood, tense) for tense in tenses}
+        for mood, tenses in COMPOUND_TENSE_RULES.items()
+        if overwrite or mood not in verb
+    }
+    if all(mood in verb for mood in expanded) or "imperative" not in verb:
+        verb.update(expanded)
+        return verb
+
+    result = {}
+    for key, value in verb.items():
+        result[key] = expanded.pop(key, value)
+        if key == "imperative":
+            result.update(expanded)
+    return result
+
+
+def strip_compound_tenses(verb: dict) -> dict:
+    """去掉复合时态（消费方用 expand_compound_tenses 还原）。"""
+    for mood in COMPOUND_MOODS:
+        verb.pop(mood, None)
+    return verb
+
+
+def has_derivable_compound_tenses(verb: dict) -> bool:
+    """verb 里的复合时态是否与按 participle 推导的结果完全一致（strip 之后不丢信息）。"""
+    expected = expand_compound_tenses({"participle": verb.get("participle")})
+    return all(verb.get(mood) == expected.get(mood) for mood in COMPOUND_MOODS)
+
+
+def transform_file(input_path: str, output_path: str, transform) -> int:
+    """流式读取 input_path，逐个动词套用 transform 后写到 output_path（可与输入是同一个文件）。"""
+    temp_path = output_path + ".tmp"
+    with open(input_path, "r", encoding="utf-8") as fin, open(temp_path, "w", encoding="utf-8") as fout:
+        with JsonArrayWriter(fout) as writer:
+            for verb in iter_json_array(fin):
+                writer.write(transform(verb))
+        fout.write("\n")
+    os.replace(temp_path, output_path)
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在完整复合时态与可推导的紧凑形式之间转换 verbs.json。")
+    parser.add_argument("action", choices=["strip", "expand"], help="strip：去掉复合时态；expand：按规则还原")
+    parser.add_argument("input_path", help="verbs.json 形状的输入文件")
+    parser.add_argument("output_path", help="输出文件")
+    args = parser.parse_args()
+
+    if args.action == "strip":
+        kept = 0
+
+        def transform(verb):
+            nonlocal kept
+            # 与规则不一致的复合时态（手工修订过）保留原样，避免信息丢失
+            if has_derivable_compound_tenses(verb):
+                return strip_compound_tenses(verb)
+            kept += 1
+            return verb
+
+        count = transform_file(args.input_path, args.output_path, transform)
+        print(f"Stripped compound tenses from {count - kept} verbs, kept {kept} non-derivable.")
+    else:
+        count = transform_file(
+            args.input_path, args.output_path, lambda verb: expand_compound_tenses(verb, overwrite=False)
+        )
+        print(f"Expanded compound tenses for {count} verbs.")
+    print(f"Wrote {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
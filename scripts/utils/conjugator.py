@@ -0,0 +1,530 @@
+# -*- coding: utf-8 -*-
+"""
+离线规则变位引擎：对能按规则推出的动词在本地直接生成简单时态 + 命令式，
+输出结构与 get_verb.py 里 LLM 返回的一致（gerund / participle / 各时态 regular + 7 人称 list），
+复合时态仍交给 add_compound_tenses 用 compound_tenses.HABER_FORMS 生成。
+
+覆盖的变位类别（classify_verb 返回的 paradigm）：
+- 规则动词 -ar / -er / -ir
+- 词干变化（查词表 STEM_CHANGE_VERBS）：e→ie、o→ue、u→ue（jugar）、e→i；
+  -ir 动词的弱变化（sintió / durmiendo / pidamos）一并处理
+- 拼写变化（按词尾自动套用 ORTHOGRAPHIC_RULES）：c→qu、g→gu、z→c、gu→gü、
+  g→j、gu→g、qu→c、c→z
+- -cer / -cir（元音 + c）→ -zco：conozco / luzco
+- -uir 的 y 插入：construyo / construyó；-eer 的 y / í：leyó / leíste / leído
+- 重音移位（查词表 ACCENT_SHIFT_VERBS）：envío / continúo / reúno
+- 不规则过去分词（按后缀查 IRREGULAR_PARTICIPLES）：abierto / escrito / vuelto
+
+regular 标记：词干变化、-zco、y 插入、重音移位所在的时态记为 False；
+纯拼写变化（busqué / cojo）不影响发音规则，仍记为 True；命令式按 verbs.json 的约定一律为 False。
+
+vos 的写法与 verbs.json 里最常见的一致（每个动词两个槽位都对上的有 99 个，多于另外两种组合）：
+虚拟式现在时用重音在词尾的 vos 形式（pensés / durmás / conozcás，词干同 nosotros），
+否定命令式是 no + 同一个形式，两个槽位不会互相矛盾。
+
+判断不了的动词返回 None，由调用方回退到 LLM。
+注意：词干变化无法从拼写上识别（pensar / pasar、rodar / podar），只能靠词表精确匹配，
+所以按规则生成是白名单制的：
+- 词干最后一个元音是 e / o（可能 e→ie / e→i / o→ue）或以 -iar / -uar / -egir / -ernir 结尾
+  （可能重音移位或元音变化）又不在词干变化 / 重音移位词表里的动词，
+  只有列在 NO_STEM_CHANGE_VERBS / REGULAR_LOOKALIKES 里的才本地生成，其余交给 LLM；
+  -ear、-eer、-ecer（-zco）、-guar 没有这类变化，不受此限
+- 以词表中某个词结尾但本身不在词表里的动词一律交给 LLM（renegar / agregar）
+"""
+
+# 7 个人称 key（与 get_verb.PERSON_KEYS 顺序一致）
+PERSON_KEYS = [
+    "first_singular",
+    "second_singular",
+    "second_singular_vos_form",
+    "third_singular",
+    "first_plural",
+    "second_plural",
+    "third_plural",
+]
+
+# 规则词尾表：接在词干后，按 PERSON_KEYS 顺序（含 vos）排列
+REGULAR_ENDINGS = {
+    "ar": {
+        ("indicative", "present"): [["o"], ["as"], ["ás"], ["a"], ["amos"], ["áis"], ["an"]],
+        ("indicative", "imperfect"): [["aba"], ["abas"], ["abas"], ["aba"], ["ábamos"], ["abais"], ["aban"]],
+        ("indicative", "preterite"): [["é"], ["aste"], ["aste"], ["ó"], ["amos"], ["asteis"], ["aron"]],
+        ("subjunctive", "present"): [["e"], ["es"], ["és"], ["e"], ["emos"], ["éis"], ["en"]],
+        ("subjunctive", "imperfect"): [
+            ["ara", "ase"], ["aras", "ases"], ["aras", "ases"], ["ara", "ase"],
+            ["áramos", "ásemos"], ["arais", "aseis"], ["aran", "asen"],
+        ],
+        ("subjunctive", "future"): [["are"], ["ares"], ["ares"], ["are"], ["áremos"], ["areis"], ["aren"]],
+    },
+    "er": {
+        ("indicative", "present"): [["o"], ["es"], ["és"], ["e"], ["emos"], ["éis"], ["en"]],
+        ("indicative", "imperfect"): [["ía"], ["ías"], ["ías"], ["ía"], ["íamos"], ["íais"], ["ían"]],
+        ("indicative", "preterite"): [["í"], ["iste"], ["iste"], ["ió"], ["imos"], ["isteis"], ["ieron"]],
+        ("subjunctive", "present"): [["a"], ["as"], ["ás"], ["a"], ["amos"], ["áis"], ["an"]],
+        ("subjunctive", "imperfect"): [
+            ["iera", "iese"], ["ieras", "ieses"], ["ieras", "ieses"], ["iera", "iese"],
+            ["iéramos", "iésemos"], ["ierais", "ieseis"], ["ieran", "iesen"],
+        ],
+        ("subjunctive", "future"): [["iere"], ["ieres"], ["ieres"], ["iere"], ["iéremos"], ["iereis"], ["ieren"]],
+    },
+    "ir": {
+        ("indicative", "present"): [["o"], ["es"], ["ís"], ["e"], ["imos"], ["ís"], ["en"]],
+        ("indicative", "imperfect"): [["ía"], ["ías"], ["ías"], ["ía"], ["íamos"], ["íais"], ["ían"]],
+        ("indicative", "preterite"): [["í"], ["iste"], ["iste"], ["ió"], ["imos"], ["isteis"], ["ieron"]],
+        ("subjunctive", "present"): [["a"], ["as"], ["ás"], ["a"], ["amos"], ["áis"], ["an"]],
+        ("subjunctive", "imperfect"): [
+            ["iera", "iese"], ["ieras", "ieses"], ["ieras", "ieses"], ["iera", "iese"],
+            ["iéramos", "iésemos"], ["ierais", "ieseis"], ["ieran", "iesen"],
+        ],
+        ("subjunctive", "future"): [["iere"], ["ieres"], ["ieres"], ["iere"], ["iéremos"], ["iereis"], ["ieren"]],
+    },
+}
+
+# 将来时 / 条件式：三种变位相同，接在不定式后
+INFINITIVE_ENDINGS = {
+    ("indicative", "future"): [["é"], ["ás"], ["ás"], ["á"], ["emos"], ["éis"], ["án"]],
+    ("indicative", "conditional"): [["ía"], ["ías"], ["ías"], ["ía"], ["íamos"], ["íais"], ["ían"]],
+}
+
+# 命令式里 vos / vosotros 的专有词尾（否定命令式直接用虚拟式现在时）
+IMPERATIVE_ENDINGS = {
+    "ar": {"vos": "á", "vosotros": "ad"},
+    "er": {"vos": "é", "vosotros": "ed"},
+    "ir": {"vos": "í", "vosotros": "id"},
+}
+
+GERUND_ENDINGS = {"ar": "ando", "er": "iendo", "ir": "iendo"}
+PARTICIPLE_ENDINGS = {"ar": "ado", "er": "ido", "ir": "ido"}
+
+SIMPLE_TENSES = {
+    "indicative": ["present", "imperfect", "preterite", "future", "conditional"],
+    "subjunctive": ["present", "imperfect", "future"],
+}
+
+_ALL_PERSONS = frozenset(PERSON_KEYS)
+_BOOT_PERSONS = frozenset(["first_singular", "second_singular", "third_singular", "third_plural"])
+
+# 词干重读（强变化）的槽位：pienso / piense
+STRONG_STEM_SLOTS = {
+    ("indicative", "present"): _BOOT_PERSONS,
+    ("subjunctive", "present"): _BOOT_PERSONS,
+}
+
+# -ir 词干变化动词的弱变化槽位：sintamos / sintás / sintió / sintiera / sintiere
+WEAK_STEM_SLOTS = {
+    ("subjunctive", "present"): frozenset(["first_plural", "second_plural", "second_singular_vos_form"]),
+    ("indicative", "preterite"): frozenset(["third_singular", "third_plural"]),
+    ("subjunctive", "imperfect"): _ALL_PERSONS,
+    ("subjunctive", "future"): _ALL_PERSONS,
+}
+
+# 词干变化：(被替换的元音, 强变化, -ir 弱变化)，替换词干里最后一个该元音
+STEM_CHANGES = {
+    "e_ie": ("e", "ie", "i"),
+    "o_ue": ("o", "ue", "u"),
+    "u_ue": ("u", "ue", "u"),
+    "e_i": ("e", "i", "i"),
+}
+
+# 词干变化词表（精确匹配，派生词需逐个列出）
+STEM_CHANGE_VERBS = {}
+for _change, _verbs in {
+    "e_ie": [
+        "pensar", "cerrar", "comenzar", "empezar", "despertar", "sentar", "calentar",
+        "recomendar", "negar", "fregar", "regar", "plegar", "temblar", "nevar",
+        "merendar", "gobernar", "atravesar", "confesar", "manifestar", "acertar",
+        "apretar", "arrendar", "enterrar", "helar", "quebrar", "sembrar", "serrar",
+        "tropezar", "encerrar", "concertar", "enmendar", "reventar", "sosegar",
+        "segar", "cegar", "asentar", "desconcertar", "renegar",
+        "entender", "perder", "defender", "encender", "tender", "atender", "extender",
+        "verter", "ascender", "descender", "trascender", "sentir", "consentir",
+        "presentir", "resentir", "preferir", "mentir", "desmentir", "convertir",
+        "divertir", "sugerir", "herir", "hervir", "advertir", "referir", "invertir",
+        "requerir", "digerir", "arrepentir", "conferir", "diferir", "inferir", "transferir",
+    ],
+    "o_ue": [
+        "contar", "encontrar", "descontar", "recontar", "mostrar", "demostrar",
+        "recordar", "acordar", "costar", "probar", "comprobar", "aprobar", "sonar",
+        "soñar", "volar", "rogar", "colgar", "almorzar", "forzar", "esforzar",
+        "acostar", "apostar", "consolar", "renovar", "tostar", "tronar", "soltar",
+        "poblar", "colar", "volver", "devolver", "envolver", "revolver", "resolver",
+        "disolver", "absolver", "mover", "promover", "conmover", "remover", "doler",
+        "llover", "morder", "torcer", "retorcer", "soler", "cocer", "moler", "dormir",
+        "morir",
+    ],
+    "u_ue": ["jugar"],
+    "e_i": [
+        "pedir", "despedir", "impedir", "expedir", "servir", "repetir", "seguir",
+        "conseguir", "perseguir", "proseguir", "vestir", "desvestir", "revestir",
+        "medir", "competir", "elegir", "corregir", "regir", "rendir", "gemir",
+        "derretir", "concebir", "embestir",
+    ],
+}.items():
+    for _verb in _verbs:
+        STEM_CHANGE_VERBS[_verb] = _change
+
+# 重音移位词表（精确匹配）：envío / continúo / reúno / prohíbo / aíslo
+ACCENT_SHIFT_VERBS = frozenset([
+    "enviar", "confiar", "desconfiar", "guiar", "variar", "espiar", "criar", "fiar",
+    "vaciar", "ampliar", "desafiar", "esquiar", "resfriar", "enfriar", "liar",
+    "desviar", "fotografiar", "telegrafiar", "ansiar", "chirriar", "expiar",
+    "extraviar", "hastiar", "rociar", "averiar", "piar", "porfiar",
+    "actuar", "continuar", "evaluar", "devaluar", "graduar", "situar", "acentuar",
+    "efectuar", "insinuar", "habituar", "perpetuar", "puntuar", "atenuar",
+    "exceptuar", "fluctuar", "conceptuar", "tatuar",
+    "reunir", "prohibir", "cohibir", "aislar", "rehusar", "aunar", "maullar",
+    "aullar", "ahumar", "ahijar",
+])
+
+# 不规则过去分词：按后缀替换（派生词同样适用：describir -> descrito）
+# 有两个分词时，第一个为规则分词，第二个为不规则分词（与 get_verb 约定一致）
+IRREGULAR_PARTICIPLES = [
+    ("olver", ["uelto"]),
+    ("abrir", ["abierto"]),
+    ("cubrir", ["cubierto"]),
+    ("scribir", ["scrito"]),
+    ("romper", ["roto"]),
+    ("morir", ["muerto"]),
+    ("imprimir", ["imprimido", "impreso"]),
+    ("proveer", ["proveído", "provisto"]),
+]
+
+# 拼写变化：(不定式词尾, 词干末尾, 触发的词尾首字母, 替换成)
+# 只改拼写、不改发音，不影响 regular 标记
+ORTHOGRAPHIC_RULES = [
+    ("guar", "gu", "eé", "gü"),   # averiguar -> averigüé
+    ("car", "c", "eé", "qu"),     # buscar -> busqué
+    ("gar", "g", "eé", "gu"),     # pagar -> pagué
+    ("zar", "z", "eé", "c"),      # empezar -> empecé
+    ("guir", "gu", "aoáó", "g"),  # seguir -> sigo
+    ("quir", "qu", "aoáó", "c"),  # delinquir -> delinco
+    ("ger", "g", "aoáó", "j"),    # coger -> cojo
+    ("gir", "g", "aoáó", "j"),    # elegir -> elijo
+    ("cer", "c", "aoáó", "z"),    # vencer -> venzo（元音 + cer 走 -zco）
+    ("cir", "c", "aoáó", "z"),    # esparcir -> esparzo
+]
+
+# 真正不规则、不能按规则推出的动词（精确匹配）
+IRREGULAR_VERBS = frozenset([
+    "ser", "estar", "ir", "haber", "poder", "saber", "querer", "dar", "ver",
+    "prever", "entrever", "caber", "andar", "desandar", "satisfacer", "errar",
+    "oler", "podrir", "pudrir", "erguir", "asir", "yacer", "avergonzar",
+    "rehundir", "mecer",
+])
+
+# 不规则词根（按后缀匹配，覆盖派生词：detener / componer / deshacer / complacer）
+IRREGULAR_ROOTS = frozenset([
+    "tener", "poner", "hacer", "venir", "decir", "salir", "valer", "placer", "quirir",
+])
+
+# 恰好以词干变化动词结尾、但本身是规则变位的常见动词（presentar ≠ sentar）
+REGULAR_LOOKALIKES = frozenset([
+    "presentar", "representar", "agregar", "anhelar", "pretender", "interrogar",
+    "derogar", "prorrogar", "compensar", "recompensar", "dispensar",
+])
+
+# 词干元音是 e / o 或以 -iar 结尾、确定不发生词干变化 / 重音移位的常用动词（精确匹配，派生词需逐个列出）
+NO_STEM_CHANGE_VERBS = frozenset([
+    # -ar
+    "llevar", "tomar", "regresar", "quedar", "cenar", "comprar", "llegar", "alegrar", "celebrar",
+    "entrar", "molestar", "prestar", "esperar", "besar", "dejar", "interesar", "mejorar", "dotar",
+    "estorbar", "considerar", "arrojar", "observar", "acercar", "asomar", "informar", "conversar",
+    "prolongar", "tocar", "contestar", "proporcionar", "lograr", "conectar", "alojar", "funcionar",
+    "notar", "reservar", "despegar", "alejar", "soplar", "aconsejar", "adornar", "recortar",
+    "intentar", "cesar", "interpretar", "abandonar", "llorar", "echar", "posar", "transportar",
+    "impacientar", "quemar", "topar", "frotar", "apoyar", "trepar", "razonar", "aceptar", "enseñar",
+    "nombrar", "pesar", "pegar", "entregar", "navegar", "colocar", "provocar", "equivocar",
+    "invocar", "convocar", "ahorrar", "borrar", "cobrar", "controlar", "cortar", "explotar", "gozar",
+    "importar", "ordenar", "perdonar", "reportar", "respetar", "soportar", "votar", "adoptar",
+    "anotar", "agotar", "aportar", "exportar", "fomentar", "aumentar", "comentar", "alimentar",
+    "inventar", "lamentar", "orientar", "experimentar", "detectar", "proyectar", "secar", "pecar",
+    "remar", "versar", "expresar", "progresar", "procesar", "confortar", "comportar", "conservar",
+    "preservar", "operar", "cooperar",
+    "recuperar", "superar", "tolerar", "generar", "acelerar", "alterar", "exagerar", "integrar",
+    "penetrar", "rechazar", "recetar", "decorar", "elaborar",
+    "colaborar", "explorar", "ignorar", "adorar", "honrar", "devorar", "evaporar", "incorporar",
+    # -er
+    "temer", "beber", "comer", "meter", "coger", "romper", "correr", "deber", "comprender",
+    "prometer", "atrever", "recorrer", "responder", "aprender", "vender", "ceder", "conceder",
+    "exceder", "proceder", "suceder", "someter", "cometer", "comprometer", "esconder",
+    "corresponder", "socorrer", "toser", "coser", "recoger", "escoger", "acoger", "proteger",
+    "ejercer", "conocer", "reconocer", "desconocer", "emprender", "sorprender", "ofender",
+    "depender", "suspender", "prender", "corromper",
+    # -iar（重音不移位：estudio / cambio）
+    "estudiar", "limpiar", "cambiar", "odiar", "copiar", "apreciar", "negociar", "anunciar",
+    "pronunciar", "iniciar", "renunciar", "denunciar", "ensuciar", "elogiar", "envidiar",
+    "incendiar", "angustiar", "premiar", "remediar", "acariciar", "divorciar", "financiar",
+    "diferenciar", "presenciar", "asociar", "contagiar", "fastidiar", "plagiar", "agobiar",
+    "abreviar", "distanciar", "licenciar", "sentenciar", "potenciar", "beneficiar", "custodiar",
+])
+
+# 可能重音移位（enviar / actuar）或元音变化（elegir / discernir）的词尾，词表外的交给 LLM
+UNCERTAIN_ENDINGS = ("iar", "uar", "egir", "ernir")
+
+# 仍然交给 LLM 的词尾：-ducir 的不规则简单过去时、-aer/-oer、ñ/ll 后吞 i、
+# 重音不确定的 -uar（-guar 走拼写规则，重音移位的 -uar 查 ACCENT_SHIFT_VERBS）
+UNSUPPORTED_ENDINGS = ("ducir", "aer", "oer", "ñer", "ñir", "llir", "uar")
+
+# 词表里的短词只做精确匹配（按后缀会误伤规则动词）
+_EXACT_ONLY_MAX_LEN = 4
+
+_VOWELS = "aeiouáéíóú"
+
+
+def _in_lexicon(infinitive: str, lexicon) -> bool:
+    """精确匹配，或以词表中的（足够长的）词结尾：detener / componer / describir。"""
+    if infinitive in lexicon:
+        return True
+    for entry in lexicon:
+        if len(entry) > _EXACT_ONLY_MAX_LEN and infinitive.endswith(entry):
+            return True
+    return False
+
+
+def _stem_vowel(stem: str):
+    """词干里最后一个元音（qu / gu 里不发音的 u 不算）：rod -> o，segu -> e，envi -> i。"""
+    if stem.endswith(("qu", "gu")):
+        stem = stem[:-1]
+    for ch in reversed(stem):
+        if ch in _VOWELS:
+            return ch
+    return None
+
+
+def may_change_stem(infinitive: str) -> bool:
+    """
+    拼写上看可能是词干变化或重音移位动词（rodar / tentar / colegir / reenviar），词表外的一律交给 LLM。
+    -ear（pasear）、-eer（leer）、-ecer（parecer，走 -zco）、-guar（averiguar）没有这类变化。
+    """
+    if infinitive.endswith(("ear", "eer", "ecer", "guar")):
+        return False
+    if infinitive.endswith(UNCERTAIN_ENDINGS):
+        return True
+    return _stem_vowel(infinitive[:-2]) in ("e", "o")
+
+
+def split_infinitive(infinitive: str) -> tuple[str, str]:
+    """hablar -> ("habl", "ar")"""
+    return infinitive[:-2], infinitive[-2:]
+
+
+def classify_verb(infinitive: str):
+    """
+    判断动词属于哪种可本地生成的变位类别，返回 paradigm dict：
+      {"name": "o_ue+gar", "stem_change": "o_ue" | None, "accent_shift": bool,
+       "zc": bool, "vowel_stem": "uir" | "eer" | None}
+    不能本地处理时返回 None。
+    infinitive 应为非反身形式（parse_reflexive_verb 之后的 base_verb）。
+    """
+    verb = (infinitive or "").strip().lower()
+    if len(verb) < 3 or not verb.endswith(("ar", "er", "ir")):
+        return None
+    if not verb.isalpha():
+        return None
+    if verb in IRREGULAR_VERBS or _in_lexicon(verb, IRREGULAR_ROOTS):
+        return None
+
+    stem_change = STEM_CHANGE_VERBS.get(verb)
+    accent_shift = verb in ACCENT_SHIFT_VERBS
+    known_regular = verb in REGULAR_LOOKALIKES or verb in NO_STEM_CHANGE_VERBS
+    if stem_change is None and not known_regular and _in_lexicon(verb, STEM_CHANGE_VERBS):
+        # 以词干变化动词结尾但不在词表里：无法区分 renegar（变化）/ agregar（规则）
+        return None
+    if stem_change is None and not accent_shift and not known_regular and may_change_stem(verb):
+        # 不在任何词表里：rodar（ruedo）/ podar（podo）、reenviar（reenvío）/ cambiar（cambio）拼写上分不出来
+        return None
+    if not accent_shift and not verb.endswith("guar") and verb.endswith(UNSUPPORTED_ENDINGS):
+        return None
+
+    stem, _ = split_infinitive(verb)
+    zc = (
+        verb.endswith(("cer", "cir"))
+        and stem_change is None
+        and len(stem) >= 2
+        and stem[-2] in _VOWELS
+    )
+    vowel_stem = None
+    if verb.endswith("uir") and not verb.endswith(("guir", "quir")):
+        vowel_stem = "uir"
+    elif verb.endswith("eer"):
+        vowel_stem = "eer"
+
+    name_parts = [stem_change or ("accent" if accent_shift else "regular")]
+    if zc:
+        name_parts.append("zc")
+    elif vowel_stem:
+        name_parts.append(vowel_stem)
+    else:
+        for inf_suffix, _, _, _ in ORTHOGRAPHIC_RULES:
+            if verb.endswith(inf_suffix):
+                name_parts.append(inf_suffix)
+                break
+
+    return {
+        "name": "+".join(name_parts),
+        "stem_change": stem_change,
+        "accent_shift": accent_shift,
+        "zc": zc,
+        "vowel_stem": vowel_stem,
+    }
+
+
+def _replace_last(text: str, old: str, new: str) -> str:
+    idx = text.rfind(old)
+    if idx == -1:
+        return text
+    return text[:idx] + new + text[idx + len(old):]
+
+
+_ACCENTED = {"i": "í", "u": "ú"}
+
+
+def _accent_last_weak_vowel(stem: str) -> str:
+    """envi -> enví，continu -> continú，reun -> reún"""
+    for idx in range(len(stem) - 1, -1, -1):
+        if stem[idx] in _ACCENTED:
+            return stem[:idx] + _ACCENTED[stem[idx]] + stem[idx + 1:]
+    return stem
+
+
+def _join(verb: str, stem: str, ending: str, paradigm: dict) -> tuple[str, bool]:
+    """
+    词干 + 词尾，套用拼写规则。
+    返回 (形式, 是否发生了影响发音的不规则变化)。
+    """
+    first = ending[:1]
+    vowel_stem = paradigm["vowel_stem"]
+
+    if vowel_stem:
+        # 元音结尾的词干：非重读 i 在元音前变 y（leyó / construyeron / leyendo）
+        if first == "i" and ending[1:2] and ending[1] in _VOWELS:
+            return stem + "y" + ending[1:], True
+        # -eer：重读 i 要写重音（leíste / leímos / leído）
+        if vowel_stem == "eer" and first == "i":
+            return stem + "í" + ending[1:], True
+        # -uir：a/e/o 前插入 y（construyo / construya）
+        if vowel_stem == "uir" and first in "aeoáéó":
+            return stem + "y" + ending, True
+        return stem + ending, False
+
+    if paradigm["zc"] and stem.endswith("c") and first in "aoáó":
+        return stem[:-1] + "zc" + ending, True
+
+    for inf_suffix, tail, triggers, replacement in ORTHOGRAPHIC_RULES:
+        if verb.endswith(inf_suffix):
+            if stem.endswith(tail) and first in triggers:
+                return stem[: -len(tail)] + replacement + ending, False
+            break
+    return stem + ending, False
+
+
+def _slot_stem(base_stem: str, ending_class: str, paradigm: dict, mood: str, tense: str, person: str) -> str:
+    """按槽位选词干：强变化 / -ir 弱变化 / 重音移位 / 原词干。"""
+    key = (mood, tense)
+    stem_change = paradigm["stem_change"]
+    if stem_change:
+        vowel, strong, weak = STEM_CHANGES[stem_change]
+        if person in STRONG_STEM_SLOTS.get(key, ()):
+            return _replace_last(base_stem, vowel, strong)
+        if ending_class == "ir" and person in WEAK_STEM_SLOTS.get(key, ()):
+            return _replace_last(base_stem, vowel, weak)
+    elif paradigm["accent_shift"] and person in STRONG_STEM_SLOTS.get(key, ()):
+        return _accent_last_weak_vowel(base_stem)
+    return base_stem
+
+
+def _participles(verb: str, stem: str, ending_class: str, paradigm: dict) -> list:
+    for suffix, replacements in IRREGULAR_PARTICIPLES:
+        if verb.endswith(suffix):
+            prefix = verb[: -len(suffix)]
+            return [prefix + replacement for replacement in replacements]
+    form, _ = _join(verb, stem, PARTICIPLE_ENDINGS[ending_class], paradigm)
+    return [form]
+
+
+def _build_imperative(verb: str, stem: str, ending_class: str, paradigm: dict, indicative: dict, subjunctive: dict) -> dict:
+    """命令式由陈述式现在时 / 虚拟式现在时推出，和 LLM 输出保持同样的槽位约定。"""
+    imp_endings = IMPERATIVE_ENDINGS[ending_class]
+    subj_present = subjunctive["present"]
+    ind_present = indicative["present"]
+
+    vos_form, _ = _join(verb, stem, imp_endings["vos"], paradigm)
+    vosotros_form, _ = _join(verb, stem, imp_endings["vosotros"], paradigm)
+
+    # verbs.json 的约定：命令式一律 regular=false（321 个动词里 282 个，规则动词也是），
+    # morph_check 也不核对命令式的 regular
+    affirmative = {
+        "regular": False,
+        "first_singular": [],
+        "second_singular": list(ind_present["third_singular"]),
+        "second_singular_vos_form": [vos_form],
+        "third_singular": list(subj_present["third_singular"]),
+        "first_plural": list(subj_present["first_plural"]),
+        "second_plural": [vosotros_form],
+        "third_plural": list(subj_present["third_plural"]),
+    }
+
+    # 否定命令式 = no + 虚拟式现在时，vos 同样沿用虚拟式：no pensés / no durmás / no pidás
+    negative = {"regular": False, "first_singular": []}
+    for person in PERSON_KEYS[1:]:
+        negative[person] = [f"no {form}" for form in subj_present[person]]
+
+    return {"affirmative": affirmative, "negative": negative}
+
+
+def generate(infinitive: str, paradigm: dict) -> dict:
+    """按 paradigm 生成完整的简单时态 + 命令式（结构同 LLM 返回值）。"""
+    verb = infinitive
+    stem, ending_class = split_infinitive(verb)
+    endings = REGULAR_ENDINGS[ending_class]
+
+    moods: dict = {}
+    for mood, tenses in SIMPLE_TENSES.items():
+        mood_obj = {}
+        for tense in tenses:
+            if (mood, tense) in INFINITIVE_ENDINGS:
+                tense_obj = {"regular": True}
+                for person, person_endings in zip(PERSON_KEYS, INFINITIVE_ENDINGS[(mood, tense)]):
+                    tense_obj[person] = [verb + ending for ending in person_endings]
+                mood_obj[tense] = tense_obj
+                continue
+
+            regular = True
+            person_forms = {}
+            for person, person_endings in zip(PERSON_KEYS, endings[(mood, tense)]):
+                slot_stem = _slot_stem(stem, ending_class, paradigm, mood, tense, person)
+                if slot_stem != stem:
+                    regular = False
+                forms = []
+                for ending in person_endings:
+                    form, irregular = _join(verb, slot_stem, ending, paradigm)
+                    regular = regular and not irregular
+                    forms.append(form)
+                person_forms[person] = forms
+            mood_obj[tense] = {"regular": regular, **person_forms}
+        moods[mood] = mood_obj
+
+    # 副动词跟随 -ir 弱变化：sintiendo / durmiendo / pidiendo
+    gerund_stem = _slot_stem(stem, ending_class, paradigm, "subjunctive", "imperfect", "first_singular")
+    gerund, _ = _join(verb, gerund_stem, GERUND_ENDINGS[ending_class], paradigm)
+
+    return {
+        "infinitive": verb,
+        "gerund": gerund,
+        "participle": _participles(verb, stem, ending_class, paradigm),
+        "is_reflexive": False,
+        "indicative": moods["indicative"],
+        "subjunctive": moods["subjunctive"],
+        "imperative": _build_imperative(
+            verb, stem, ending_class, paradigm, moods["indicative"], moods["subjunctive"]
+        ),
+    }
+
+
+def conjugate(infinitive: str):
+    """本地能处理就返回变位 dict，否则返回 None（调用方回退到 LLM）。"""
+    verb = (infinitive or "").strip().lower()
+    paradigm = classify_verb(verb)
+    if paradigm is None:
+        return None
+    return generate(verb, paradigm)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+verbs.json 的反向索引：变位形式 -> (infinitive, 语气, 时态, 人称)，用于判题和识别用户输入的是哪个动词，
+不用每次扫一遍所有动词的所有变位。
+
+- 覆盖简单时态、命令式、复合时态（文件里没写复合时态时按 compound_tenses.py 的规则展开）
+  以及 infinitive / gerund / participle（mood 记为 "nonfinite"，person 为 None）
+- key 不区分大小写和重音（fold_form：去掉重音和分音符，保留 ñ），
+  每条记录带原形式，lookup(exact=True) 只要重音也一致的
+- 同一个形式可以对应多个槽位 / 多个动词（hable = 虚拟式一单 / 三单 / 命令式 usted ...），全部返回
+- 每个形式预先算好三种 key，消费方不用各自再做 Unicode 处理：
+  原形式小写（记录里）、fold_form（去重音、保留 ñ，forms 的 key）、strip_form（连 ñ 也去掉，ascii 表）
+- 近似匹配（fuzzy_lookup）：编辑距离 1 以内（增 / 删 / 改 / 相邻换位）用删除邻域索引，
+  只比对候选，不扫全表；--fuzzy 构建时预计算进文件，没有时载入后第一次查询现算
+
+文件格式（JSON，format_version = 2）：
+    {"format_version": 2,
+     "verbs": ["hablar", ...],                                  # 动词表，按 verbs.json 顺序
+     "slots": ["indicative.present.first_singular", ...],       # 槽位表
+     "forms": {"hablo": [[0, 0], [0, 17, "habló"]], "hable": [[0, 40], [0, 43], ...], ...},
+     "ascii": {"ensenamos": ["enseñamos"], ...},                # strip_form 与 fold_form 不同的 key
+     "deletes": {"hblo": [12], ...}}                            # 可选：删掉一个字符 -> forms 里第几个 key
+  forms 的每条记录是 [动词下标, 槽位下标] 或 [动词下标, 槽位下标, 原形式]（原形式与 key 相同时省略）。
+  载入后就是几个 dict，精确查询 O(1)，近似查询只看删除邻域里的候选（全量词表下亚毫秒）。
+
+用法：
+    python3 scripts/utils/form_index.py server/src/verbs.json server/src/verbs.forms.json
+    python3 scripts/utils/form_index.py --lookup hubieramos server/src/verbs.forms.json
+    python3 scripts/utils/form_index.py --fuzzy server/src/verbs.json server/src/verbs.forms.json
+    python3 scripts/utils/form_index.py --fuzzy --lookup hubieranos server/src/verbs.forms.json
+    python3 scripts/utils/get_verb.py in.txt out.json --form-index out.forms.json
+"""
+
+import argparse
+import json
+import os
+import unicodedata
+
+import compound_tenses
+from json_stream import iter_json_array
+
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+# 删除邻域索引覆盖的最大编辑距离
+FUZZY_DISTANCE = 1
+
+FINITE_MOODS = ("indicative", "subjunctive", "imperative") + compound_tenses.COMPOUND_MOODS
+NONFINITE_FIELDS = ("infinitive", "gerund", "participle")
+
+# NFD 下 ñ = n + U+0303，这个组合要保留；其余组合附加符号（重音、分音符等）去掉
+_TILDE = "\u0303"
+
+
+def fold_form(form: str) -> str:
+    """小写、去重音、保留 ñ、压缩空白：Hubiéramos -> hubieramos，NO  hables -> no hables。"""
+    decomposed = unicodedata.normalize("NFD", " ".join(str(form).split()).lower())
+    chars = []
+    for char in decomposed:
+        if unicodedata.combining(char) and not (char == _TILDE and chars and chars[-1] == "n"):
+            continue
+        chars.append(char)
+    return unicodedata.normalize("NFC", "".join(chars))
+
+
+def strip_form(form: str) -> str:
+    """在 fold_form 基础上连 ñ 也去掉：enseñamos -> ensenamos（没有 ñ 键盘时的输入）。"""
+    decomposed = unicodedata.normalize("NFD", fold_form(form))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _deletions(key: str) -> set:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def build_deletes(keys) -> dict:
+    """删除邻域：删掉一个字符后的串 -> 原 key 在 keys 里的下标。"""
+    deletes = {}
+    for key_id, key in enumerate(keys):
+        for deletion in _deletions(key):
+            deletes.setdefault(deletion, []).append(key_id)
+    return deletes
+
+
+def edit_distance(a: str, b: str, limit: int = FUZZY_DISTANCE) -> int:
+    """带相邻换位的编辑距离（optimal string alignment）；超过 limit 时返回 limit + 1。"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def iter_verb_forms(verb: dict):
+    """逐个产出 (mood, tense, person, form)；复合时态缺失时按规则展开。"""
+    if not any(mood in verb for mood in compound_tenses.COMPOUND_MOODS):
+        verb = compound_tenses.expand_compound_tenses(dict(verb))
+
+    for field in NONFINITE_FIELDS:
+        values = verb.get(field)
+        for value in values if isinstance(values, list) else [values]:
+            if isinstance(value, str) and value.strip():
+                yield "nonfinite", field, None, value
+
+    for mood in FINITE_MOODS:
+        mood_obj = verb.get(mood)
+        if not isinstance(mood_obj, dict):
+            continue
+        for tense, tense_obj in mood_obj.items():
+            if not isinstance(tense_obj, dict):
+                continue
+            for person, forms in tense_obj.items():
+                if person == "regular" or not isinstance(forms, list):
+                    continue
+                for form in forms:
+                    if isinstance(form, str) and form.strip():
+                        yield mood, tense, person, form
+
+
+def _slot_name(mood: str, tense: str, person) -> str:
+    return f"{mood}.{tense}" if person is None else f"{mood}.{tense}.{person}"
+
+
+def build_index(verbs, fuzzy: bool = False) -> dict:
+    """verbs.json 形状的动词序列 -> 可直接 json.dump 的索引；fuzzy=True 时带上删除邻域。"""
+    verb_names = []
+    slot_ids = {}
+    forms = {}
+    for verb in verbs:
+        if not isinstance(verb, dict) or not verb.get("infinitive"):
+            continue
+        verb_id = len(verb_names)
+        verb_names.append(str(verb["infinitive"]).strip())
+        seen = set()
+        for mood, tense, person, form in iter_verb_forms(verb):
+            slot_id = slot_ids.setdefault(_slot_name(mood, tense, person), len(slot_ids))
+            surface = " ".join(form.split()).lower()
+            if (slot_id, surface) in seen:
+                continue
+            seen.add((slot_id, surface))
+            key = fold_form(surface)
+            entry = [verb_id, slot_id] if surface == key else [verb_id, slot_id, surface]
+            forms.setdefault(key, []).append(entry)
+    ascii_keys = {}
+    for key in forms:
+        stripped = strip_form(key)
+        if stripped != key:
+            ascii_keys.setdefault(stripped, []).append(key)
+
+    index = {
+        "format_version": FORMAT_VERSION,
+        "verbs": verb_names,
+        "slots": list(slot_ids),
+        "forms": forms,
+        "ascii": ascii_keys,
+    }
+    if fuzzy:
+        index["deletes"] = build_deletes(forms)
+    return index
+
+
+def write_index(index: dict, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+
+
+def export_json_file(json_path: str, index_path: str, fuzzy: bool = False) -> dict:
+    """从 verbs.json 流式构建索引并写出，返回索引本身。"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        index = build_index(iter_json_array(f), fuzzy=fuzzy)
+    write_index(index, index_path)
+    return index
+
+
+class FormIndex:
+    """
+    用法：
+        index = FormIndex.load("server/src/verbs.forms.json")
+        index.lookup("hubieramos")   # [{"form": "hubiéramos", "infinitive": "haber", ...}, ...]
+        index.fuzzy_lookup("hubieranos")   # 同上，多一个 "distance"
+    """
+
+    def __init__(self, index: dict):
+        if index.get("format_version") not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported form index version: {index.get('format_version')!r}")
+        self.verbs = index["verbs"]
+        # "indicative.present.first_singular" -> (mood, tense, person)；nonfinite 槽位没有 person
+        self.slots = [tuple((slot.split(".") + [None])[:3]) for slot in index["slots"]]
+        self.forms = index["forms"]
+        self.keys = list(self.forms)
+        if "ascii" in index:
+            self.ascii = index["ascii"]
+        else:
+            self.ascii = {}
+            for key in self.keys:
+                if strip_form(key) != key:
+                    self.ascii.setdefault(strip_form(key), []).append(key)
+        self._deletes = index.get("deletes")
+        self._key_ids = None
+
+    @classmethod
+    def load(cls, path: str) -> "FormIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def lookup(self, form: str, exact: bool = False) -> list:
+        """返回所有匹配的槽位；exact=True 时只要重音也一致的（仍不区分大小写）。"""
+        key = fold_form(form)
+        surface = " ".join(str(form).split()).lower() if exact else None
+        return [
+            match for match in self._matches(key)
+            if not exact or match["form"] == surface
+        ]
+
+    def _matches(self, key: str, **extra) -> list:
+        matches = []
+        for entry in self.forms.get(key, ()):
+            mood, tense, person = self.slots[entry[1]]
+            matches.append({
+                "form": entry[2] if len(entry) > 2 else key,
+                "infinitive": self.verbs[entry[0]],
+                "mood": mood,
+                "tense": tense,
+                "person": person,
+                **extra,
+            })
+        return matches
+
+    def fuzzy_lookup(self, form: str) -> list:
+        """
+        近似匹配，结果按 distance 排序：
+        0 = 只差大小写 / 重音（含把 ñ 打成 n），1 = 再差一次增 / 删 / 改 / 相邻换位。
+        文件里没有预计算的删除邻域时，第一次调用现算（全量词表约 0.5 s）。
+        """
+        key = fold_form(form)
+        candidates = dict.fromkeys([key] + self.ascii.get(strip_form(key), []), 0)
+        if self._deletes is None:
+            self._deletes = build_deletes(self.keys)
+        if self._key_ids is None:
+            self._key_ids = {k: i for i, k in enumerate(self.keys)}
+
+        for probe in {key} | _deletions(key):
+            key_ids = list(self._deletes.get(probe, ()))
+            if probe != key and probe in self._key_ids:
+                key_ids.append(self._key_ids[probe])
+            for key_id in key_ids:
+                candidate = self.keys[key_id]
+                if candidate in candidates:
+                    continue
+                distance = edit_distance(key, candidate)
+                if distance <= FUZZY_DISTANCE:
+                    candidates[candidate] = distance
+
+        # 距离相同时，重音也一致的排在前面
+        surface = " ".join(str(form).split()).lower()
+        matches = []
+        for candidate, distance in candidates.items():
+            matches.extend(self._matches(candidate, distance=distance))
+        matches.sort(key=lambda match: (match["distance"], match["form"] != surface))
+        return matches
+
+    def infinitives(self, form: str, exact: bool = False) -> list:
+        """形式可能属于的动词（去重，保持顺序）。"""
+        return list(dict.fromkeys(match["infinitive"] for match in self.lookup(form, exact)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建 / 查询 verbs.json 的反向索引（变位形式 -> 动词和槽位）。")
+    parser.add_argument("paths", nargs="+", help="构建：<verbs.json> <index.json>；查询：<index.json>")
+    parser.add_argument("--lookup", metavar="FORM", action="append", help="在索引里查询形式（可重复）")
+    parser.add_argument("--exact", action="store_true", help="查询时重音也要一致")
+    parser.add_argument("--fuzzy", action="store_true", help="构建时预计算删除邻域；查询时做编辑距离 1 以内的近似匹配")
+    args = parser.parse_args()
+
+    if args.lookup:
+        index = FormIndex.load(args.paths[-1])
+        for form in args.lookup:
+            print(form)
+            matches = index.fuzzy_lookup(form) if args.fuzzy else index.lookup(form, exact=args.exact)
+            for match in matches:
+                distance = f"  (distance {match['distance']})" if "distance" in match else ""
+                print(
+                    f"    {match['form']}  {match['infinitive']}  "
+                    f"{_slot_name(match['mood'], match['tense'], match['person'])}{distance}"
+                )
+        return
+
+    if len(args.paths) != 2:
+        parser.error("构建索引需要两个参数：<verbs.json> <index.json>")
+    index = export_json_file(args.paths[0], args.paths[1], fuzzy=args.fuzzy)
+    entries = sum(len(entries) for entries in index["forms"].values())
+    size_kb = os.path.getsize(args.paths[1]) / 1024
+    print(
+        f"Indexed {len(index['verbs'])} verbs: {len(index['forms'])} keys, {entries} entries "
+        f"-> {args.paths[1]} ({size_kb:.0f} KB)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -48,24 +48,86 @@
 输出：
 - 最终输出是一个 JSON 数组。
 - 采用流式写入：每处理完一个动词立即写入文件，方便中途查看。
-- dict 使用缩进多行；所有 list 都压成一行：["forma1","forma2"]。
+- 支持并发请求（--concurrency），用令牌桶（--rate）限速，每次发请求（含重试）都取令牌；
+  结果经重排缓冲后仍按输入顺序写出。
+- 模型原始回复按 (model, system prompt, user prompt) 缓存在本地 SQLite（见 llm_cache.py），
+  重跑时命中缓存不再请求 API；LLM_CACHE_MODE=off/refresh 可关闭/强制刷新。
+- --local-engine：conjugator.py 能推出的动词（规则、词干变化、拼写变化、-zco 等）
+  在本地按词尾表生成简单时态和命令式，
+  模型只负责判断 has_tr_use / has_intr_use，省掉绝大部分输出 token 和等待时间。
+- --batch-size N：一次请求 N 个动词（共享一份 system prompt），模型返回以动词为 key 的对象；
+  每个动词的结果单独校验，缺失或不合格的动词退回单动词请求。
+- 模型请求经 llm_backend.py：LLM_BACKEND=dashscope（默认）| openai（OpenAI 兼容 HTTP，
+  可指向本地 mock_llm_server.py 离线压测）。
+- 模型回复先过 verb_validator.py 的结构校验（人称齐全、subjunctive imperfect 的 -ra/-se 双形、
+  命令式第一人称为空等），不合格的回复不缓存、重新请求，用尽后进死信而不是写进输出。
+- --compact：用紧凑格式请求（见 compact_format.py）：prompt 更短，每个时态写成按固定人称顺序的数组，
+  回复在本地展开成原来的形状再校验，输出文件不变。
+- 每次请求的 token 用量和延迟按请求类别汇总打印（见 llm_usage.py）；--usage-log PATH 另外逐条写成 JSONL，
+  方便比较不同格式每个动词的 token 和延迟。
+- --metrics-out PATH（或环境变量 RUN_METRICS_OUT）：按动词记录排队、请求、解析、normalize、写出各阶段耗时，
+  以及 token 和重试次数，运行结束写成 JSON 或 Prometheus textfile（*.prom），见 run_metrics.py。
+- --cross-check：结构校验之后再用 morph_check.py 拿规则引擎核对模型给出的形式和 regular 标记，
+  有矛盾的回复同样重新请求；重试用尽后，只有引擎的 paradigm 来自明确词表条目、且形式不一致的动词进死信，
+  其余（词表外的动词、只是 regular 标记不一致）保留模型的回复，矛盾写进 <output>.crosscheck.jsonl 留待复核。
+- 限流 / 5xx / 网络错误按指数退避 + jitter 重试，回复不是合法 JSON 时重新请求，
+  鉴权失败立即中止（见 llm_retry.py）；最终失败的动词写入 <output>.deadletter.jsonl。
+- --resume：读取已有输出（可以是中途崩溃、没写完的数组），按 infinitive 建索引，
+  只把缺失/失败的动词发给模型；新结果先写到 <output>.partial，完成后替换原文件。
+- --derived-compound：输出里不写复合时态，只留 participle，消费方用 compound_tenses.py 的
+  expand_compound_tenses 按共用的 haber 规则表展开（文件约小 60%）；默认仍写完整形式。
+- --table-out PATH：写完 JSON 后再导出一份扁平 SQLite 表（见 verb_table.py），
+  服务端启动时可直接批量导入，不用解析整个嵌套 JSON。
+- --form-index PATH：写完 JSON 后再构建反向索引（变位形式 -> 动词和槽位，见 form_index.py）。
+- --workers N：normalize / 复合时态 / 哈希 / 序列化分给 N 个进程按块执行（llm_pool.imap_processes），
+  用缓存重跑上万个动词时不再卡在单核上；输出顺序和内容与单进程完全一致。
+- --db PATH：写完 JSON 后直接 upsert 进服务端词库（见 verb_db_sink.py），只改内容有变化的行。
+- dict 使用缩进多行；所有 list 都压成一行：["forma1", "forma2"]（json_writer.py 单遍写出）。
 - 顶层字段顺序固定为：
   infinitive, gerund, participle, is_reflexive, has_tr_use, has_intr_use, ...
+  最后一个字段是 content_hash（见 verb_diff.py），与旧输出对比时只看哈希变了的动词。
 """
 
 import os
 import sys
-import json
 import time
-import re
-from http import HTTPStatus
+import argparse
+from collections import deque
+from functools import partial
 
-from dashscope import Generation
 from dotenv import load_dotenv
 
-# 每次请求之间的间隔，防止打太快
+import compact_format
+import compound_tenses
+import form_index
+import conjugator
+import json_writer
+import morph_check
+import verb_db_sink
+import verb_diff
+import verb_table
+import verb_validator
+from checkpoint import load_partial_json_array
+from llm_backend import get_default_backend
+from llm_cache import get_default_cache
+from llm_json import parse_json_reply
+from llm_pool import TokenBucket, get_default_limiter, imap_ordered, imap_processes, set_default_limiter
+from llm_retry import (
+    AuthError,
+    DeadLetterFile,
+    MalformedResponseError,
+    default_dead_letter_path,
+    get_default_retry_policy,
+)
+from llm_usage import UsageLog, format_summary, get_default_usage_log, set_default_usage_log
+from run_metrics import RunMetrics, get_default_run_metrics, output_paths_from_env, set_default_run_metrics
+
+# 默认请求间隔，防止打太快；换算成令牌桶速率 1 / REQUEST_INTERVAL_SECONDS
 REQUEST_INTERVAL_SECONDS = 0.5
 
+# 默认同时在途的请求数
+DEFAULT_CONCURRENCY = 1
+
 # 7 个人称 key
 PERSON_KEYS = [
     "first_singular",
@@ -91,81 +153,6 @@ TOP_LEVEL_KEY_ORDER = [
     "compound_subjunctive",
 ]
 
-# haber 的简单时态（不含 vos），用于复合时态强规则生成
-HABER_FORMS = {
-    "indicative": {
-        "present": {
-            "first_singular": "he",
-            "second_singular": "has",
-            "third_singular": "ha",
-            "first_plural": "hemos",
-            "second_plural": "habéis",
-            "third_plural": "han",
-        },
-        "imperfect": {
-            "first_singular": "había",
-            "second_singular": "habías",
-            "third_singular": "había",
-            "first_plural": "habíamos",
-            "second_plural": "habíais",
-            "third_plural": "habían",
-        },
-        "future": {
-            "first_singular": "habré",
-            "second_singular": "habrás",
-            "third_singular": "habrá",
-            "first_plural": "habremos",
-            "second_plural": "habréis",
-            "third_plural": "habrán",
-        },
-        "conditional": {
-            "first_singular": "habría",
-            "second_singular": "habrías",
-            "third_singular": "habría",
-            "first_plural": "habríamos",
-            "second_plural": "habríais",
-            "third_plural": "habrían",
-        },
-        # ★ 新增：haber 的 pretérito，用于 pretérito anterior
-        "preterite": {
-            "first_singular": "hube",
-            "second_singular": "hubiste",
-            "third_singular": "hubo",
-            "first_plural": "hubimos",
-            "second_plural": "hubisteis",
-            "third_plural": "hubieron",
-        },
-    },
-    "subjunctive": {
-        "present": {
-            "first_singular": "haya",
-            "second_singular": "hayas",
-            "third_singular": "haya",
-            "first_plural": "hayamos",
-            "second_plural": "hayáis",
-            "third_plural": "hayan",
-        },
-        # subjunctive imperfect 有双形：hubiera / hubiese
-        "imperfect": {
-            "first_singular": ["hubiera", "hubiese"],
-            "second_singular": ["hubieras", "hubieses"],
-            "third_singular": ["hubiera", "hubiese"],
-            "first_plural": ["hubiéramos", "hubiésemos"],
-            "second_plural": ["hubierais", "hubieseis"],
-            "third_plural": ["hubieran", "hubiesen"],
-        },
-        "future": {
-            "first_singular": "hubiere",
-            "second_singular": "hubieres",
-            "third_singular": "hubiere",
-            "first_plural": "hubiéremos",
-            "second_plural": "hubiereis",
-            "third_plural": "huberen",
-        },
-    },
-}
-
-# ====== 系统提示词：只让 LLM 负责简单时态和命令式 ======
 SYSTEM_PROMPT = """
 You are an expert Spanish linguist and a strict JSON generator.
 
@@ -225,6 +212,48 @@ Additional rules:
 """
 
 
+# ====== 本地规则引擎生成变位时，只让 LLM 判断及物/不及物 ======
+FLAGS_SYSTEM_PROMPT = """
+You are an expert Spanish linguist and a strict JSON generator.
+
+Given ONE Spanish verb in its infinitive form (non-reflexive, like "llamar"),
+return a single JSON object with EXACTLY these fields:
+- "has_tr_use": boolean, true if the verb has a common transitive use
+- "has_intr_use": boolean, true if the verb has a common intransitive use
+
+Do NOT print comments or explanations. Only output a single JSON object.
+"""
+
+
+# ====== 批量模式：一次请求多个动词，返回以动词为 key 的 JSON 对象 ======
+BATCH_MODE_RULES = """
+Batch mode:
+You will receive SEVERAL verbs (one per line) instead of one.
+Return ONE JSON object whose keys are the given infinitives, written exactly as in the input,
+and whose values are the per-verb objects described above.
+Do not skip any verb and do not add verbs that were not given.
+"""
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + BATCH_MODE_RULES
+
+# --compact：每个时态按固定人称顺序写成数组（见 compact_format.py），prompt 和回复都更短
+BATCH_COMPACT_SYSTEM_PROMPT = compact_format.COMPACT_SYSTEM_PROMPT + BATCH_MODE_RULES
+
+BATCH_FLAGS_SYSTEM_PROMPT = FLAGS_SYSTEM_PROMPT + """
+Batch mode:
+You will receive SEVERAL verbs (one per line) instead of one.
+Return ONE JSON object whose keys are the given infinitives, written exactly as in the input,
+and whose values are objects with the two fields above.
+Do not skip any verb and do not add verbs that were not given.
+"""
+
+# 默认每次请求的动词数（1 = 不批量）
+DEFAULT_BATCH_SIZE = 1
+
+# --workers 时每次交给一个进程的动词数：太小进程间往返多，太大输出攒得久
+POSTPROCESS_CHUNK_SIZE = 32
+
+
 def load_verbs_from_file(path: str) -> list[str]:
     """从 txt 文件加载动词（每行一个），去掉空行和前后空白。"""
     verbs: list[str] = []
@@ -236,23 +265,6 @@ def load_verbs_from_file(path: str) -> list[str]:
     return verbs
 
 
-def extract_json_from_text(text: str) -> str:
-    """
-    从模型返回的文本中提取 JSON 部分。
-    防止出现 ```json ... ``` 之类的包裹。
-    """
-    text = text.strip()
-    text = re.sub(r"^```(?:json)?", "", text, flags=re.IGNORECASE | re.MULTILINE)
-    text = re.sub(r"```$", "", text, flags=re.MULTILINE)
-    text = text.strip()
-
-    start = text.find('{')
-    end = text.rfind('}')
-    if start == -1 or end == -1 or start > end:
-        raise ValueError("No JSON object found in model output:\n" + text)
-    return text[start:end + 1]
-
-
 def _ensure_list(value):
     """把值统一变成 list 形式：str -> [str], None -> [], list -> 自身。"""
     if value is None:
@@ -407,221 +419,176 @@ def parse_reflexive_verb(raw_verb: str) -> tuple[str, bool]:
 
 def add_compound_tenses(data: dict) -> dict:
     """
-    根据 participle 和 haber 的固定变位规则，在 data 上添加：
+    根据 participle 和 haber 的固定变位规则（compound_tenses.py），在 data 上添加：
     - compound_indicative
     - compound_subjunctive
     """
-    participles: list[str] = data.get("participle", [])
-    if not participles:
-        return data
-
-    main_p = participles[0]
-    has_irregular_participle = len(participles) > 1
-
-    compound_indicative = {}
-    compound_subjunctive = {}
-
-    def build_compound_tense(
-        aux_forms: dict,
-        use_all_participles: bool = False,
-        use_double_aux: bool = False,
-    ) -> dict:
-        """
-        aux_forms:
-          - use_double_aux=False: person -> str
-          - use_double_aux=True:  person -> [aux1, aux2]
-        返回一个时态对象（不含 regular 字段）
-        """
-        tense_obj: dict = {}
-        for person in PERSON_KEYS:
-            if person == "second_singular_vos_form":
-                # 先留空，normalize 时会用 second_singular 补
-                tense_obj[person] = []
-                continue
+    return compound_tenses.expand_compound_tenses(data)
 
-            if person not in aux_forms:
-                tense_obj[person] = []
-                continue
 
-            if use_double_aux:
-                aux_list = _ensure_list(aux_forms[person])
-            else:
-                aux_list = [aux_forms[person]]
-
-            forms: list[str] = []
-            if use_all_participles:
-                # aux × participles 的笛卡尔积
-                # 为了读起来更自然，先按 participle 再按 aux 排：
-                # ["hubiera imprimido","hubiese imprimido","hubiera impreso","hubiese impreso"]
-                for p in participles:
-                    for aux in aux_list:
-                        forms.append(f"{aux} {p}")
-            else:
-                # 只使用 main participle
-                for aux in aux_list:
-                    forms.append(f"{aux} {main_p}")
-
-            tense_obj[person] = forms
-
-        return tense_obj
-
-    # ===== compound_indicative =====
-    ci = {}
-
-    # pretérito perfecto: haber.indicative.present + main participle
-    ci["preterite_perfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["indicative"]["present"],
-            use_all_participles=False,
-            use_double_aux=False,
-        ),
-    }
-    # pluscuamperfecto: haber.indicative.imperfect + main participle
-    ci["pluperfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["indicative"]["imperfect"],
-            use_all_participles=False,
-            use_double_aux=False,
-        ),
-    }
-    # futuro perfecto: haber.indicative.future + main participle
-    ci["future_perfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["indicative"]["future"],
-            use_all_participles=False,
-            use_double_aux=False,
-        ),
-    }
-    # condicional perfecto: haber.indicative.conditional + main participle
-    ci["conditional_perfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["indicative"]["conditional"],
-            use_all_participles=False,
-            use_double_aux=False,
-        ),
-    }
-    # ★ 新增：pretérito anterior（haber.indicative.preterite + 所有 participles）
-    ci["preterite_anterior"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["indicative"]["preterite"],
-            use_all_participles=True,   # 单分词 → 1 形；双分词 → 2 形
-            use_double_aux=False,
-        ),
-    }
-
-    compound_indicative = ci
-
-    # ===== compound_subjunctive =====
-    cs = {}
-
-    # pretérito perfecto del subjuntivo: haber.subjunctive.present + main participle
-    cs["preterite_perfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["subjunctive"]["present"],
-            use_all_participles=False,
-            use_double_aux=False,
-        ),
-    }
-
-    # pluscuamperfecto del subjuntivo:
-    #   - 单分词：2 形（hubiera X, hubiese X）
-    #   - 双分词：4 形（aux 双形 × 分词双形）
-    cs["pluperfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["subjunctive"]["imperfect"],
-            use_all_participles=True,
-            use_double_aux=True,
-        ),
-    }
-
-    # futuro perfecto del subjuntivo: haber.subjunctive.future + main participle
-    cs["future_perfect"] = {
-        "regular": not has_irregular_participle,
-        **build_compound_tense(
-            HABER_FORMS["subjunctive"]["future"],
-            use_all_participles=False,
-            use_double_aux=False,
-        ),
-    }
-
-    compound_subjunctive = cs
-
-    data["compound_indicative"] = compound_indicative
-    data["compound_subjunctive"] = compound_subjunctive
-    return data
+def target_infinitive(raw_verb: str) -> str:
+    """输入行最终对应的 infinitive（与 call_qwen_for_verb 覆盖后的值一致）。"""
+    base_verb, is_reflexive = parse_reflexive_verb(raw_verb)
+    return base_verb + "se" if is_reflexive else base_verb
 
 
-def compact_lists(json_str: str) -> str:
+def load_existing_results(*paths: str) -> dict:
     """
-    把 json_str 里的所有 JSON 数组格式压成一行，例如：
-      [
-        "a",
-        "b"
-      ]
-    变成：
-      ["a","b"]
-    假设数组元素都是字符串（本项目正好如此）。
+    从已有输出（或上次 resume 留下的 .partial）中读取已生成的动词，按 infinitive 建索引。
+    后面的文件覆盖前面的同名动词。
     """
-    pattern = r'\[\s*(?:"[^"\n]*"(?:\s*,\s*"[^"\n]*")*)\s*\]'
-
-    def repl(match: re.Match) -> str:
-        text = match.group(0)
-        try:
-            arr = json.loads(text)
-            if isinstance(arr, list):
-                return json.dumps(arr, ensure_ascii=False)
-        except Exception:
-            pass
-        return text
-
-    return re.sub(pattern, repl, json_str)
-
+    existing: dict = {}
+    for path in paths:
+        for item in load_partial_json_array(path):
+            if isinstance(item, dict) and item.get("infinitive"):
+                existing[item["infinitive"]] = item
+    return existing
+
+
+def request_qwen_json(
+    system_prompt: str,
+    user_prompt: str,
+    label: str,
+    validate=None,
+    decode=None,
+    usage_kind: str = "full",
+    verb_count: int = 1,
+    soft_validate=None,
+) -> dict:
+    """
+    发一次 Qwen 请求（经 LLM_BACKEND 选定的后端，见 llm_backend.py）并把回复解析成 dict。
+    - 同一 (model, prompt) 已经请求过就直接用本地缓存的原始回复
+    - 限流 / 5xx / 网络错误退避重试，回复不是合法 JSON 时重新请求（见 llm_retry.py）
+    - 每次真正发请求（含重试）前从 get_default_limiter() 取一个令牌，429 退避时也不会超出 --rate；缓存命中不取
+    - decode(data) 把解析出的 JSON 转成调用方要的形状（如展开紧凑格式），抛 ValueError 同样重新请求
+    - validate(data) 返回问题列表时，同样当作格式错误重新请求；缓存里的旧回复不合格则忽略
+    - soft_validate(data) 返回问题列表时也重新请求，但重试用尽后返回最后一次 validate 通过的回复
+      （不写缓存），由调用方再核对、报告
+    - 每次真正发出的请求按 usage_kind 记 token 用量和延迟（见 llm_usage.py），verb_count 是这次请求的动词数
+    - label 只用于报错信息
+    """
+    model = os.getenv("VERB_GENERATEION_MODEL", "qwen-plus")
 
-def call_qwen_for_verb(raw_verb: str) -> dict:
+    metrics = get_default_run_metrics()
+    cache = get_default_cache()
+    content = cache.get(model, system_prompt, user_prompt)
+
+    if content is not None:
+        with metrics.timed("parse"):
+            raw_data = parse_json_reply(content)
+            if decode is not None:
+                raw_data = decode(raw_data)
+            cache_errors = validate(raw_data) if validate is not None else None
+            if not cache_errors and soft_validate is not None:
+                cache_errors = soft_validate(raw_data)
+        if not cache_errors:
+            metrics.add_counts(split=False, cache_hits=1)
+            return raw_data
+
+    backend = get_default_backend()
+    usage_log = get_default_usage_log()
+    limiter = get_default_limiter()
+    attempts = 0
+    flagged = None
+
+    def attempt():
+        nonlocal attempts, flagged
+        attempts += 1
+        with metrics.timed("queue_wait"):
+            limiter.acquire()
+        started_at = time.perf_counter()
+        reply, usage = backend.complete_with_usage(system_prompt, user_prompt, model, label)
+        latency = time.perf_counter() - started_at
+        entry = usage_log.record(
+            usage_kind,
+            verb_count,
+            usage,
+            latency,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            reply=reply,
+            label=label,
+        )
+        metrics.add_time("api", latency)
+        metrics.add_counts(input_tokens=entry["input_tokens"], output_tokens=entry["output_tokens"])
+        metrics.add_counts(split=False, requests=1)
+        # 解析失败抛 ValueError，由重试层重新请求
+        with metrics.timed("parse"):
+            data = parse_json_reply(reply)
+            if decode is not None:
+                data = decode(data)
+            errors = validate(data) if validate is not None else None
+        if errors:
+            raise MalformedResponseError(
+                f"Invalid structure for {label}: " + "; ".join(errors[:5])
+                + (f" (+{len(errors) - 5} more)" if len(errors) > 5 else "")
+            )
+        findings = soft_validate(data) if soft_validate is not None else None
+        if findings:
+            flagged = data
+            raise MalformedResponseError(
+                f"Cross-check findings for {label}: " + "; ".join(findings[:5])
+                + (f" (+{len(findings) - 5} more)" if len(findings) > 5 else "")
+            )
+        return reply, data
+
+    try:
+        content, raw_data = get_default_retry_policy().run(attempt, label)
+    except AuthError:
+        raise
+    except Exception:
+        if flagged is None:
+            raise
+        # 结构合格、只是与推断出的 paradigm 不一致：保留模型的回复，不写缓存
+        return flagged
+    finally:
+        # 没发出去的尝试（如网络错误）也算重试
+        if attempts > 1:
+            metrics.add_counts(split=False, retries=attempts - 1)
+
+    # 能解析出 JSON 且结构校验通过才写缓存，避免把坏回复永久缓存下来
+    cache.put(model, system_prompt, user_prompt, content)
+
+    return raw_data
+
+
+def validate_llm_verb(data, base_verb: str = None, cross_check: bool = False, gating_only: bool = False) -> list:
     """
-    调用 Qwen，为一个动词获取变位 JSON。
-    - 根据 raw_verb 判断是否反身，把去掉 (se)/se 的 base_verb 喂给大模型
-    - 返回 Python dict，并做规范化处理
-    - 最后覆盖 is_reflexive 和 infinitive，再生成复合时态
+    模型原始回复（normalize 之前）的结构问题，见 verb_validator.py。
+    cross_check=True 时，结构没问题再用规则引擎核对形式和 regular 标记（见 morph_check.py）；
+    gating_only=True 时只算足以否决回复的问题（其余的交给 request_qwen_json 的 soft_validate）。
     """
-    base_verb, is_reflexive = parse_reflexive_verb(raw_verb)
+    errors = verb_validator.validate_verb(data, stage="raw")
+    if not errors and cross_check:
+        if gating_only:
+            errors = morph_check.split_findings(data, base_verb)[0]
+        else:
+            errors = morph_check.cross_check(data, base_verb)
+    return errors
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": f"Verb: {base_verb}"},
-    ]
 
-    api_key = os.getenv("DASHSCOPE_API_KEY")
-    if not api_key:
-        raise RuntimeError("Environment variable DASHSCOPE_API_KEY is not set.")
+def advisory_findings(data, base_verb: str) -> list:
+    """--cross-check 时只需报告、不足以否决回复的问题（见 morph_check.split_findings）。"""
+    return morph_check.split_findings(data, base_verb)[1]
 
-    model = os.getenv("VERB_GENERATEION_MODEL", "qwen-plus")
 
-    response = Generation.call(
-        api_key=api_key,
-        model=model,
-        messages=messages,
-        result_format="message",
+def is_valid_llm_verb(data, base_verb: str = None, cross_check: bool = False) -> bool:
+    """批量结果里单个动词的结构校验；不合格的动词会单独重新请求。"""
+    return not validate_llm_verb(data, base_verb, cross_check)
+
+
+def is_valid_flags(data, base_verb: str = None, cross_check: bool = False) -> bool:
+    """批量结果里单个动词的及物/不及物标签校验。"""
+    return (
+        isinstance(data, dict)
+        and _coerce_bool(data.get("has_tr_use")) is not None
+        and _coerce_bool(data.get("has_intr_use")) is not None
     )
 
-    if response.status_code != HTTPStatus.OK:
-        raise RuntimeError(
-            f"Qwen API error for verb '{raw_verb}' (base '{base_verb}'): "
-            f"status_code={response.status_code}, "
-            f"code={getattr(response, 'code', None)}, "
-            f"message={getattr(response, 'message', None)}"
-        )
 
-    content = response.output.choices[0].message.content
-    json_str = extract_json_from_text(content)
-    raw_data = json.loads(json_str)
+def finalize_verb_data(raw_data: dict, raw_verb: str) -> dict:
+    """模型（或本地引擎）给出的简单时态 → 最终输出的动词对象。"""
+    base_verb, is_reflexive = parse_reflexive_verb(raw_verb)
 
     # 先规范化简单部分
     data = normalize_verb_data(raw_data)
@@ -642,16 +609,310 @@ def call_qwen_for_verb(raw_verb: str) -> dict:
     # 固定顶层输出顺序，确保 has_tr_use/has_intr_use 位于 is_reflexive 后
     data = reorder_top_level_fields(data)
 
-    return data
+    # 内容哈希放在最后，verb_diff.py 据此找出有变化的动词
+    return verb_diff.stamp_content_hash(data)
 
 
-def main():
-    if len(sys.argv) != 3:
-        print("用法：python ./scripts/utils/get_verb.py <input_verbs.txt> <output.json>")
-        sys.exit(1)
+def call_qwen_for_verb(
+    raw_verb: str,
+    use_local_engine: bool = False,
+    cross_check: bool = False,
+    compact: bool = False,
+    defer_finalize: bool = False,
+) -> dict:
+    """
+    调用 Qwen，为一个动词获取变位 JSON。
+    - 根据 raw_verb 判断是否反身，把去掉 (se)/se 的 base_verb 喂给大模型
+    - use_local_engine=True 时，conjugator 能推出的动词由本地生成简单时态，
+      只向模型要 has_tr_use / has_intr_use 两个标签（FLAGS_SYSTEM_PROMPT）
+    - cross_check=True 时，模型给的变位还要与规则引擎一致，否则重新请求；
+      重试用尽时，词表条目动词的形式不一致进死信，其余保留回复并写进核对报告（见 morph_check.split_findings）
+    - compact=True 时用紧凑格式的 prompt，回复在本地展开（见 compact_format.py）
+    - 返回 Python dict，并做规范化处理
+    - 最后覆盖 is_reflexive 和 infinitive，再生成复合时态
+    - defer_finalize=True 时直接返回校验过的原始数据，规范化留给 postprocess_verb（--workers）
+    """
+    base_verb, is_reflexive = parse_reflexive_verb(raw_verb)
+    user_prompt = f"Verb: {base_verb}"
+    label = f"verb '{raw_verb}' (base '{base_verb}')"
+    metrics = get_default_run_metrics()
+
+    with metrics.track(raw_verb):
+        raw_data = conjugator.conjugate(base_verb) if use_local_engine else None
+        if raw_data is not None:
+            flags = request_qwen_json(FLAGS_SYSTEM_PROMPT, user_prompt, label, usage_kind="flags")
+            raw_data["has_tr_use"] = flags.get("has_tr_use")
+            raw_data["has_intr_use"] = flags.get("has_intr_use")
+        else:
+            validate = partial(validate_llm_verb, base_verb=base_verb, cross_check=cross_check, gating_only=True)
+            soft_validate = partial(advisory_findings, base_verb=base_verb) if cross_check else None
+            if compact:
+                raw_data = request_qwen_json(
+                    compact_format.COMPACT_SYSTEM_PROMPT,
+                    user_prompt,
+                    label,
+                    validate=validate,
+                    decode=compact_format.expand_compact_verb,
+                    usage_kind="compact",
+                    soft_validate=soft_validate,
+                )
+            else:
+                raw_data = request_qwen_json(
+                    SYSTEM_PROMPT, user_prompt, label, validate=validate, soft_validate=soft_validate
+                )
+            findings = soft_validate(raw_data) if soft_validate is not None else None
+            if findings:
+                morph_check.get_default_findings_report().record(
+                    raw_verb, findings, infinitive=target_infinitive(raw_verb)
+                )
+
+        if defer_finalize:
+            return raw_data
+        with metrics.timed("normalize"):
+            return finalize_verb_data(raw_data, raw_verb)
+
+
+def call_qwen_for_batch(
+    raw_verbs: list,
+    use_local_engine: bool = False,
+    cross_check: bool = False,
+    compact: bool = False,
+    defer_finalize: bool = False,
+) -> list:
+    """
+    一次请求为多个动词获取变位，返回与 raw_verbs 对齐的 [(data, error), ...]。
+    - 模型返回以动词为 key 的 JSON 对象，每个动词的结果单独校验
+    - 缺失、校验不通过或整批请求失败的动词，逐个退回单动词请求（call_qwen_for_verb）
+    - use_local_engine=True 时，本地能变位的动词只批量要及物/不及物标签
+    - cross_check=True 时，批量结果里与规则引擎矛盾的动词也退回单动词请求
+    - compact=True 时完整变位用紧凑格式，逐个动词在本地展开；展开失败的同样退回
+    - defer_finalize=True 时返回校验过的原始数据（见 call_qwen_for_verb）
+    """
+    results = [None] * len(raw_verbs)
+    metrics = get_default_run_metrics()
+
+    # ((system prompt, 用量类别, 解码函数), 校验函数, [(下标, base_verb, 本地变位或 None)])
+    full_group = []
+    flags_group = []
+    for i, raw_verb in enumerate(raw_verbs):
+        base_verb, _ = parse_reflexive_verb(raw_verb)
+        local_data = conjugator.conjugate(base_verb) if use_local_engine else None
+        if local_data is not None:
+            flags_group.append((i, base_verb, local_data))
+        else:
+            full_group.append((i, base_verb, None))
+
+    if compact:
+        full_request = (BATCH_COMPACT_SYSTEM_PROMPT, "batch-compact", compact_format.expand_compact_verb)
+    else:
+        full_request = (BATCH_SYSTEM_PROMPT, "batch-full", None)
+
+    for (system_prompt, usage_kind, decode), validate, group in (
+        (full_request, is_valid_llm_verb, full_group),
+        ((BATCH_FLAGS_SYSTEM_PROMPT, "batch-flags", None), is_valid_flags, flags_group),
+    ):
+        # 只剩一个动词时直接走单动词请求，和非批量模式共用缓存
+        if len(group) < 2:
+            continue
+
+        bases = list(dict.fromkeys(base for _, base, _ in group))
+        user_prompt = "Verbs:\n" + "\n".join(bases)
+        try:
+            with metrics.track([raw_verbs[i] for i, _, _ in group]):
+                payload = request_qwen_json(
+                    system_prompt,
+                    user_prompt,
+                    f"batch {bases}",
+                    usage_kind=usage_kind,
+                    verb_count=len(bases),
+                )
+        except AuthError:
+            raise
+        except Exception:
+            payload = {}
+
+        for i, base_verb, local_data in group:
+            item = payload.get(base_verb)
+            if decode is not None and item is not None:
+                try:
+                    item = decode(item)
+                except ValueError:
+                    continue
+            if not validate(item, base_verb, cross_check):
+                continue
+            if local_data is not None:
+                local_data["has_tr_use"] = item.get("has_tr_use")
+                local_data["has_intr_use"] = item.get("has_intr_use")
+                item = local_data
+            if defer_finalize:
+                results[i] = (item, None)
+                continue
+            try:
+                with metrics.timed("normalize", raw_verbs[i]):
+                    results[i] = (finalize_verb_data(item, raw_verbs[i]), None)
+            except Exception:
+                continue
+
+    # 重新排队：没拿到合格结果的动词单独请求
+    for i, raw_verb in enumerate(raw_verbs):
+        if results[i] is not None:
+            continue
+        try:
+            results[i] = (call_qwen_for_verb(raw_verb, use_local_engine, cross_check, compact, defer_finalize), None)
+        except AuthError:
+            raise
+        except Exception as error:
+            results[i] = (None, error)
 
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
+    return results
+
+
+def iter_batch_results(batch_results):
+    """把 imap_ordered 按批产出的结果摊平成逐个动词的 (data, error)。"""
+    for _, batch, results, error in batch_results:
+        if error is not None:
+            results = [(None, error)] * len(batch)
+        yield from results
+
+
+def postprocess_verb(job: tuple) -> tuple:
+    """
+    --workers 的子进程入口：(raw_verb, 原始数据, derived_compound) -> (序列化后的文本, 耗时秒数)。
+    与单进程路径的 finalize_verb_data + strip_compound_tenses + json_writer.dump 结果逐字节相同；
+    原始数据为 None（请求失败）时返回 (None, 0.0)。
+    """
+    raw_verb, raw_data, derived_compound = job
+    if raw_data is None:
+        return None, 0.0
+    started_at = time.perf_counter()
+    data = finalize_verb_data(raw_data, raw_verb)
+    if derived_compound and compound_tenses.has_derivable_compound_tenses(data):
+        data = compound_tenses.strip_compound_tenses(data)
+    return json_writer.dumps(data), time.perf_counter() - started_at
+
+
+def iter_postprocessed(results, raw_verbs: list, workers: int, derived_compound: bool):
+    """
+    请求层产出的 (原始数据, error) -> (序列化后的文本, error)，后处理在进程池里按块执行，顺序不变。
+    请求层的异常留在本进程（不需要能 pickle）；后处理出错的动词同样作为 error 产出。
+    """
+    metrics = get_default_run_metrics()
+    request_errors = deque()
+
+    def jobs():
+        for raw_verb, (raw_data, error) in zip(raw_verbs, results):
+            request_errors.append(error)
+            yield raw_verb, (raw_data if error is None else None), derived_compound
+
+    processed = imap_processes(postprocess_verb, jobs(), workers, chunk_size=POSTPROCESS_CHUNK_SIZE)
+    for raw_verb, (result, error) in zip(raw_verbs, processed):
+        request_error = request_errors.popleft()
+        if request_error is not None:
+            yield None, request_error
+        elif error is not None:
+            yield None, error
+        else:
+            text, elapsed = result
+            metrics.add_time("normalize", elapsed, raw_verb)
+            yield text, None
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+
+    parser = argparse.ArgumentParser(
+        description="调用 Qwen 从动词列表生成西语变位 JSON。",
+    )
+    parser.add_argument("input_path", help="输入 txt，每行一个动词")
+    parser.add_argument("output_path", help="输出 JSON 数组文件")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"同时在途的请求数（默认 {DEFAULT_CONCURRENCY}）",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1.0 / REQUEST_INTERVAL_SECONDS,
+        help=f"令牌桶限速：每秒最多发出的请求数，<=0 表示不限速（默认 {1.0 / REQUEST_INTERVAL_SECONDS:g}）",
+    )
+    parser.add_argument(
+        "--burst",
+        type=float,
+        default=1.0,
+        help="令牌桶容量，即允许的瞬时突发请求数（默认 1）",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"每次请求的动词数，校验不通过的动词会单独重新请求（默认 {DEFAULT_BATCH_SIZE}，即不批量）",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="复用已有输出里的动词，只请求缺失/失败的动词",
+    )
+    parser.add_argument(
+        "--local-engine",
+        action="store_true",
+        help="规则引擎能推出的动词在本地变位，只向模型要及物/不及物标签",
+    )
+    parser.add_argument(
+        "--cross-check",
+        action="store_true",
+        help="用规则引擎核对模型给出的变位，有矛盾的回复重新请求；词表外的动词用尽重试后保留回复并写进 <output>.crosscheck.jsonl（见 morph_check.py）",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="用紧凑格式请求变位（每个时态一个按人称顺序的数组），省 prompt 和输出 token",
+    )
+    parser.add_argument(
+        "--usage-log",
+        metavar="PATH",
+        help="把每次请求的 token 用量和延迟逐条写到 JSONL（llm_usage.py 可汇总）",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        action="append",
+        default=[],
+        help="运行结束写出分阶段耗时 / token / 重试报告：*.prom 为 Prometheus textfile，其他为 JSON（可重复）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="normalize / 复合时态 / 序列化用的进程数（默认 1，即在主进程里做）",
+    )
+    parser.add_argument(
+        "--derived-compound",
+        action="store_true",
+        help="不写出复合时态，只保留 participle（用 compound_tenses.py 按规则展开）",
+    )
+    parser.add_argument(
+        "--table-out",
+        metavar="PATH",
+        help="另外导出紧凑的扁平 SQLite 表（verb_table.py 格式），供服务端快速导入",
+    )
+    parser.add_argument(
+        "--form-index",
+        metavar="PATH",
+        help="另外构建反向索引（变位形式 -> 动词 / 语气 / 时态 / 人称，form_index.py 格式）",
+    )
+    parser.add_argument(
+        "--db",
+        metavar="PATH",
+        help="把结果增量写入服务端词库（如 server/data/vocabulary.db），只改内容有变化的行",
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    input_path = args.input_path
+    output_path = args.output_path
 
     load_dotenv()
 
@@ -660,42 +921,181 @@ def main():
         print("输入文件中没有动词呀 T_T")
         sys.exit(1)
 
-    print(f"共读取到 {len(verbs)} 个动词，开始召唤 Qwen 劳动…")
+    partial_path = output_path + ".partial"
+    existing: dict = {}
+    if args.resume:
+        existing = load_existing_results(output_path, partial_path)
+    pending_verbs = [v for v in verbs if target_infinitive(v) not in existing]
+
+    print(
+        f"共读取到 {len(verbs)} 个动词，其中 {len(verbs) - len(pending_verbs)} 个已有结果，"
+        f"开始召唤 Qwen 劳动…（并发 {args.concurrency}，限速 {args.rate:g} 次/秒，"
+        f"每批 {args.batch_size} 个，后处理进程 {args.workers} 个）"
+    )
+    if args.local_engine:
+        local_count = sum(
+            1 for v in pending_verbs
+            if conjugator.classify_verb(parse_reflexive_verb(v)[0]) is not None
+        )
+        print(f"本地规则引擎可处理 {local_count}/{len(pending_verbs)} 个待生成动词。")
 
+    if args.usage_log:
+        set_default_usage_log(UsageLog(args.usage_log))
+    metrics = set_default_run_metrics(RunMetrics("get_verb"))
+    metrics_paths = args.metrics_out or output_paths_from_env()
+
+    # 令牌在请求层按每次尝试取（见 request_qwen_json），批量请求、退回的单动词请求和重试都算
+    set_default_limiter(TokenBucket(args.rate, capacity=args.burst))
+    started_at = time.monotonic()
     success_count = 0
+    reused_count = 0
+    failed_count = 0
+    aborted_by = None
+
+    # 每轮运行重新记录失败的动词，之后可导出成输入重跑
+    dead_letter_path = default_dead_letter_path(output_path)
+    dead_letters = DeadLetterFile(dead_letter_path, reset=True)
+    findings_report = morph_check.get_default_findings_report()
+    if args.cross_check:
+        findings_report = morph_check.set_default_findings_report(
+            morph_check.FindingsReport(morph_check.default_report_path(output_path))
+        )
+
+    # resume 时先写到 .partial，全部完成后再替换，避免覆盖掉还没读完的旧结果
+    write_path = partial_path if args.resume else output_path
 
-    # 流式写 JSON 数组
-    with open(output_path, 'w', encoding='utf-8') as f:
+    # 流式写 JSON 数组；并发结果按输入顺序到达
+    with open(write_path, 'w', encoding='utf-8') as f:
         f.write('[\n')
         first = True
 
-        for idx, verb in enumerate(verbs, start=1):
-            print(f"[{idx}/{len(verbs)}] 处理中：{verb} ...", end='', flush=True)
-            try:
-                data = call_qwen_for_verb(verb)
+        if args.batch_size > 1:
+            batches = [
+                pending_verbs[i:i + args.batch_size]
+                for i in range(0, len(pending_verbs), args.batch_size)
+            ]
+            results = iter_batch_results(imap_ordered(
+                partial(
+                    call_qwen_for_batch,
+                    use_local_engine=args.local_engine,
+                    cross_check=args.cross_check,
+                    compact=args.compact,
+                    defer_finalize=args.workers > 1,
+                ),
+                batches,
+                concurrency=args.concurrency,
+                on_start=lambda batch, waited: metrics.add_time("queue_wait", waited, batch),
+            ))
+        else:
+            results = (
+                (data, error)
+                for _, _, data, error in imap_ordered(
+                    partial(
+                        call_qwen_for_verb,
+                        use_local_engine=args.local_engine,
+                        cross_check=args.cross_check,
+                        compact=args.compact,
+                        defer_finalize=args.workers > 1,
+                    ),
+                    pending_verbs,
+                    concurrency=args.concurrency,
+                    on_start=lambda verb, waited: metrics.add_time("queue_wait", waited, verb),
+                )
+            )
+        if args.workers > 1:
+            # 请求仍在线程池里并发，拿到的原始数据交给进程池后处理，产出已经序列化好的文本
+            results = iter_postprocessed(results, pending_verbs, args.workers, args.derived_compound)
+        for idx, verb in enumerate(verbs):
+            data = existing.get(target_infinitive(verb))
+            if data is not None:
+                reused_count += 1
+                metrics.set_status(verb, "reused")
+                status = "♻️"
+            else:
+                data, error = next(results)
+                if error is not None:
+                    failed_count += 1
+                    metrics.set_status(verb, "failed")
+                    dead_letters.record(verb, error, infinitive=target_infinitive(verb))
+                    print(f"[{idx + 1}/{len(verbs)}] {verb} ❌")
+                    print(f"    错误：{error}")
+                    if isinstance(error, AuthError):
+                        # 鉴权失败不会自己恢复，后面的动词不用再请求了
+                        aborted_by = error
+                        break
+                    continue
+                success_count += 1
+                metrics.set_status(verb, "ok")
+                status = "✅"
 
+            with metrics.timed("write", verb):
                 if not first:
                     f.write(',\n')
 
-                # dict 有缩进，list 压成一行
-                json_pretty = json.dumps(data, ensure_ascii=False, indent=2)
-                json_pretty = compact_lists(json_pretty)
+                if isinstance(data, str):
+                    # --workers：子进程已经按同样的规则处理并序列化好了
+                    f.write(data)
+                else:
+                    if args.derived_compound and compound_tenses.has_derivable_compound_tenses(data):
+                        data = compound_tenses.strip_compound_tenses(data)
 
-                f.write(json_pretty)
+                    # dict 有缩进，list 压成一行（单遍写出，见 json_writer.py）
+                    json_writer.dump(data, f)
                 f.flush()
 
-                first = False
-                success_count += 1
-                print(" ✅")
-            except Exception as e:
-                print(" ❌")
-                print(f"    错误：{e}")
-            time.sleep(REQUEST_INTERVAL_SECONDS)
+            first = False
+            print(f"[{idx + 1}/{len(verbs)}] {verb} {status}")
 
         f.write('\n]\n')
 
+    dead_letters.close()
+    findings_report.close()
+    usage_log = get_default_usage_log()
+    usage_log.close()
+    metrics.finish()
+    for path in metrics_paths:
+        metrics.write(path)
+    if aborted_by is not None:
+        # resume 时保留 .partial 不替换，原输出里还没写到的动词不会丢
+        print(f"\n鉴权失败，已中止：{aborted_by}")
+        print(f"已写入的结果：{write_path}（可用 --resume 接着跑）")
+        sys.exit(1)
+
+    if args.resume:
+        os.replace(partial_path, output_path)
+
+    elapsed = time.monotonic() - started_at
     print(f"\n完成！共成功生成 {success_count} 个动词的变位。")
+    print(f"耗时 {elapsed:.1f} 秒（{success_count / elapsed if elapsed > 0 else 0:.2f} 个/秒）。")
+    if reused_count:
+        print(f"复用已有结果 {reused_count} 个。")
+    retry_policy = get_default_retry_policy()
+    if retry_policy.retries:
+        print(f"重试请求 {retry_policy.retries} 次。")
+    if failed_count:
+        print(f"失败 {failed_count} 个，已记录到死信文件：{dead_letter_path}")
+    if findings_report.count:
+        print(f"与规则引擎不一致但已写出 {findings_report.count} 个，待复核：{findings_report.path}")
+    cache = get_default_cache()
+    if cache.mode != "off":
+        print(f"响应缓存：命中 {cache.hits} 次，未命中 {cache.misses} 次。")
+    usage_summary = usage_log.summary()
+    if usage_summary:
+        print("token 用量：")
+        print(format_summary(usage_summary))
+    for path in metrics_paths:
+        print(f"运行报告：{path}")
     print(f"已写入：{output_path}")
+    if args.table_out:
+        # 从刚写完的 JSON 流式导出，resume 时复用的动词也包含在内
+        count = verb_table.export_json_file(output_path, args.table_out)
+        print(f"已导出扁平表：{args.table_out}（{count} 个动词）")
+    if args.form_index:
+        index = form_index.export_json_file(output_path, args.form_index)
+        print(f"已构建反向索引：{args.form_index}（{len(index['forms'])} 个形式）")
+    if args.db:
+        stats = verb_db_sink.upsert_json_file(output_path, args.db)
+        print(f"已写入词库 {args.db}：{verb_db_sink.format_stats(stats)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+verbs.json 形状（顶层是对象数组）文件的流式读写，内存占用与单个元素大小相关，与文件大小无关。
+
+- iter_json_array(fp)：按块读文件，逐个产出数组元素（json.JSONDecoder.raw_decode 增量解析）
+  allow_truncated=True 时容忍中途崩溃留下的不完整文件（缺 ]、最后一个元素只写了一半）
+- JsonArrayWriter(fp)：逐个写入元素，输出与 json_writer.dumps(整个 list) 逐字节一致
+
+用法：
+    with open(src, encoding="utf-8") as fin, open(dst, "w", encoding="utf-8") as fout:
+        with JsonArrayWriter(fout) as writer:
+            for verb in iter_json_array(fin):
+                writer.write(transform(verb))
+"""
+
+import json
+
+import json_writer
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(fp, chunk_size: int = DEFAULT_CHUNK_SIZE, allow_truncated: bool = False):
+    """
+    逐个产出 fp 中顶层 JSON 数组的元素。
+    - 分隔逗号宽松处理（与 load_partial_json_array 原来的行为一致）
+    - allow_truncated=False：顶层不是数组、内容不完整或非法时抛 ValueError
+    - allow_truncated=True：跳过 [ 之前的内容，遇到不完整/非法内容时静默结束
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    read_size = chunk_size
+
+    def fail(message: str):
+        if allow_truncated:
+            return True
+        raise ValueError(message)
+
+    # 找到数组开头
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buffer):
+            break
+        if eof:
+            fail("Input JSON must be a top-level array.")
+            return
+        data = fp.read(read_size)
+        eof = not data
+        buffer, pos = buffer[pos:] + data, 0
+
+    if buffer[pos] != "[":
+        if fail("Input JSON must be a top-level array."):
+            # 容错模式：跳到第一个 [
+            while True:
+                found = buffer.find("[", pos)
+                if found != -1:
+                    pos = found
+                    break
+                if eof:
+                    return
+                data = fp.read(read_size)
+                eof = not data
+                buffer, pos = data, 0
+    pos += 1
+
+    while True:
+        # 跳过空白和分隔逗号
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                fail("Unexpected end of JSON array.")
+                return
+            data = fp.read(read_size)
+            eof = not data
+            buffer, pos = buffer[pos:] + data, 0
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as error:
+            if eof:
+                fail(f"Invalid JSON array element: {error}")
+                return
+            # 元素还没读完：多读一些再试，连续失败时加大读取量，避免大元素反复重解析
+            data = fp.read(read_size)
+            eof = not data
+            buffer, pos = buffer[pos:] + data, 0
+            read_size *= 2
+            continue
+
+        if not eof and (end == len(buffer) or buffer[end] not in _WHITESPACE + ",]"):
+            # 数字可能被块边界截断（"-1." | "5"、"12" | "3"），看到分隔符再产出
+            data = fp.read(read_size)
+            eof = not data
+            buffer, pos = buffer[pos:] + data, 0
+            continue
+
+        read_size = chunk_size
+        pos = end
+        yield item
+
+
+class JsonArrayWriter:
+    """
+    逐个写入数组元素，格式与 json_writer.dumps(list) 相同：
+        [
+          {...},
+          {...}
+        ]
+    空数组写成 []。不负责结尾换行。
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self.count = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, item) -> None:
+        self._separator()
+        json_writer.dump(item, self._fp, level=1)
+        self.count += 1
+
+    def write_text(self, text: str) -> None:
+        """写入已经序列化好的元素（json_writer.dumps(item, level=1)，例如在子进程里算好的）。"""
+        self._separator()
+        self._fp.write(text)
+        self.count += 1
+
+    def _separator(self) -> None:
+        self._fp.write("[\n" + json_writer.INDENT if self.count == 0 else ",\n" + json_writer.INDENT)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._fp.write("\n]" if self.count else "[]")
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+项目统一的 JSON 输出格式（verbs.json 风格），单遍生成：
+- dict 缩进 2 空格、每个 key 一行（与 json.dumps(indent=2, ensure_ascii=False) 相同）
+- 元素全是字符串的 list 压成一行：["forma1", "forma2"]
+- key 顺序保持 dict 的插入顺序（顶层顺序由 reorder_top_level_fields 等负责）
+
+输出与原来的 compact_lists(json.dumps(obj, ensure_ascii=False, indent=2)) 逐字节一致，
+包括它的边界行为：含双引号的字符串所在的 list、混有非字符串元素的 list 不压行。
+直接拼接字符串片段，不做正则扫描，也不对每个数组再 loads / dumps 一次。
+
+用法：
+    json_writer.dump(data, f)           # 写入文件句柄
+    text = json_writer.dumps(data)
+"""
+
+import json
+from json.encoder import encode_basestring
+
+INDENT = "  "
+
+_CONSTANTS = {True: "true", False: "false", None: "null"}
+
+
+def _encode_scalar(value) -> str:
+    if value is None or value is True or value is False:
+        return _CONSTANTS[value]
+    if isinstance(value, int):
+        return int.__repr__(value)
+    # float（含 NaN / Infinity）和其他类型都交给标准库，保证与 json.dumps 一致
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _encode_key(key) -> str:
+    if isinstance(key, str):
+        return encode_basestring(key)
+    # 与 json.dumps 相同：非字符串 key 先转成对应的 JSON 文本再加引号
+    return encode_basestring(_encode_scalar(key))
+
+
+def _is_compact_list(value) -> bool:
+    for item in value:
+        if not isinstance(item, str) or '"' in item:
+            return False
+    return True
+
+
+def _encode(value, indent: str, out: list) -> None:
+    append = out.append
+    if type(value) is str:
+        append(encode_basestring(value))
+    elif isinstance(value, dict):
+        if not value:
+            append("{}")
+            return
+        inner = indent + INDENT
+        separator = ",\n" + inner
+        append("{\n" + inner)
+        first = True
+        for key, item in value.items():
+            if first:
+                first = False
+            else:
+                append(separator)
+            append(encode_basestring(key) if type(key) is str else _encode_key(key))
+            append(": ")
+            # 热路径：字符串和可压行的 list 直接写，不再递归
+            if type(item) is str:
+                append(encode_basestring(item))
+            elif type(item) is list and item and _is_compact_list(item):
+                append("[" + ", ".join(map(encode_basestring, item)) + "]")
+            else:
+                _encode(item, inner, out)
+        append("\n" + indent + "}")
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            append("[]")
+        elif _is_compact_list(value):
+            append("[" + ", ".join(map(encode_basestring, value)) + "]")
+        else:
+            inner = indent + INDENT
+            separator = ",\n" + inner
+            append("[\n" + inner)
+            first = True
+            for item in value:
+                if first:
+                    first = False
+                else:
+                    append(separator)
+                _encode(item, inner, out)
+            append("\n" + indent + "]")
+    elif isinstance(value, str):
+        append(encode_basestring(value))
+    else:
+        append(_encode_scalar(value))
+
+
+def dumps(obj, level: int = 0) -> str:
+    """
+    按项目格式序列化 obj。
+    level > 0 时，嵌套行按该层级缩进（第一行本身不缩进，由调用方决定），
+    用于把单个对象写进外层数组。
+    """
+    out = []
+    _encode(obj, INDENT * level, out)
+    return "".join(out)
+
+
+def dump(obj, fp, level: int = 0) -> None:
+    """同 dumps，但把片段直接写入文件句柄，不拼出整段字符串。"""
+    out = []
+    _encode(obj, INDENT * level, out)
+    fp.writelines(out)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 后端抽象（get_verb.py / tag_pronoun_support.py 共用）：
+脚本只调用 backend.complete(system_prompt, user_prompt, model, label) 拿到模型原始回复文本，
+不关心具体是 dashscope SDK 还是 HTTP 接口；需要 token 用量时调用 complete_with_usage，
+多返回一个 {"input_tokens", "output_tokens"}（后端没给时为 None，见 llm_usage.py）。
+
+- dashscope（默认）：dashscope.Generation.call，读 DASHSCOPE_API_KEY
+- openai：OpenAI 兼容的 /chat/completions HTTP 接口（标准库 urllib，无额外依赖），
+  读 QWEN_API_URL / QWEN_API_KEY（与 JS 实验脚本同名；没有 QWEN_API_KEY 时用 DASHSCOPE_API_KEY）。
+  指向本地的 mock_llm_server.py 即可离线压测整条流水线。
+
+通过环境变量选择：
+  - LLM_BACKEND:         dashscope（默认）| openai
+  - LLM_REQUEST_TIMEOUT: openai 后端单次请求超时秒数，默认 120
+
+错误按 llm_retry.py 的分类抛出（限流 / 5xx → 重试，鉴权失败 → 中止）。
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+import threading
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import llm_json
+from llm_retry import AuthError, TransientLLMError, check_response, require_api_key
+from llm_usage import usage_from_payload
+
+DEFAULT_OPENAI_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
+DEFAULT_REQUEST_TIMEOUT = 120.0
+
+BACKENDS = ("dashscope", "openai")
+
+
+class BaseBackend(ABC):
+    """后端只需实现 complete_with_usage；complete 和 cache_namespace 有默认实现。"""
+
+    name = ""
+
+    @property
+    def cache_namespace(self) -> str:
+        """写进响应缓存 key 的后端标识（llm_cache）：不同后端 / 地址的回复互不命中。"""
+        return self.name
+
+    def complete(self, system_prompt: str, user_prompt: str, model: str, label: str = "") -> str:
+        return self.complete_with_usage(system_prompt, user_prompt, model, label)[0]
+
+    @abstractmethod
+    def complete_with_usage(self, system_prompt: str, user_prompt: str, model: str, label: str = "") -> tuple:
+        """返回 (回复文本, token 用量或 None)；失败按 llm_retry.py 的分类抛异常。"""
+
+
+class DashScopeBackend(BaseBackend):
+    name = "dashscope"
+    # 默认后端沿用空标识，已有缓存的 key 不变
+    cache_namespace = ""
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key
+
+    def complete_with_usage(self, system_prompt: str, user_prompt: str, model: str, label: str = "") -> tuple:
+        from dashscope import Generation
+
+        response = Generation.call(
+            api_key=self.api_key or require_api_key(),
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            result_format="message",
+        )
+        check_response(response, label)
+        return response.output.choices[0].message.content, usage_from_payload(getattr(response, "usage", None))
+
+
+class OpenAICompatibleBackend(BaseBackend):
+    name = "openai"
+
+    def __init__(self, url: str = DEFAULT_OPENAI_URL, api_key: str = None, timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = float(timeout)
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.name} {self.url}"
+
+    def complete_with_usage(self, system_prompt: str, user_prompt: str, model: str, label: str = "") -> tuple:
+        if not self.api_key:
+            raise AuthError("Environment variable QWEN_API_KEY (or DASHSCOPE_API_KEY) is not set.")
+
+        body = json.dumps({
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        }, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(
+            self.url,
+            data=body,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            method="POST",
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = llm_json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            # 复用 dashscope 的状态码分类
+            try:
+                detail = json.loads(error.read().decode("utf-8")).get("error") or {}
+            except ValueError:
+                detail = {}
+            check_response(
+                SimpleNamespace(
+                    status_code=error.code,
+                    code=detail.get("code"),
+                    message=detail.get("message") or error.reason,
+                ),
+                label,
+            )
+            raise
+        except urllib.error.URLError as error:
+            raise TransientLLMError(f"LLM request failed for {label}: {error.reason}")
+
+        try:
+            content = payload["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise TransientLLMError(f"Unexpected response shape for {label}: {str(payload)[:200]}")
+        return content, usage_from_payload(payload.get("usage"))
+
+
+def create_backend(name: str):
+    name = (name or "dashscope").strip().lower()
+    if name == "dashscope":
+        return DashScopeBackend()
+    if name == "openai":
+        return OpenAICompatibleBackend(
+            url=os.getenv("QWEN_API_URL") or DEFAULT_OPENAI_URL,
+            api_key=os.getenv("QWEN_API_KEY") or os.getenv("DASHSCOPE_API_KEY"),
+            timeout=float(os.getenv("LLM_REQUEST_TIMEOUT") or DEFAULT_REQUEST_TIMEOUT),
+        )
+    raise ValueError(f"Unknown LLM backend: {name} (expected one of {', '.join(BACKENDS)})")
+
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+
+def get_default_backend():
+    """按环境变量 LLM_BACKEND 创建（并复用）进程内唯一的后端实例。"""
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = create_backend(os.getenv("LLM_BACKEND"))
+        return _default_backend
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Qwen 响应的本地持久化缓存（内容寻址，SQLite 单文件）。
+
+- key = sha256(后端标识, model, system prompt, user prompt)，value = 模型返回的原始文本。
+  后端标识来自 llm_backend（openai 后端含请求地址），mock_llm_server 或其他端点的回复
+  不会被默认后端命中；默认的 dashscope 后端标识为空，key 与加标识之前相同。
+  只缓存原始文本，后处理（normalize / 复合时态 / 序列化）改了之后重跑，
+  命中缓存即可在本地速度内完成。
+- 超过容量上限时按最近访问时间做 LRU 淘汰。
+- 通过环境变量配置（两个脚本共用）：
+  - LLM_CACHE_MODE:   on（默认）| off（完全不用）| refresh（忽略已有缓存，重新请求并覆盖）
+  - LLM_CACHE_PATH:   缓存文件路径，默认 scripts/.cache/llm_responses.sqlite
+  - LLM_CACHE_MAX_MB: 容量上限（MB），默认 512
+
+命令行：
+  python3 scripts/utils/llm_cache.py stats
+  python3 scripts/utils/llm_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from llm_backend import get_default_backend
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "llm_responses.sqlite"
+)
+DEFAULT_MAX_MB = 512
+
+CACHE_MODES = ("on", "off", "refresh")
+
+
+def make_cache_key(model: str, system_prompt: str, user_prompt: str, namespace: str = "") -> str:
+    parts = [model, system_prompt, user_prompt]
+    if namespace:
+        parts.insert(0, namespace)
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """线程安全的 SQLite 响应缓存。"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+        mode: str = "on",
+        namespace: str = "",
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode} (expected one of {', '.join(CACHE_MODES)})")
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.mode = mode
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != "off":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses(accessed_at)"
+            )
+            self._conn.commit()
+
+    def get(self, model: str, system_prompt: str, user_prompt: str):
+        """命中返回原始文本，未命中（或 off / refresh 模式）返回 None。"""
+        if self.mode != "on":
+            return None
+        key = make_cache_key(model, system_prompt, user_prompt, self.namespace)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model: str, system_prompt: str, user_prompt: str, content: str) -> None:
+        """写入（覆盖）一条缓存，然后按容量上限做 LRU 淘汰。"""
+        if self.mode == "off":
+            return
+        key = make_cache_key(model, system_prompt, user_prompt, self.namespace)
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, model, content, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, content, size, now, now),
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self) -> int:
+        if self._conn is None:
+            return 0
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return count
+
+    def stats(self) -> dict:
+        if self._conn is None:
+            return {"entries": 0, "bytes": 0}
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total}
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """按环境变量创建（并复用）进程内唯一的缓存实例；key 带上当前后端（LLM_BACKEND / QWEN_API_URL）的标识。"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            mode = os.getenv("LLM_CACHE_MODE", "on").strip().lower() or "on"
+            path = os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH
+            max_mb = float(os.getenv("LLM_CACHE_MAX_MB") or DEFAULT_MAX_MB)
+            _default_cache = ResponseCache(
+                path,
+                max_bytes=int(max_mb * 1024 * 1024),
+                mode=mode,
+                namespace=get_default_backend().cache_namespace,
+            )
+        return _default_cache
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in ("stats", "clear"):
+        print("用法：python3 scripts/utils/llm_cache.py <stats|clear>")
+        sys.exit(1)
+
+    path = os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH
+    cache = ResponseCache(path)
+    if sys.argv[1] == "clear":
+        removed = cache.clear()
+        print(f"已清空缓存 {removed} 条：{path}")
+    else:
+        info = cache.stats()
+        print(f"缓存文件：{path}")
+        print(f"条目数：{info['entries']}，大小：{info['bytes'] / 1024 / 1024:.2f} MB")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
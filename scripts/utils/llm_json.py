@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+模型回复里的 JSON 解析（get_verb.py / tag_pronoun_support.py / llm_backend.py 共用）。
+
+- parse_json_reply(text)：从回复里取出第一个完整的顶层对象并解析，
+  前后的 ```json 包裹、说明文字都不用先删掉：从第一个 { 开始直接交给解码器（raw_decode 带起始位置，
+  不做正则替换、不切片复制）；这个位置解不出来（例如说明文字里的花括号）就试下一个 {
+- loads(data)：str / bytes 的整段解析（HTTP 响应体直接传 bytes，不用先 decode）
+
+装了 orjson 时优先用它（首尾花括号之间切一次片整段解析），否则用标准库 json；
+orjson 不接受的输入（NaN、超过 64 位的整数等）自动退回标准库，两种后端的结果相同。
+LLM_JSON_BACKEND=json 可强制只用标准库。
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_DECODER = json.JSONDecoder()
+
+
+def _use_orjson() -> bool:
+    return orjson is not None and os.getenv("LLM_JSON_BACKEND", "").strip().lower() != "json"
+
+
+def loads(data):
+    """整段 JSON（str 或 UTF-8 bytes）-> Python 对象；格式错误抛 ValueError（json.JSONDecodeError）。"""
+    if _use_orjson():
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def parse_json_reply(text: str):
+    """
+    模型回复 -> 第一个完整的 JSON 对象（dict）。
+    找不到时抛 ValueError，由重试层重新请求。
+    """
+    start = text.find("{")
+    if start != -1 and _use_orjson():
+        # 常见情况：整个回复就是一个对象（可能带 ``` 包裹），首尾花括号之间一次解析完
+        end = text.rfind("}")
+        if end > start:
+            try:
+                return orjson.loads(text[start:end + 1])
+            except orjson.JSONDecodeError:
+                pass
+
+    while start != -1:
+        try:
+            data, _ = _DECODER.raw_decode(text, start)
+            return data
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+    raise ValueError("No JSON object found in model output:\n" + text[:500])
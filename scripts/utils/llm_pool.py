@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 批量请求的并发工具：
+- TokenBucket：令牌桶限速器，替代固定的 time.sleep 间隔。
+  get_default_limiter() 是进程内共用的那一个，请求层每次真正发请求（含重试）前取令牌。
+- imap_ordered：有界线程池并发执行，结果经重排缓冲后按输入顺序产出。
+- imap_processes：CPU 密集的后处理按块分给进程池，按输入顺序产出。
+
+网络请求（dashscope.Generation.call）是阻塞 IO，用线程池即可，无需 asyncio；
+normalize / 复合时态 / 序列化是纯 CPU，受 GIL 限制，多核要靠进程池。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶：
+    - rate: 每秒补充的令牌数（即平均每秒最多发出的请求数），<= 0 表示不限速
+    - capacity: 桶容量（允许的瞬时突发数），默认 1，即严格匀速
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """阻塞直到拿到 tokens 个令牌。"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated_at
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                self._updated_at = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_seconds = (tokens - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+_default_limiter = TokenBucket(0)
+
+
+def get_default_limiter() -> TokenBucket:
+    """进程内共用的限速器；默认不限速。"""
+    return _default_limiter
+
+
+def set_default_limiter(limiter: TokenBucket) -> TokenBucket:
+    """替换进程内的默认限速器（get_verb.py --rate、tag_pronoun_support.py 启动时设置）。"""
+    global _default_limiter
+    _default_limiter = limiter
+    return limiter
+
+
+def imap_ordered(
+    func,
+    items,
+    concurrency: int = 1,
+    limiter: TokenBucket = None,
+    max_buffered: int = None,
+    on_start=None,
+):
+    """
+    用线程池并发执行 func(item)，按输入顺序逐个产出 (index, item, result, error)。
+
+    - 同时在途的请求数不超过 concurrency。
+    - 已完成但前面还有未完成项的结果暂存在重排缓冲里；
+      缓冲 + 在途总数不超过 max_buffered（默认 concurrency * 4），
+      防止队头某个慢请求卡住时缓冲无限增长。
+    - func 抛出的异常不会中断整体，而是作为 error 返回，由调用方决定如何处理。
+    - limiter 不为空时，每个任务真正发请求前先取一个令牌。
+    - on_start(item, waited_seconds) 不为空时，在工作线程里、func 开始前调用，
+      waited_seconds 是从提交到开始执行的等待（排队 + 取令牌）。
+    """
+    items = list(items)
+    total = len(items)
+    concurrency = max(1, int(concurrency))
+    if max_buffered is None:
+        max_buffered = concurrency * 4
+    max_buffered = max(concurrency, int(max_buffered))
+
+    def run_one(item, submitted_at):
+        if limiter is not None:
+            limiter.acquire()
+        if on_start is not None:
+            on_start(item, time.monotonic() - submitted_at)
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        completed = {}
+        next_submit = 0
+        next_emit = 0
+
+        while next_emit < total:
+            # 补满在途窗口
+            while (
+                next_submit < total
+                and len(pending) < concurrency
+                and next_submit - next_emit < max_buffered
+            ):
+                future = executor.submit(run_one, items[next_submit], time.monotonic())
+                pending[future] = next_submit
+                next_submit += 1
+
+            if next_emit not in completed:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = pending.pop(future)
+                    error = future.exception()
+                    result = None if error is not None else future.result()
+                    completed[idx] = (result, error)
+
+            # 重排缓冲：按输入顺序把已就绪的连续结果吐出去
+            while next_emit in completed:
+                result, error = completed.pop(next_emit)
+                yield next_emit, items[next_emit], result, error
+                next_emit += 1
+
+
+def _apply_chunk(func, chunk: list) -> list:
+    """在子进程里逐个执行；单个条目出错不影响同一块里的其他条目。"""
+    results = []
+    for item in chunk:
+        try:
+            results.append((func(item), None))
+        except Exception as error:
+            results.append((None, error))
+    return results
+
+
+def imap_processes(func, items, workers: int, chunk_size: int = 32, max_chunks: int = None):
+    """
+    用进程池执行 func(item)，按输入顺序逐个产出 (result, error)。
+
+    - items 可以是生成器，按需读取：凑满 chunk_size 个（或输入结束）才作为一个任务提交，
+      减少进程间往返；同时在途的块不超过 max_chunks（默认 workers * 2），上游不会被一次读空。
+    - func 和 item / 结果都要能 pickle（func 定义在模块顶层）。
+    - func 抛出的异常作为 error 返回，由调用方决定如何处理；输出与单进程逐个执行完全一致。
+    """
+    workers = max(1, int(workers))
+    chunk_size = max(1, int(chunk_size))
+    if max_chunks is None:
+        max_chunks = workers * 2
+    iterator = iter(items)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        in_flight = deque()
+        exhausted = False
+        while True:
+            # 队首的块已经算完就先交出去，免得上游慢（网络请求）时输出被攒着不写
+            while not exhausted and len(in_flight) < max_chunks and not (in_flight and in_flight[0].done()):
+                chunk = []
+                for item in iterator:
+                    chunk.append(item)
+                    if len(chunk) >= chunk_size:
+                        break
+                else:
+                    exhausted = True
+                if chunk:
+                    in_flight.append(executor.submit(_apply_chunk, func, chunk))
+            if not in_flight:
+                return
+            yield from in_flight.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
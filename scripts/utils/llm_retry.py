@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 请求的重试层（get_verb.py / tag_pronoun_support.py 共用）：
+
+- 失败分三类：
+  - 暂时性（TransientLLMError）：限流（429 / Throttling.*）、5xx、网络异常
+    → 指数退避 + full jitter 后重试
+  - 回复格式错误（MalformedResponseError）：找不到 JSON / json.loads 失败
+    → 立即重新请求（重新 prompt），次数单独计
+  - 永久性（PermanentLLMError）：其余 4xx；其中鉴权失败（AuthError：401/403、
+    InvalidApiKey、没配置 API key）直接失败，调用方应中止整轮运行
+- 重试用尽或永久失败的条目写入死信文件（<output>.deadletter.jsonl），
+  之后可以导出成输入列表重新跑：
+    python3 scripts/utils/llm_retry.py export <output>.deadletter.jsonl > retry.txt
+- 通过环境变量配置：
+  - LLM_RETRY_MAX_ATTEMPTS:  暂时性错误的最多尝试次数（含第一次），默认 5
+  - LLM_RETRY_BASE_DELAY:    退避基准秒数，默认 1
+  - LLM_RETRY_MAX_DELAY:     单次退避上限秒数，默认 30
+  - LLM_RETRY_MAX_REPROMPTS: 回复格式错误时最多重新请求几次，默认 2
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from http import HTTPStatus
+
+from checkpoint import JsonlCheckpoint
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_MAX_REPROMPTS = 2
+
+
+class LLMRequestError(RuntimeError):
+    """LLM 请求失败的基类；attempts 记录失败前一共尝试了几次。"""
+
+    kind = "error"
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.attempts = 1
+
+
+class TransientLLMError(LLMRequestError):
+    kind = "transient"
+
+
+class MalformedResponseError(LLMRequestError):
+    kind = "malformed"
+
+
+class PermanentLLMError(LLMRequestError):
+    kind = "permanent"
+
+
+class AuthError(PermanentLLMError):
+    kind = "auth"
+
+
+def error_kind(error: BaseException) -> str:
+    if isinstance(error, LLMRequestError):
+        return error.kind
+    if isinstance(error, ValueError):
+        return MalformedResponseError.kind
+    if isinstance(error, OSError):
+        return TransientLLMError.kind
+    return "error"
+
+
+def check_response(response, label: str) -> None:
+    """dashscope 返回非 200 时，按状态码 / 错误码抛出对应类别的异常。"""
+    status_code = response.status_code
+    if status_code == HTTPStatus.OK:
+        return
+
+    code = str(getattr(response, "code", None) or "")
+    message = (
+        f"Qwen API error for {label}: "
+        f"status_code={status_code}, "
+        f"code={getattr(response, 'code', None)}, "
+        f"message={getattr(response, 'message', None)}"
+    )
+    if status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN) or code == "InvalidApiKey":
+        raise AuthError(message)
+    if status_code == HTTPStatus.TOO_MANY_REQUESTS or code.startswith("Throttling"):
+        raise TransientLLMError(message)
+    if isinstance(status_code, int) and status_code >= 500:
+        raise TransientLLMError(message)
+    raise PermanentLLMError(message)
+
+
+def require_api_key(env_name: str = "DASHSCOPE_API_KEY") -> str:
+    api_key = os.getenv(env_name)
+    if not api_key:
+        raise AuthError(f"Environment variable {env_name} is not set.")
+    return api_key
+
+
+class RetryPolicy:
+    """
+    用法：
+        content = RetryPolicy().run(lambda: send_and_parse(...), label="verb 'hablar'")
+    func 里抛出的 ValueError（含 json.JSONDecodeError）视为回复格式错误，
+    OSError（网络异常）视为暂时性错误。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_reprompts: int = DEFAULT_MAX_REPROMPTS,
+    ):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(0.0, float(max_delay))
+        self.max_reprompts = max(0, int(max_reprompts))
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def backoff_seconds(self, retry_number: int) -> float:
+        """第 retry_number 次重试前的等待时间：full jitter，即 [0, min(上限, 基准 * 2^(n-1))] 均匀随机。"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry_number - 1)))
+        return random.uniform(0, ceiling)
+
+    def run(self, func, label: str = ""):
+        transient_failures = 0
+        malformed_failures = 0
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                return func()
+            except PermanentLLMError as error:
+                error.attempts = attempts
+                raise
+            except (TransientLLMError, OSError) as error:
+                transient_failures += 1
+                if transient_failures >= self.max_attempts:
+                    raise self._give_up(TransientLLMError, error, attempts)
+                time.sleep(self.backoff_seconds(transient_failures))
+            except (MalformedResponseError, ValueError) as error:
+                malformed_failures += 1
+                if malformed_failures > self.max_reprompts:
+                    raise self._give_up(MalformedResponseError, error, attempts)
+            with self._lock:
+                self.retries += 1
+
+    @staticmethod
+    def _give_up(error_class, error: BaseException, attempts: int) -> LLMRequestError:
+        if not isinstance(error, LLMRequestError):
+            error = error_class(str(error))
+        error.attempts = attempts
+        return error
+
+
+_default_policy = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_retry_policy() -> RetryPolicy:
+    """按环境变量创建（并复用）进程内唯一的重试策略。"""
+    global _default_policy
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = RetryPolicy(
+                max_attempts=int(os.getenv("LLM_RETRY_MAX_ATTEMPTS") or DEFAULT_MAX_ATTEMPTS),
+                base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY") or DEFAULT_BASE_DELAY),
+                max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY") or DEFAULT_MAX_DELAY),
+                max_reprompts=int(os.getenv("LLM_RETRY_MAX_REPROMPTS") or DEFAULT_MAX_REPROMPTS),
+            )
+        return _default_policy
+
+
+def default_dead_letter_path(output_path: str) -> str:
+    """输出文件旁边的死信路径：<output>.deadletter.jsonl"""
+    return output_path + ".deadletter.jsonl"
+
+
+class DeadLetterFile(JsonlCheckpoint):
+    """失败条目的追加写 JSONL；每条至少包含 input（可直接作为下次运行的输入）。"""
+
+    def record(self, input_value: str, error: BaseException, **extra) -> None:
+        self.append({
+            "input": input_value,
+            **extra,
+            "kind": error_kind(error),
+            "attempts": getattr(error, "attempts", 1),
+            "error": str(error),
+            "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != "export":
+        print("用法：python3 scripts/utils/llm_retry.py export <deadletter.jsonl>")
+        sys.exit(1)
+
+    seen = set()
+    for record in DeadLetterFile(sys.argv[2]).load():
+        value = record.get("input")
+        if value and value not in seen:
+            seen.add(value)
+            print(value)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 请求的 token 用量和延迟记录（get_verb.py 用），用来比较不同 prompt / 回复格式每个动词的成本。
+
+- 每次真正发出去的请求（含重试，不含缓存命中）记一条：
+  kind（如 full / compact / flags）、动词数、输入 / 输出 token、耗时
+- token 数优先用后端返回的 usage；后端没给时按字符粗略估算（estimated=true）
+- 按 kind 汇总：请求数、每个动词的平均 token、平均延迟
+- 给出 path 时逐条追加到 JSONL，之后可以离线汇总：
+    python3 scripts/utils/llm_usage.py /tmp/usage.jsonl
+"""
+
+import re
+import sys
+import threading
+from collections import defaultdict
+
+from checkpoint import JsonlCheckpoint
+
+# 估算 token：单词、数字、单个标点各算一个（JSON 回复以标点和短词为主，比 字符数/4 更接近）
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_PATTERN.findall(text or ""))
+
+
+def usage_from_payload(usage) -> dict:
+    """
+    后端返回的 usage -> {"input_tokens", "output_tokens"}；没有时返回 None。
+    兼容 OpenAI 的 prompt_tokens / completion_tokens 和 dashscope 的 input_tokens / output_tokens。
+    """
+    if usage is None:
+        return None
+    get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    input_tokens = get("input_tokens") if get("input_tokens") is not None else get("prompt_tokens")
+    output_tokens = get("output_tokens") if get("output_tokens") is not None else get("completion_tokens")
+    if input_tokens is None or output_tokens is None:
+        return None
+    return {"input_tokens": int(input_tokens), "output_tokens": int(output_tokens)}
+
+
+class UsageLog:
+    """线程安全的用量记录；path 为空时只在内存里汇总。"""
+
+    def __init__(self, path: str = None, reset: bool = True):
+        self._jsonl = JsonlCheckpoint(path, reset=reset) if path else None
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def record(
+        self,
+        kind: str,
+        verbs: int,
+        usage: dict,
+        latency: float,
+        system_prompt: str = "",
+        user_prompt: str = "",
+        reply: str = "",
+        label: str = "",
+    ) -> dict:
+        """记一次请求；usage 为 None 时按 prompt / 回复文本估算。"""
+        estimated = usage is None
+        if estimated:
+            usage = {
+                "input_tokens": estimate_tokens(system_prompt) + estimate_tokens(user_prompt),
+                "output_tokens": estimate_tokens(reply),
+            }
+        entry = {
+            "kind": kind,
+            "label": label,
+            "verbs": verbs,
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "latency_ms": round(latency * 1000, 1),
+            "estimated": estimated,
+        }
+        with self._lock:
+            self._add(entry)
+            if self._jsonl is not None:
+                self._jsonl.append(entry)
+        return entry
+
+    def _add(self, entry: dict) -> None:
+        totals = self._totals[entry["kind"]]
+        totals["requests"] += 1
+        totals["verbs"] += entry["verbs"]
+        totals["input_tokens"] += entry["input_tokens"]
+        totals["output_tokens"] += entry["output_tokens"]
+        totals["latency_ms"] += entry["latency_ms"]
+        totals["estimated"] += entry["estimated"]
+
+    def summary(self) -> dict:
+        """{kind: {requests, verbs, input_tokens, output_tokens, tokens_per_verb, avg_latency_ms, estimated}}"""
+        with self._lock:
+            result = {}
+            for kind, totals in self._totals.items():
+                verbs = totals["verbs"] or 1
+                result[kind] = {
+                    "requests": int(totals["requests"]),
+                    "verbs": int(totals["verbs"]),
+                    "input_tokens": int(totals["input_tokens"]),
+                    "output_tokens": int(totals["output_tokens"]),
+                    "tokens_per_verb": round((totals["input_tokens"] + totals["output_tokens"]) / verbs, 1),
+                    "avg_latency_ms": round(totals["latency_ms"] / totals["requests"], 1),
+                    "estimated": int(totals["estimated"]),
+                }
+            return result
+
+    def close(self) -> None:
+        if self._jsonl is not None:
+            self._jsonl.close()
+
+
+def format_summary(summary: dict) -> str:
+    lines = []
+    for kind, stats in sorted(summary.items()):
+        lines.append(
+            f"{kind}: {stats['requests']} 次请求 / {stats['verbs']} 个动词，"
+            f"输入 {stats['input_tokens']} + 输出 {stats['output_tokens']} token，"
+            f"每个动词 {stats['tokens_per_verb']:g} token，平均延迟 {stats['avg_latency_ms']:g} ms"
+            + (f"（{stats['estimated']} 次为估算）" if stats["estimated"] else "")
+        )
+    return "\n".join(lines)
+
+
+_default_log = UsageLog()
+
+
+def get_default_usage_log() -> UsageLog:
+    return _default_log
+
+
+def set_default_usage_log(log: UsageLog) -> UsageLog:
+    """替换进程内的默认记录（get_verb.py --usage-log 时写文件）。"""
+    global _default_log
+    _default_log = log
+    return log
+
+
+def summarize_file(path: str) -> dict:
+    log = UsageLog()
+    for entry in JsonlCheckpoint(path).load():
+        log._add(entry)
+    return log.summary()
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("用法：python3 scripts/utils/llm_usage.py <usage.jsonl>")
+        sys.exit(1)
+    print(format_summary(summarize_file(sys.argv[1])))
+
+
+if __name__ == "__main__":
+    main()
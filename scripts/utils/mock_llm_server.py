@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+本地 OpenAI 兼容的 LLM 桩服务，用于离线、可复现地压测 get_verb.py / tag_pronoun_support.py。
+
+回复来源（按顺序查找）：
+1) 录制的回复：llm_cache.py 的 SQLite 缓存里默认后端（dashscope）录下的回复；
+   经本服务拿到的回复写进缓存时 key 带 openai 后端和本服务地址，不会混进默认后端的条目
+2) --verbs-json 指定的 verbs.json：按 prompt 里的动词合成回复
+   （"Verb: x" / "Verbs:\\n..." / "Verb profile" / "Verb profiles"）；
+   system prompt 是 compact_format.py 的紧凑格式时，按紧凑格式合成
+都找不到时返回 404。
+回复带 OpenAI 形状的 usage（token 数按 llm_usage.estimate_tokens 估算）。
+
+故障注入（每个请求按 (seed, 请求内容, 第几次请求) 取随机数，与并发顺序无关，结果可复现）：
+  --latency-ms / --jitter-ms  每个请求的延迟（均值 ± 抖动）
+  --throttle-rate             返回 429 Throttling 的比例
+  --error-rate                返回 500 的比例
+  --malformed-rate            返回非 JSON 文本的比例
+
+用法：
+  python3 scripts/utils/mock_llm_server.py --verbs-json server/src/verbs.json --latency-ms 300 --error-rate 0.05
+  LLM_BACKEND=openai QWEN_API_URL=http://127.0.0.1:8765/v1/chat/completions QWEN_API_KEY=mock LLM_CACHE_MODE=off \\
+    python3 scripts/utils/get_verb.py scripts/input/verbs.txt /tmp/verbs.json --concurrency 8 --rate 0
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import compact_format
+from llm_cache import DEFAULT_CACHE_PATH, make_cache_key
+from llm_usage import estimate_tokens
+
+# 合成单动词回复时去掉的字段（脚本自己生成、由别的脚本补充或不属于模型输出）
+SYNTHETIC_DROP_KEYS = (
+    "compound_indicative",
+    "compound_subjunctive",
+    "supports_do",
+    "supports_io",
+    "supports_do_io",
+    "translation",
+)
+
+
+class RecordedResponses:
+    """只读地查 llm_cache 的 SQLite 文件。"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+class SyntheticResponses:
+    """从 verbs.json 合成与线上格式一致的回复。"""
+
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            self.verbs = {v["infinitive"]: v for v in json.load(f) if isinstance(v, dict) and v.get("infinitive")}
+
+    def _verb(self, infinitive: str):
+        verb = self.verbs.get(infinitive) or self.verbs.get(infinitive + "se")
+        if verb is None:
+            return None
+        return {k: v for k, v in verb.items() if k not in SYNTHETIC_DROP_KEYS}
+
+    def _support(self, infinitive: str):
+        verb = self.verbs.get(infinitive)
+        if verb is None:
+            return None
+        return {
+            "supports_do": bool(verb.get("supports_do")),
+            "supports_io": bool(verb.get("supports_io")),
+            "supports_do_io": bool(verb.get("supports_do_io")),
+            "confidence": 0.9,
+            "reason": "replayed from verbs.json",
+        }
+
+    def get(self, user_prompt: str, compact: bool = False):
+        lines = user_prompt.split("\n")
+        if lines[0] in ("Verb profile:", "Verb profiles:"):
+            names = [line.split(":", 1)[1].strip() for line in lines if line.startswith("- infinitive:")]
+            answers = {name: self._support(name) for name in names}
+            answers = {name: answer for name, answer in answers.items() if answer is not None}
+            if lines[0] == "Verb profile:":
+                return json.dumps(next(iter(answers.values())), ensure_ascii=False) if answers else None
+            return json.dumps(answers, ensure_ascii=False)
+        shape = compact_format.compress_verb if compact else (lambda verb: verb)
+        if lines[0] == "Verbs:":
+            answers = {name: self._verb(name) for name in lines[1:] if name}
+            return json.dumps({k: shape(v) for k, v in answers.items() if v is not None}, ensure_ascii=False)
+        if lines[0].startswith("Verb:"):
+            verb = self._verb(lines[0].split(":", 1)[1].strip())
+            return json.dumps(shape(verb), ensure_ascii=False) if verb is not None else None
+        return None
+
+
+class MockLLM:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.recorded = RecordedResponses(args.cache_path) if args.cache_path else None
+        self.synthetic = SyntheticResponses(args.verbs_json) if args.verbs_json else None
+        self._seen = Counter()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _rng(self, key: str) -> random.Random:
+        with self._lock:
+            self._seen[key] += 1
+            nth = self._seen[key]
+        return random.Random(f"{self.args.seed}:{key}:{nth}")
+
+    def handle(self, body: dict):
+        """返回 (status, payload)。"""
+        model = body.get("model", "")
+        messages = body.get("messages") or []
+        system_prompt = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        user_prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        key = make_cache_key(model, system_prompt, user_prompt)
+
+        rng = self._rng(key)
+        delay_ms = self.args.latency_ms + rng.uniform(-self.args.jitter_ms, self.args.jitter_ms)
+        time.sleep(max(0.0, delay_ms) / 1000.0)
+
+        roll = rng.random()
+        if roll < self.args.throttle_rate:
+            return self._error(429, "Throttling.RateQuota", "Requests rate limit exceeded (mock).")
+        roll -= self.args.throttle_rate
+        if roll < self.args.error_rate:
+            return self._error(500, "InternalError", "Injected server error (mock).")
+        roll -= self.args.error_rate
+        if roll < self.args.malformed_rate:
+            self.stats["malformed"] += 1
+            reply = "Sorry, I cannot produce JSON right now {"
+            return 200, self._completion(model, reply, system_prompt + user_prompt)
+
+        content = self.recorded.get(key) if self.recorded else None
+        if content is None and self.synthetic:
+            content = self.synthetic.get(user_prompt, compact=compact_format.is_compact_prompt(system_prompt))
+        if content is None:
+            return self._error(404, "NotFound", "No recorded response for this prompt (mock).")
+
+        self.stats[200] += 1
+        return 200, self._completion(model, content, system_prompt + user_prompt)
+
+    def _error(self, status: int, code: str, message: str):
+        self.stats[status] += 1
+        return status, {"error": {"code": code, "message": message}}
+
+    @staticmethod
+    def _completion(model: str, content: str, prompt: str) -> dict:
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+def make_handler(mock: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"code": "NotFound", "message": self.path}})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length).decode("utf-8"))
+            except ValueError:
+                self._send(400, {"error": {"code": "InvalidParameter", "message": "Body is not JSON."}})
+                return
+            if mock.args.api_key and self.headers.get("Authorization") != f"Bearer {mock.args.api_key}":
+                self._send(401, {"error": {"code": "InvalidApiKey", "message": "Invalid API key (mock)."}})
+                return
+            status, payload = mock.handle(body)
+            self._send(status, payload)
+
+        def _send(self, status: int, payload: dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            if not mock.args.quiet:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容的 LLM 桩服务（回放录制回复 + 故障注入）。")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--cache-path",
+        default=DEFAULT_CACHE_PATH,
+        help="录制回复来源：llm_cache 的 SQLite 文件（传空字符串则不用）",
+    )
+    parser.add_argument("--verbs-json", help="合成回复来源：verbs.json（录制回复里没有时使用）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的平均延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="延迟抖动范围（毫秒）")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="返回 429 的比例")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="返回非 JSON 文本的比例")
+    parser.add_argument("--seed", default="0", help="故障注入的随机种子")
+    parser.add_argument("--api-key", default="", help="设置后校验 Authorization: Bearer <key>，不匹配返回 401")
+    parser.add_argument("--quiet", action="store_true", help="不打印每个请求的访问日志")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.cache_path and not os.path.exists(args.cache_path):
+        if not args.verbs_json:
+            raise SystemExit(f"录制回复文件不存在：{args.cache_path}（或用 --verbs-json 合成回复）")
+        args.cache_path = ""
+
+    mock = MockLLM(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"请求统计：{dict(mock.stats)}")
+
+
+if __name__ == "__main__":
+    main()
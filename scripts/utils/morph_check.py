@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+用本地规则引擎（conjugator.py）交叉核对模型给出的简单时态和命令式，自动标出可疑的动词。
+
+两类检查（都在本地完成，不请求模型）：
+- form：conjugator 能推出的动词（规则、词表内的词干变化、拼写变化、-zco 等），
+  逐个槽位比较模型的形式与引擎的形式，不一致就标出
+- regular：任何 -ar / -er / -ir 动词都按“纯规则 + 拼写规则”生成一套基准变位，
+  某个时态的形式与基准完全相同却标 regular=false，或与基准不同却标 regular=true，都算矛盾
+  （与 conjugator 的约定一致：busqué / cojo 这类纯拼写变化仍算 regular）；
+  命令式的 regular 在现有数据里口径不一（规则动词也常标 false），不参与这项检查
+
+用法：
+    findings = cross_check(raw_data, "hablar")   # [] 表示没发现问题
+    python3 scripts/utils/morph_check.py server/src/verbs.json
+    python3 scripts/utils/morph_check.py server/src/verbs.json --export-flagged /tmp/recheck.txt
+    python3 scripts/utils/get_verb.py /tmp/recheck.txt /tmp/recheck.json --cross-check
+get_verb.py --cross-check 时在请求层内联调用，有问题的回复不缓存、重新请求；重试用尽后（split_findings）：
+- 引擎的 paradigm 来自明确的词表条目（engine_is_authoritative）且 form 检查不通过：进死信
+- 其余问题（引擎只是按拼写推断、可能是引擎错了，或只是 regular 标记不一致）：保留模型最后一次
+  结构合格的回复，问题写进 <output>.crosscheck.jsonl（FindingsReport）留待人工复核
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import conjugator
+from checkpoint import JsonlCheckpoint
+from json_stream import iter_json_array
+
+CHECKED_MOODS = ("indicative", "subjunctive", "imperative")
+REGULAR_FLAG_MOODS = ("indicative", "subjunctive")
+
+# vos 有两种通行写法的时态
+VOS_VARIANT_TENSES = frozenset([("subjunctive", "present"), ("imperative", "negative")])
+
+# 只套拼写规则、不做任何词干变化的 paradigm，用来生成“如果是规则动词应该长什么样”
+REGULAR_PARADIGM = {
+    "name": "regular",
+    "stem_change": None,
+    "accent_shift": False,
+    "zc": False,
+    "vowel_stem": None,
+}
+
+
+def regular_baseline(base_verb: str):
+    """纯规则（含拼写规则）的简单时态 + 命令式；不是 -ar/-er/-ir 动词时返回 None。"""
+    verb = (base_verb or "").strip().lower()
+    if len(verb) < 3 or not verb.isalpha() or not verb.endswith(("ar", "er", "ir")):
+        return None
+    return conjugator.generate(verb, REGULAR_PARADIGM)
+
+
+def _iter_slots(data: dict, moods=CHECKED_MOODS):
+    for mood in moods:
+        mood_obj = data.get(mood)
+        if not isinstance(mood_obj, dict):
+            continue
+        for tense, tense_obj in mood_obj.items():
+            if isinstance(tense_obj, dict):
+                yield mood, tense, tense_obj
+
+
+def _actual_forms(tense_obj: dict, person: str) -> list:
+    forms = tense_obj.get(person)
+    # vos 缺失时 normalize 会用二单补，这里同样处理，免得误报
+    if person == "second_singular_vos_form" and not forms:
+        forms = tense_obj.get("second_singular")
+    return list(forms or [])
+
+
+def _accepted_forms(paradigm: dict, mood: str, tense: str, person: str) -> list:
+    """
+    某个槽位可以接受的形式（每项是一个 list）。
+    虚拟式现在时 / 否定命令式的 vos 有两种通行写法（trabajés / trabajes、no estudiés / no estudies），
+    引擎给的是前一种，与 tú 同形的后一种也算对。
+    """
+    accepted = [paradigm[mood][tense][person]]
+    if person == "second_singular_vos_form" and (mood, tense) in VOS_VARIANT_TENSES:
+        accepted.append(paradigm[mood][tense]["second_singular"])
+    return accepted
+
+
+def check_forms(data: dict, base_verb: str) -> list:
+    """form 检查：逐个槽位与引擎的形式比较（引擎推不出的动词返回 []）。"""
+    findings = []
+    verb = (base_verb or "").strip().lower()
+
+    expected = conjugator.conjugate(verb)
+    if expected is not None:
+        for mood, tense, tense_obj in _iter_slots(data):
+            if tense not in expected.get(mood, {}):
+                continue
+            for person in conjugator.PERSON_KEYS:
+                actual = _actual_forms(tense_obj, person)
+                accepted = _accepted_forms(expected, mood, tense, person)
+                if actual not in accepted:
+                    findings.append(f"{mood}.{tense}.{person}: {actual!r} != engine {accepted[0]!r}")
+    return findings
+
+
+def check_regular_flags(data: dict, base_verb: str) -> list:
+    """regular 检查：陈述式 / 虚拟式的 regular 标记与纯规则基准矛盾。"""
+    findings = []
+    baseline = regular_baseline(base_verb)
+    if baseline is not None:
+        for mood, tense, tense_obj in _iter_slots(data, REGULAR_FLAG_MOODS):
+            flag = tense_obj.get("regular")
+            if tense not in baseline.get(mood, {}) or not isinstance(flag, bool):
+                continue
+            matches = all(
+                _actual_forms(tense_obj, person) in _accepted_forms(baseline, mood, tense, person)
+                for person in conjugator.PERSON_KEYS
+            )
+            if flag and not matches:
+                findings.append(f"{mood}.{tense}.regular: true, but forms differ from the regular paradigm")
+            elif not flag and matches:
+                findings.append(f"{mood}.{tense}.regular: false, but forms equal the regular paradigm")
+    return findings
+
+
+def cross_check(data: dict, base_verb: str) -> list:
+    """
+    返回问题列表（"路径: 描述"）。data 是模型的原始回复或 verbs.json 里的记录，
+    base_verb 是非反身形式的不定式。
+    """
+    return check_forms(data, base_verb) + check_regular_flags(data, base_verb)
+
+
+def engine_is_authoritative(base_verb: str) -> bool:
+    """
+    引擎的 paradigm 是否来自明确的词表条目（STEM_CHANGE_VERBS / ACCENT_SHIFT_VERBS /
+    REGULAR_LOOKALIKES / NO_STEM_CHANGE_VERBS）。只有这时核对结果才足以否决模型的回复；
+    按拼写推断出来的 paradigm（hablar 这类没进词表的规则动词）矛盾时只报告。
+    """
+    verb = (base_verb or "").strip().lower()
+    listed = (
+        verb in conjugator.STEM_CHANGE_VERBS
+        or verb in conjugator.ACCENT_SHIFT_VERBS
+        or verb in conjugator.REGULAR_LOOKALIKES
+        or verb in conjugator.NO_STEM_CHANGE_VERBS
+    )
+    return listed and conjugator.classify_verb(verb) is not None
+
+
+def split_findings(data: dict, base_verb: str) -> tuple:
+    """
+    (足以否决回复的问题, 只需报告的问题)。
+    只有 engine_is_authoritative 的动词的 form 问题算前者；regular 标记的口径本来就不统一，一律只报告。
+    """
+    forms = check_forms(data, base_verb)
+    flags = check_regular_flags(data, base_verb)
+    if engine_is_authoritative(base_verb):
+        return forms, flags
+    return [], forms + flags
+
+
+def default_report_path(output_path: str) -> str:
+    """输出文件旁边的核对报告路径：<output>.crosscheck.jsonl"""
+    return output_path + ".crosscheck.jsonl"
+
+
+class FindingsReport:
+    """
+    已经写进输出、但仍与规则引擎不一致的动词（线程安全的追加写 JSONL）；path 为空时只计数。
+    每条为 {"input", "infinitive", "findings", "checked_at"}。
+    """
+
+    def __init__(self, path: str = None, reset: bool = True):
+        self.path = path
+        self._jsonl = JsonlCheckpoint(path, reset=reset) if path else None
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, input_value: str, findings: list, **extra) -> None:
+        with self._lock:
+            self.count += 1
+            if self._jsonl is not None:
+                self._jsonl.append({
+                    "input": input_value,
+                    **extra,
+                    "findings": list(findings),
+                    "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                })
+
+    def close(self) -> None:
+        if self._jsonl is not None:
+            self._jsonl.close()
+
+
+_default_report = FindingsReport()
+
+
+def get_default_findings_report() -> FindingsReport:
+    return _default_report
+
+
+def set_default_findings_report(report: FindingsReport) -> FindingsReport:
+    """替换进程内的默认报告（get_verb.py --cross-check 时写到输出文件旁边）。"""
+    global _default_report
+    _default_report = report
+    return report
+
+
+def base_infinitive(verb: dict) -> str:
+    """verbs.json 记录 -> 非反身不定式（llamarse -> llamar）。"""
+    infinitive = str(verb.get("infinitive", "")).strip().lower()
+    if verb.get("is_reflexive") and infinitive.endswith("se"):
+        return infinitive[:-2]
+    return infinitive
+
+
+def check_file(path: str) -> dict:
+    """核对整个 verbs.json 形状的文件，返回 {infinitive: [问题...]}（只含有问题的动词）。"""
+    report = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for verb in iter_json_array(f):
+            if not isinstance(verb, dict):
+                continue
+            findings = cross_check(verb, base_infinitive(verb))
+            if findings:
+                report[str(verb.get("infinitive", ""))] = findings
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用本地规则引擎核对 verbs.json，标出可疑的动词。")
+    parser.add_argument("json_path", help="verbs.json 形状的文件")
+    parser.add_argument(
+        "--export-flagged",
+        metavar="PATH",
+        help="把有问题的动词写成 get_verb.py 的输入（每行一个）",
+    )
+    args = parser.parse_args()
+
+    report = check_file(args.json_path)
+    for infinitive, findings in report.items():
+        print(infinitive)
+        for finding in findings:
+            print(f"    {finding}")
+    print(f"{len(report)} verbs flagged ({sum(map(len, report.values()))} findings).")
+
+    if args.export_flagged:
+        with open(args.export_flagged, "w", encoding="utf-8") as f:
+            for infinitive in report:
+                f.write(infinitive + "\n")
+        print(f"Wrote {len(report)} verbs to {args.export_flagged}")
+    sys.exit(1 if report else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+离线重跑 get_verb.py 的后处理（不请求模型）：改了 TOP_LEVEL_KEY_ORDER、_normalize_mood_block 的 vos 补齐规则
+或 compound_tenses.py 的 HABER_FORMS 之后，把已有的 verbs.json 按当前代码重新处理一遍，并报告哪些动词变了。
+
+每个动词：去掉复合时态和 content_hash -> finalize_verb_data（normalize -> 复合时态 -> normalize -> 字段排序，
+与 get_verb.py 生成时完全相同）-> 序列化。
+- infinitive 保持原样（服务端的 verbs.json 里反身动词也有写成 llamar + is_reflexive=true 的），不会改名
+- 形状保持不变：原来没写复合时态（--derived-compound 的输出）的仍然不写；原来没有 content_hash 的不加，有的按新内容重算
+- get_verb.py 不认识的字段（supports_* / translation 等）留在原来跟着的字段后面
+- 处理出错的动词原样写出，并在报告里列出
+- 复合时态不保留原文：总是按 compound_tenses.py 的当前规则（HABER_FORMS + participle）重新推导，
+  形式和 regular 都会被改写（例如原来标 regular=false 的 ser 的复合时态会变成 true）
+- 简单时态的规范化只会补全、不会删掉已有的内容（例如已经补上的 vos），这类规则收紧后仍需重新生成
+
+报告按 content_hash 区分：
+- changed：简单时态等内容变了，列出变化的 语气.时态.人称（同 verb_diff.py）
+- compound_rules：复合时态被规则重新推导后与原文不同（单独列出，--in-place 前先看一眼）；
+  一个动词可以同时出现在 changed 和 compound_rules 里
+- reformatted：内容相同，只是字段顺序等序列化结果变了
+- unchanged：序列化结果完全相同
+
+用法：
+    python3 scripts/utils/reprocess_verbs.py server/src/verbs.json                  # 只报告，有变化时退出码为 1
+    python3 scripts/utils/reprocess_verbs.py server/src/verbs.json /tmp/verbs.json --report /tmp/reprocess.json
+    python3 scripts/utils/reprocess_verbs.py server/src/verbs.json --in-place --workers 4
+--workers N 时按块分给 N 个进程（llm_pool.imap_processes），输出与单进程逐字节相同。
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+from collections import deque
+
+import compound_tenses
+import json_writer
+from get_verb import TOP_LEVEL_KEY_ORDER, finalize_verb_data
+from json_stream import JsonArrayWriter, iter_json_array
+from llm_pool import imap_processes
+from morph_check import base_infinitive
+from verb_diff import HASH_FIELD, content_hash, diff_verbs
+
+# --workers 时每次交给一个进程的动词数
+CHUNK_SIZE = 64
+
+
+def restore_extra_fields(record: dict, original: dict) -> dict:
+    """
+    把 get_verb.py 不认识的字段放回原记录里的位置：跟在原来前面那个已知字段后面
+    （例如 supports_* 跟在 has_intr_use 后面），而不是被 reorder_top_level_fields 挪到最后。
+    """
+    owned = set(TOP_LEVEL_KEY_ORDER)
+    followers = {}
+    anchor = None
+    for key in original:
+        if key in owned:
+            anchor = key
+        elif key in record:
+            followers.setdefault(anchor, []).append(key)
+    if not followers:
+        return record
+
+    placed = {key for keys in followers.values() for key in keys}
+    result = {key: record[key] for key in followers.get(None, [])}
+    for key, value in record.items():
+        if key in placed:
+            continue
+        result[key] = value
+        for follower in followers.get(key, []):
+            result[follower] = record[follower]
+    # 原来跟着的字段这次没写出（例如复合时态被去掉了）时放到最后
+    for key in placed:
+        if key not in result:
+            result[key] = record[key]
+    return result
+
+
+def reprocess_verb(verb: dict) -> dict:
+    """verbs.json 里的一个动词 -> 按当前后处理规则重新生成的记录（不修改 verb）。"""
+    raw_data = copy.deepcopy(verb)
+    for key in compound_tenses.COMPOUND_MOODS + (HASH_FIELD,):
+        raw_data.pop(key, None)
+
+    base_verb = base_infinitive(verb)
+    raw_verb = base_verb + "(se)" if verb.get("is_reflexive") else base_verb
+    record = finalize_verb_data(raw_data, raw_verb)
+    if "infinitive" in verb:
+        record["infinitive"] = verb["infinitive"]
+
+    record.pop(HASH_FIELD, None)
+    derived = not any(mood in verb for mood in compound_tenses.COMPOUND_MOODS)
+    if derived and compound_tenses.has_derivable_compound_tenses(record):
+        record = compound_tenses.strip_compound_tenses(record)
+    record = restore_extra_fields(record, verb)
+    if HASH_FIELD in verb:
+        record[HASH_FIELD] = content_hash(record)
+    return record
+
+
+def reprocess_item(verb: dict) -> tuple:
+    """
+    (status, 新记录序列化后的文本, [(path, old, new)])；--workers 的子进程入口。
+    文本是 json_writer.dumps(record, level=1)，可直接交给 JsonArrayWriter.write_text。
+    """
+    record = reprocess_verb(verb)
+    text = json_writer.dumps(record, level=1)
+    if content_hash(record) != content_hash(verb):
+        return "changed", text, diff_verbs(verb, record)
+    if text != json_writer.dumps(verb, level=1):
+        return "reformatted", text, []
+    return "unchanged", text, []
+
+
+def split_changes(changes: list) -> tuple:
+    """diff_verbs 的结果 -> (其他变化, 复合时态的变化)。"""
+    compound_prefixes = tuple(mood + "." for mood in compound_tenses.COMPOUND_MOODS)
+    other, compound = [], []
+    for change in changes:
+        path = change[0]
+        is_compound = path in compound_tenses.COMPOUND_MOODS or path.startswith(compound_prefixes)
+        (compound if is_compound else other).append(change)
+    return other, compound
+
+
+def _iter_reprocessed(verbs, workers: int):
+    """按输入顺序产出 ((status, text, changes), error)。"""
+    if workers > 1:
+        yield from imap_processes(reprocess_item, verbs, workers, chunk_size=CHUNK_SIZE)
+        return
+    for verb in verbs:
+        try:
+            yield reprocess_item(verb), None
+        except Exception as error:
+            yield None, error
+
+
+def reprocess_file(input_path: str, output_path: str = None, workers: int = 1) -> dict:
+    """
+    流式重跑整个文件，返回
+    {"changed": {infinitive: [(path, old, new), ...]}, "compound_rules": {同 changed}, "reformatted": [...],
+     "unchanged": n, "failed": {infinitive: 错误}}。
+    output_path 为空时只报告；与 input_path 相同时先写临时文件再替换。
+    """
+    result = {"changed": {}, "compound_rules": {}, "reformatted": [], "unchanged": 0, "failed": {}}
+    originals = deque()
+
+    def verbs():
+        for verb in iter_json_array(fin):
+            originals.append(verb)
+            yield verb
+
+    temp_path = output_path + ".tmp" if output_path else None
+    with open(input_path, "r", encoding="utf-8") as fin:
+        fout = open(temp_path, "w", encoding="utf-8") if temp_path else None
+        try:
+            writer = JsonArrayWriter(fout) if fout else None
+            for item, error in _iter_reprocessed(verbs(), workers):
+                verb = originals.popleft()
+                infinitive = str(verb.get("infinitive", "")).strip() if isinstance(verb, dict) else ""
+                if error is not None:
+                    result["failed"][infinitive] = f"{type(error).__name__}: {error}"
+                    if writer is not None:
+                        writer.write(verb)
+                    continue
+                status, text, changes = item
+                if status == "changed":
+                    other, compound = split_changes(changes)
+                    if other:
+                        result["changed"][infinitive] = other
+                    if compound:
+                        result["compound_rules"][infinitive] = compound
+                elif status == "reformatted":
+                    result["reformatted"].append(infinitive)
+                else:
+                    result["unchanged"] += 1
+                if writer is not None:
+                    writer.write_text(text)
+            if writer is not None:
+                writer.close()
+                fout.write("\n")
+        finally:
+            if fout is not None:
+                fout.close()
+    if temp_path:
+        os.replace(temp_path, output_path)
+    return result
+
+
+def _short(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def format_report(result: dict) -> str:
+    lines = [
+        f"changed {len(result['changed'])}, compound_rules {len(result['compound_rules'])}, "
+        f"reformatted {len(result['reformatted'])}, unchanged {result['unchanged']}, failed {len(result['failed'])}"
+    ]
+    for infinitive, changes in result["changed"].items():
+        lines.append(f"~ {infinitive}")
+        for path, old, new in changes:
+            lines.append(f"    {path}: {_short(old)} -> {_short(new)}")
+    if result["compound_rules"]:
+        lines.append("compound tenses rewritten by compound_tenses.py rules:")
+    for infinitive, changes in result["compound_rules"].items():
+        lines.append(f"~ {infinitive}")
+        for path, old, new in changes:
+            lines.append(f"    {path}: {_short(old)} -> {_short(new)}")
+    if result["reformatted"]:
+        lines.append("reformatted: " + ", ".join(result["reformatted"]))
+    for infinitive, error in result["failed"].items():
+        lines.append(f"! {infinitive}: {error}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按当前后处理规则离线重跑已有的 verbs.json（不请求模型），报告有变化的动词。")
+    parser.add_argument("input_path", help="已有的 verbs.json")
+    parser.add_argument("output_path", nargs="?", help="输出文件；不给且没有 --in-place 时只报告")
+    parser.add_argument("--in-place", action="store_true", help="直接替换输入文件")
+    parser.add_argument("--workers", type=int, default=1, help="进程数（默认 1）")
+    parser.add_argument("--report", metavar="PATH", help="把报告写成 JSON")
+    args = parser.parse_args()
+
+    if args.in_place and args.output_path:
+        parser.error("--in-place 与 output_path 只能给一个")
+    output_path = args.input_path if args.in_place else args.output_path
+
+    result = reprocess_file(args.input_path, output_path, args.workers)
+    print(format_report(result))
+    if args.report:
+        report = dict(result)
+        for key in ("changed", "compound_rules"):
+            report[key] = {
+                infinitive: [{"path": path, "old": old, "new": new} for path, old, new in changes]
+                for infinitive, changes in result[key].items()
+            }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    if output_path:
+        print(f"Wrote {output_path}")
+    # 只报告时，有任何差异退出码为 1（方便在脚本里检查文件是否已按当前规则处理过）
+    differs = result["changed"] or result["compound_rules"] or result["reformatted"] or result["failed"]
+    sys.exit(1 if differs and not output_path else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+一轮生成运行的分阶段耗时 / token / 重试统计（get_verb.py / tag_pronoun_support.py 共用），
+运行结束写成机器可读的报告，看大批量运行时时间都花在哪。
+
+每个动词记录：
+- queue_wait：任务提交后到开始执行的等待（线程池排队），加上每次请求（含重试）前取令牌的等待
+- api：模型请求耗时（含重试的每一次请求）
+- parse：提取 JSON、解析、展开紧凑格式、结构校验
+- normalize：normalize / 复合时态 / 哈希（get_verb.py）或整理判定结果（tag_pronoun_support.py）
+- write：写输出文件或检查点
+- input_tokens / output_tokens / requests / retries / cache_hits，以及最终状态 ok / failed / reused
+批量请求的耗时和 token 平均摊到这批的每个动词上，重试次数每个动词都记；
+整轮的请求数 / 重试 / token 合计单独累加，不会因为分摊或重复记而失真。
+
+报告格式按扩展名选择：
+- *.prom：Prometheus textfile（node_exporter 的 textfile collector 格式），
+  写到 scripts/.metrics/ 即可被 server/docker-compose.observability.yml 里的 node-exporter 暴露给 Prometheus
+- 其他：JSON（汇总 + 每个阶段的分位数 + 每个动词的明细）
+
+路径：get_verb.py --metrics-out PATH（可重复）；两个脚本都读环境变量 RUN_METRICS_OUT
+（多个路径用 os.pathsep 分隔）。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ("queue_wait", "api", "parse", "normalize", "write")
+COUNTERS = ("input_tokens", "output_tokens", "requests", "retries", "cache_hits")
+
+# 每个动词各阶段耗时的直方图桶（秒）
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+
+METRIC_PREFIX = "verbgen"
+
+
+def _new_record(key: str) -> dict:
+    record = {"verb": key, "status": None}
+    record.update({stage: 0.0 for stage in STAGES})
+    record.update({name: 0 for name in COUNTERS})
+    return record
+
+
+def _quantile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class RunMetrics:
+    """
+    线程安全。工作线程里用 track(keys) 标出当前在处理哪些动词，
+    之后的 add_time / add_counts 都记到这些动词上（多个时平均分摊）。
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self.started_at = time.time()
+        self.finished_at = None
+        self._records = {}
+        self._totals = {name: 0 for name in COUNTERS}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _record(self, key: str) -> dict:
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = _new_record(key)
+        return record
+
+    @contextmanager
+    def track(self, keys):
+        previous = getattr(self._local, "keys", None)
+        self._local.keys = [keys] if isinstance(keys, str) else list(keys)
+        try:
+            yield
+        finally:
+            self._local.keys = previous
+
+    def _keys(self, keys) -> list:
+        if keys is None:
+            keys = getattr(self._local, "keys", None)
+        elif isinstance(keys, str):
+            keys = [keys]
+        return keys or []
+
+    @contextmanager
+    def timed(self, stage: str, keys=None):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - started_at, keys)
+
+    def add_time(self, stage: str, seconds: float, keys=None) -> None:
+        keys = self._keys(keys)
+        if not keys:
+            return
+        share = seconds / len(keys)
+        with self._lock:
+            for key in keys:
+                self._record(key)[stage] += share
+
+    def add_counts(self, keys=None, split: bool = True, **counts) -> None:
+        """split=True 时平均分摊（token），否则每个动词都记全数（重试次数等）。"""
+        keys = self._keys(keys)
+        if not keys:
+            return
+        with self._lock:
+            for name, value in counts.items():
+                self._totals[name] += value
+            for key in keys:
+                record = self._record(key)
+                for name, value in counts.items():
+                    record[name] += value / len(keys) if split else value
+
+    def set_status(self, key: str, status: str) -> None:
+        with self._lock:
+            self._record(key)["status"] = status
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+
+    def report(self) -> dict:
+        with self._lock:
+            records = [dict(record) for record in self._records.values()]
+            totals = dict(self._totals)
+        finished_at = self.finished_at or time.time()
+
+        for record in records:
+            for stage in STAGES:
+                record[stage] = round(record[stage], 6)
+            for name in ("input_tokens", "output_tokens"):
+                record[name] = round(record[name])
+
+        statuses = {}
+        for record in records:
+            statuses[record["status"] or "unknown"] = statuses.get(record["status"] or "unknown", 0) + 1
+
+        stages = {}
+        for stage in STAGES:
+            values = sorted(record[stage] for record in records)
+            stages[stage] = {
+                "sum": round(sum(values), 6),
+                "mean": round(sum(values) / len(values), 6) if values else 0.0,
+                "p50": _quantile(values, 0.5),
+                "p95": _quantile(values, 0.95),
+                "max": values[-1] if values else 0.0,
+            }
+
+        return {
+            "script": self.script,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(finished_at)),
+            "duration_seconds": round(finished_at - self.started_at, 3),
+            "verbs": statuses,
+            "totals": totals,
+            "stages": stages,
+            "per_verb": records,
+        }
+
+    def write(self, path: str) -> None:
+        """按扩展名写 JSON 或 Prometheus textfile；先写临时文件再替换，采集方不会读到半个文件。"""
+        report = self.report()
+        text = format_prometheus(report) if path.endswith(".prom") else json.dumps(report, ensure_ascii=False, indent=2) + "\n"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value) -> str:
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+def format_prometheus(report: dict) -> str:
+    """上一轮运行的快照（gauge + 每个动词各阶段耗时的 histogram）。"""
+    script = report["script"]
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{full_name}{suffix}{_labels(script=script, **labels)} {_number(value)}")
+
+    finished_at = int(time.mktime(time.strptime(report["finished_at"], "%Y-%m-%dT%H:%M:%S")))
+    metric("run_finished_timestamp_seconds", "gauge", "Unix time the last run finished.", [("", {}, finished_at)])
+    metric("run_duration_seconds", "gauge", "Wall time of the last run.", [("", {}, report["duration_seconds"])])
+    metric(
+        "run_verbs",
+        "gauge",
+        "Verbs in the last run by final status.",
+        [("", {"status": status}, count) for status, count in sorted(report["verbs"].items())],
+    )
+    totals = report["totals"]
+    metric(
+        "run_tokens",
+        "gauge",
+        "Model tokens used in the last run.",
+        [("", {"direction": "input"}, totals["input_tokens"]), ("", {"direction": "output"}, totals["output_tokens"])],
+    )
+    metric("run_requests", "gauge", "Model requests sent in the last run (retries included).", [("", {}, totals["requests"])])
+    metric("run_retries", "gauge", "Retried model requests in the last run.", [("", {}, totals["retries"])])
+    metric("run_cache_hits", "gauge", "Response cache hits in the last run.", [("", {}, totals["cache_hits"])])
+    metric(
+        "run_stage_seconds",
+        "gauge",
+        "Seconds spent per stage in the last run, summed over verbs.",
+        [("", {"stage": stage}, stats["sum"]) for stage, stats in report["stages"].items()],
+    )
+
+    samples = []
+    for stage in STAGES:
+        values = [record[stage] for record in report["per_verb"]]
+        for bucket in HISTOGRAM_BUCKETS:
+            samples.append(("_bucket", {"stage": stage, "le": _number(float(bucket))}, sum(1 for v in values if v <= bucket)))
+        samples.append(("_bucket", {"stage": stage, "le": "+Inf"}, len(values)))
+        samples.append(("_sum", {"stage": stage}, float(sum(values))))
+        samples.append(("_count", {"stage": stage}, len(values)))
+    metric("verb_stage_seconds", "histogram", "Per-verb seconds spent in each stage of the last run.", samples)
+
+    return "\n".join(lines) + "\n"
+
+
+def output_paths_from_env() -> list:
+    value = os.getenv("RUN_METRICS_OUT") or ""
+    return [path for path in value.split(os.pathsep) if path.strip()]
+
+
+_default_metrics = RunMetrics("")
+
+
+def get_default_run_metrics() -> RunMetrics:
+    return _default_metrics
+
+
+def set_default_run_metrics(metrics: RunMetrics) -> RunMetrics:
+    """替换进程内的默认记录（脚本 main 开头调用，带上脚本名）。"""
+    global _default_metrics
+    _default_metrics = metrics
+    return metrics
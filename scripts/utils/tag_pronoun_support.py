@@ -11,17 +11,57 @@ What this script does:
 2) For verbs where has_tr_use == true, call the same Qwen API path used by get_verb.py
    to judge support for DO / IO / DO+IO.
 3) Input and output paths are read from interactive console input.
-4) Streaming output behavior:
-   - write initial output file immediately (all supports_* = null)
-   - after each model response, update the corresponding verb and flush to output file
+   An optional resume mode skips verbs whose supports_* fields are already filled in
+   (in the input or in the checkpoint left by a previous run), so only missing or
+   failed verbs are sent to the model.
+   An optional batch size sends several verb profiles per request (sharing one system
+   prompt); each verb's answer is validated on its own, a reply with invalid or missing
+   verbs is re-prompted, and if it never passes the verbs are re-queued as single-verb requests.
+   Raw model replies are cached on disk by (model, system prompt, user prompt), see
+   llm_cache.py; LLM_CACHE_MODE=off|refresh disables or bypasses the cache.
+   A reply is cached only after every verb in it has bool supports_do / supports_io /
+   supports_do_io; replies that miss a verb or a field are re-prompted like malformed JSON.
+   Requests go through llm_backend.py: LLM_BACKEND=dashscope (default) or openai
+   (any OpenAI-compatible endpoint, e.g. the local mock_llm_server.py for offline runs).
+   Every request sent to the model, retries included, first takes a token from a token bucket
+   (one request per REQUEST_INTERVAL_SECONDS, see llm_pool.py); cache hits do not wait.
+   Throttling, 5xx and network errors are retried with exponential backoff and jitter,
+   malformed JSON replies are re-prompted, and authentication errors abort the run
+   (see llm_retry.py). Verbs that still fail go to <output>.deadletter.jsonl.
+4) Checkpointing behavior:
+   - after each model response, append one line to an append-only JSONL sidecar
+     (<output>.checkpoint.jsonl) and fsync it; each result is serialized exactly once
+   - the verbs.json-shaped output file is built once at the end of the run
+     (also on Ctrl+C / crash), by applying the checkpoint records to the input
+5) Memory: the input is streamed twice (json_stream.py), once to pick the verbs to evaluate
+   and once to write the output, so only small per-verb profiles and results stay in memory.
+6) Metrics: per-verb API / parse / normalize / checkpoint-write time, tokens, retries and
+   cache hits are recorded (run_metrics.py). Set RUN_METRICS_OUT to a *.prom path for a
+   Prometheus textfile report, or any other path for a JSON report.
 """
 
 import json
 import os
-import re
 import time
 from collections import OrderedDict
-from http import HTTPStatus
+from functools import partial
+
+from checkpoint import JsonlCheckpoint, default_checkpoint_path
+from json_stream import JsonArrayWriter, iter_json_array
+from llm_backend import get_default_backend
+from llm_cache import get_default_cache
+from llm_json import parse_json_reply
+from llm_pool import TokenBucket, get_default_limiter, set_default_limiter
+from llm_retry import (
+    AuthError,
+    DeadLetterFile,
+    MalformedResponseError,
+    default_dead_letter_path,
+    get_default_retry_policy,
+)
+from llm_usage import get_default_usage_log
+from run_metrics import RunMetrics, get_default_run_metrics, output_paths_from_env, set_default_run_metrics
+from verb_diff import refresh_content_hash
 
 
 REQUEST_INTERVAL_SECONDS = 0.5
@@ -80,33 +120,20 @@ Output JSON schema:
 }
 """
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+Batch mode:
+You will receive SEVERAL verb profiles instead of one.
+Return ONE JSON object whose keys are the given infinitives, written exactly as in the input,
+and whose values follow the output schema above.
+Do not skip any verb and do not add verbs that were not given.
+"""
 
-def extract_json_from_text(text: str) -> str:
-    text = text.strip()
-    text = re.sub(r"^```(?:json)?", "", text, flags=re.IGNORECASE | re.MULTILINE)
-    text = re.sub(r"```$", "", text, flags=re.MULTILINE)
-    text = text.strip()
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or start > end:
-        raise ValueError("No JSON object found in model output.")
-    return text[start : end + 1]
-
-
-def compact_lists(json_str: str) -> str:
-    pattern = r'\[\s*(?:"[^"\n]*"(?:\s*,\s*"[^"\n]*")*)\s*\]'
+DEFAULT_BATCH_SIZE = 1
 
-    def repl(match: re.Match) -> str:
-        text = match.group(0)
-        try:
-            arr = json.loads(text)
-            if isinstance(arr, list):
-                return json.dumps(arr, ensure_ascii=False)
-        except Exception:
-            pass
-        return text
+SUPPORT_FIELDS = ("supports_do", "supports_io", "supports_do_io")
 
-    return re.sub(pattern, repl, json_str)
+# Fields read by build_verb_profile; the only part of a pending verb kept in memory.
+PROFILE_KEYS = ("infinitive", "translation", "is_reflexive", "has_tr_use", "has_intr_use")
 
 
 def coerce_bool(value):
@@ -128,12 +155,13 @@ def to_bool_default_false(value) -> bool:
     return parsed if parsed is not None else False
 
 
-def load_json_file(path: str):
+def iter_verbs(path: str):
+    """Yield (index, verb) from the input array one object at a time (constant memory)."""
     with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
-        raise ValueError("Input JSON must be a top-level array.")
-    return data
+        for idx, verb in enumerate(iter_json_array(f)):
+            if not isinstance(verb, dict):
+                raise ValueError(f"Item at index {idx} is not an object.")
+            yield idx, verb
 
 
 def normalize_user_path(raw_path: str) -> str:
@@ -182,7 +210,7 @@ def add_support_fields_and_reorder(verb: dict) -> OrderedDict:
     return ordered
 
 
-def build_user_prompt(verb: dict) -> str:
+def build_verb_profile(verb: dict) -> str:
     infinitive = str(verb.get("infinitive", "")).strip()
     is_reflexive = to_bool_default_false(verb.get("is_reflexive"))
     has_tr_use = to_bool_default_false(verb.get("has_tr_use"))
@@ -194,48 +222,111 @@ def build_user_prompt(verb: dict) -> str:
         translation_text = str(translation or "")
 
     return (
-        "Verb profile:\n"
         f"- infinitive: {infinitive}\n"
         f"- translation_hints: {translation_text or '(none)'}\n"
         f"- is_reflexive: {str(is_reflexive).lower()}\n"
         f"- has_tr_use: {str(has_tr_use).lower()}\n"
-        f"- has_intr_use: {str(has_intr_use).lower()}\n\n"
+        f"- has_intr_use: {str(has_intr_use).lower()}\n"
+    )
+
+
+def build_user_prompt(verb: dict) -> str:
+    return (
+        "Verb profile:\n"
+        f"{build_verb_profile(verb)}\n"
         "Decide supports_do / supports_io / supports_do_io.\n"
         "Return JSON only."
     )
 
 
-def call_qwen_for_support(verb: dict) -> dict:
-    from dashscope import Generation
+def build_batch_user_prompt(verbs: list) -> str:
+    profiles = "\n".join(build_verb_profile(verb) for verb in verbs)
+    return (
+        "Verb profiles:\n"
+        f"{profiles}\n"
+        "Decide supports_do / supports_io / supports_do_io for every verb.\n"
+        "Return JSON only."
+    )
 
-    api_key = os.getenv("DASHSCOPE_API_KEY")
-    if not api_key:
-        raise RuntimeError("Environment variable DASHSCOPE_API_KEY is not set.")
 
+def request_qwen_payload(
+    system_prompt: str,
+    user_prompt: str,
+    usage_kind: str = "support",
+    verb_count: int = 1,
+    validate=None,
+) -> dict:
+    """
+    Send one request and parse the reply into a dict.
+    validate(payload) returns a list of problems; a non-empty list re-prompts like malformed JSON,
+    and a cached reply with problems is ignored. Only replies that pass are cached.
+    """
     model = os.getenv("VERB_GENERATEION_MODEL", "qwen-plus")
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": build_user_prompt(verb)},
-    ]
-
-    response = Generation.call(
-        api_key=api_key,
-        model=model,
-        messages=messages,
-        result_format="message",
-    )
-
-    if response.status_code != HTTPStatus.OK:
-        raise RuntimeError(
-            "Qwen API error: "
-            f"status_code={response.status_code}, "
-            f"code={getattr(response, 'code', None)}, "
-            f"message={getattr(response, 'message', None)}"
+    metrics = get_default_run_metrics()
+
+    # Reuse the raw reply when the same (model, prompts) was answered before.
+    cache = get_default_cache()
+    content = cache.get(model, system_prompt, user_prompt)
+    if content is not None:
+        with metrics.timed("parse"):
+            payload = parse_json_reply(content)
+            cache_errors = validate(payload) if validate is not None else None
+        if not cache_errors:
+            metrics.add_counts(split=False, cache_hits=1)
+            return payload
+
+    # dashscope SDK or an OpenAI-compatible endpoint, selected by LLM_BACKEND (see llm_backend.py).
+    backend = get_default_backend()
+    limiter = get_default_limiter()
+    attempts = 0
+
+    def attempt():
+        nonlocal attempts
+        attempts += 1
+        # Take a token on every attempt, so retries after throttling still respect the rate limit.
+        with metrics.timed("queue_wait"):
+            limiter.acquire()
+        started_at = time.perf_counter()
+        reply, usage = backend.complete_with_usage(system_prompt, user_prompt, model, "pronoun support")
+        latency = time.perf_counter() - started_at
+        entry = get_default_usage_log().record(
+            usage_kind,
+            verb_count,
+            usage,
+            latency,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            reply=reply,
+            label="pronoun support",
         )
+        metrics.add_time("api", latency)
+        metrics.add_counts(input_tokens=entry["input_tokens"], output_tokens=entry["output_tokens"])
+        metrics.add_counts(split=False, requests=1)
+        # A parse error raises ValueError, which makes the retry layer re-prompt.
+        with metrics.timed("parse"):
+            payload = parse_json_reply(reply)
+            errors = validate(payload) if validate is not None else None
+        if errors:
+            raise MalformedResponseError(
+                "Invalid pronoun support reply: " + "; ".join(errors[:5])
+                + (f" (+{len(errors) - 5} more)" if len(errors) > 5 else "")
+            )
+        return reply, payload
+
+    # Throttling / 5xx / network errors back off with jitter; auth errors fail fast.
+    try:
+        content, payload = get_default_retry_policy().run(attempt, "pronoun support")
+    finally:
+        if attempts > 1:
+            metrics.add_counts(split=False, retries=attempts - 1)
 
-    content = response.output.choices[0].message.content
-    payload = json.loads(extract_json_from_text(content))
+    # Only cache replies that parsed and passed validate, so a bad answer is asked again next time.
+    cache.put(model, system_prompt, user_prompt, content)
 
+    return payload
+
+
+def parse_support_result(payload: dict) -> dict:
     result = {
         "supports_do": coerce_bool(payload.get("supports_do")),
         "supports_io": coerce_bool(payload.get("supports_io")),
@@ -248,12 +339,126 @@ def call_qwen_for_support(verb: dict) -> dict:
     return result
 
 
-def write_json_array(path: str, data: list):
-    with open(path, "w", encoding="utf-8") as f:
-        text = json.dumps(data, ensure_ascii=False, indent=2)
-        text = compact_lists(text)
-        f.write(text)
+def is_valid_support_result(result: dict) -> bool:
+    return all(isinstance(result.get(key), bool) for key in SUPPORT_FIELDS)
+
+
+def support_result_errors(payload) -> list:
+    """Problems with one verb's answer: not an object, or a supports_* field that is not a bool."""
+    if not isinstance(payload, dict):
+        return ["answer is not an object"]
+    result = parse_support_result(payload)
+    return [f"{key} is not a bool: {payload.get(key)!r}" for key in SUPPORT_FIELDS if not isinstance(result[key], bool)]
+
+
+def batch_support_errors(infinitives: list, payload: dict) -> list:
+    """Per-verb problems in a batch reply; a verb missing from the reply counts as one."""
+    errors = []
+    for infinitive in infinitives:
+        if infinitive not in payload:
+            errors.append(f"{infinitive}: missing")
+            continue
+        errors.extend(f"{infinitive}: {error}" for error in support_result_errors(payload[infinitive]))
+    return errors
+
+
+def call_qwen_for_support(verb: dict) -> dict:
+    metrics = get_default_run_metrics()
+    with metrics.track(str(verb.get("infinitive", "")).strip()):
+        payload = request_qwen_payload(SYSTEM_PROMPT, build_user_prompt(verb), validate=support_result_errors)
+        with metrics.timed("normalize"):
+            return parse_support_result(payload)
+
+
+def call_qwen_for_support_batch(verbs: list) -> list:
+    """
+    Ask about several verbs in one request. Returns results aligned with verbs.
+    The reply is re-prompted until every verb has a valid answer (batch_support_errors);
+    when retries run out this raises and the caller re-queues every verb on its own.
+    An entry is None only if the reply still fails validation here, e.g. duplicate infinitives.
+    """
+    metrics = get_default_run_metrics()
+    infinitives = [str(verb.get("infinitive", "")).strip() for verb in verbs]
+    with metrics.track(infinitives):
+        payload = request_qwen_payload(
+            BATCH_SYSTEM_PROMPT,
+            build_batch_user_prompt(verbs),
+            usage_kind="batch-support",
+            verb_count=len(verbs),
+            validate=partial(batch_support_errors, infinitives),
+        )
+        with metrics.timed("normalize"):
+            results = []
+            for verb in verbs:
+                item = payload.get(str(verb.get("infinitive", "")).strip())
+                result = parse_support_result(item) if isinstance(item, dict) else None
+                results.append(result if result is not None and is_valid_support_result(result) else None)
+    return results
+
+
+def apply_support_result(verb: dict, result: dict):
+    verb["supports_do"] = result.get("supports_do")
+    verb["supports_io"] = result.get("supports_io")
+    verb["supports_do_io"] = result.get("supports_do_io")
+
+
+def is_support_tagged(verb: dict) -> bool:
+    return all(verb.get(key) is not None for key in ("supports_do", "supports_io", "supports_do_io"))
+
+
+def index_checkpoint_records(records: list) -> dict:
+    """Checkpoint records keyed by infinitive. Later records win."""
+    by_infinitive = {}
+    for record in records:
+        infinitive = record.get("infinitive")
+        if infinitive:
+            by_infinitive[infinitive] = record
+    return by_infinitive
+
+
+def extract_profile(verb: dict) -> dict:
+    """Keep only the fields build_verb_profile needs, so pending verbs stay small in memory."""
+    return {key: verb.get(key) for key in PROFILE_KEYS}
+
+
+def ask_batch_size(prompt: str, default: int = DEFAULT_BATCH_SIZE) -> int:
+    answer = input(prompt).strip()
+    if not answer:
+        return default
+    try:
+        return max(1, int(answer))
+    except ValueError:
+        raise RuntimeError(f"Batch size must be a positive integer: {answer}")
+
+
+def ask_yes_no(prompt: str, default: bool = False) -> bool:
+    answer = input(prompt).strip().lower()
+    if not answer:
+        return default
+    return answer in ("y", "yes")
+
+
+def write_tagged_output(input_path: str, output_path: str, checkpoint_records: dict, results: dict) -> int:
+    """
+    Stream the input again and write the tagged copy: support fields inserted and reordered,
+    checkpoint records (resume) and this run's results applied. Goes through a temp file,
+    so the output may be the input file itself.
+    """
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        with JsonArrayWriter(f) as writer:
+            for idx, verb in iter_verbs(input_path):
+                verb = add_support_fields_and_reorder(verb)
+                record = checkpoint_records.get(str(verb.get("infinitive", "")).strip())
+                if record is not None:
+                    apply_support_result(verb, record)
+                if idx in results:
+                    apply_support_result(verb, results[idx])
+                writer.write(refresh_content_hash(verb))
         f.write("\n")
+        count = writer.count
+    os.replace(temp_path, output_path)
+    return count
 
 
 def load_env():
@@ -273,9 +478,13 @@ def load_env():
 
 def main():
     load_env()
+    metrics = set_default_run_metrics(RunMetrics("tag_pronoun_support"))
+    set_default_limiter(TokenBucket(1.0 / REQUEST_INTERVAL_SECONDS))
 
     raw_input_path = input("Input verbs JSON path: ").strip()
     raw_output_path = input("Output JSON path (file or directory): ").strip()
+    resume = ask_yes_no("Resume (skip verbs already tagged in input or checkpoint)? [y/N]: ")
+    batch_size = ask_batch_size(f"Verbs per request [{DEFAULT_BATCH_SIZE}]: ")
 
     input_path = normalize_user_path(raw_input_path)
     output_path = resolve_output_file_path(raw_output_path, input_path)
@@ -287,61 +496,139 @@ def main():
     if os.path.isdir(input_path):
         raise RuntimeError(f"Input path is a directory, expected a JSON file: {input_path}")
 
-    verbs = load_json_file(input_path)
-    total = len(verbs)
-    print(f"Loaded {total} verbs.")
     print(f"Resolved output file: {output_path}")
 
-    processed = []
-    target_indexes = []
-
-    for idx, verb in enumerate(verbs):
-        if not isinstance(verb, dict):
-            raise ValueError(f"Item at index {idx} is not an object.")
-        normalized = add_support_fields_and_reorder(verb)
-        processed.append(normalized)
-        if to_bool_default_false(normalized.get("has_tr_use")):
-            target_indexes.append(idx)
-
     output_dir = os.path.dirname(output_path)
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
-    # Initialize output file first: copy input structure + inserted null fields.
-    write_json_array(output_path, processed)
-    print(f"Initialized output file with null support fields: {output_path}")
+    checkpoint_path = default_checkpoint_path(output_path)
+    print(f"Checkpoint file: {checkpoint_path}")
+    checkpoint_records = {}
+    if resume:
+        checkpoint_records = index_checkpoint_records(JsonlCheckpoint(checkpoint_path).load())
+
+    # First pass: stream the input once and keep only small profiles of the verbs to evaluate.
+    # The full objects are read again when the output is written.
+    profiles = {}
+    target_indexes = []
+    skipped_count = 0
+    applied = 0
+    total = 0
+    for idx, verb in iter_verbs(input_path):
+        total += 1
+        record = checkpoint_records.get(str(verb.get("infinitive", "")).strip())
+        if record is not None:
+            verb = add_support_fields_and_reorder(verb)
+            apply_support_result(verb, record)
+            applied += 1
+        if not to_bool_default_false(verb.get("has_tr_use")):
+            continue
+        if resume and is_support_tagged(verb):
+            skipped_count += 1
+            continue
+        target_indexes.append(idx)
+        profiles[idx] = extract_profile(verb)
 
+    print(f"Loaded {total} verbs.")
+    if resume:
+        print(f"Resume: applied {applied} results from checkpoint.")
+        print(f"Resume: skipping {skipped_count} verbs that are already tagged.")
     print(f"Will evaluate pronoun support for {len(target_indexes)} verbs (has_tr_use=true).")
+    if batch_size > 1:
+        print(f"Batch mode: {batch_size} verbs per request; invalid answers are re-queued one by one.")
 
     success_count = 0
     fail_count = 0
+    requeued_count = 0
+    aborted_by = None
+    results = {}
+
+    # Verbs that still fail after retries are recorded here for later replay (rerun with resume).
+    dead_letter_path = default_dead_letter_path(output_path)
+    dead_letters = DeadLetterFile(dead_letter_path, reset=True)
 
-    for seq, idx in enumerate(target_indexes, start=1):
-        verb = processed[idx]
-        infinitive = str(verb.get("infinitive", "")).strip() or f"index:{idx}"
-        print(f"[{seq}/{len(target_indexes)}] {infinitive} ...", end="", flush=True)
-        try:
-            result = call_qwen_for_support(verb)
-            verb["supports_do"] = result["supports_do"]
-            verb["supports_io"] = result["supports_io"]
-            verb["supports_do_io"] = result["supports_do_io"]
-            write_json_array(output_path, processed)
-            success_count += 1
-            print(" OK (flushed)")
-        except Exception as error:
-            fail_count += 1
-            # Keep null when failed.
-            print(" FAIL")
-            print(f"    reason: {error}")
-            # Flush anyway so progress up to current step remains persisted.
-            write_json_array(output_path, processed)
-        time.sleep(REQUEST_INTERVAL_SECONDS)
+    try:
+        # Resume keeps appending to the previous checkpoint; a fresh run starts a new one.
+        with JsonlCheckpoint(checkpoint_path, reset=not resume) as checkpoint:
+            seq = 0
+            for start in range(0, len(target_indexes), batch_size):
+                batch_indexes = target_indexes[start : start + batch_size]
+
+                batch_results = [None] * len(batch_indexes)
+                if len(batch_indexes) > 1:
+                    try:
+                        batch_results = call_qwen_for_support_batch([profiles[idx] for idx in batch_indexes])
+                    except AuthError as error:
+                        aborted_by = error
+                        break
+                    except Exception as error:
+                        print(f"Batch request failed, re-queueing {len(batch_indexes)} verbs: {error}")
+
+                for idx, result in zip(batch_indexes, batch_results):
+                    seq += 1
+                    verb = profiles[idx]
+                    infinitive = str(verb.get("infinitive", "")).strip() or f"index:{idx}"
+                    print(f"[{seq}/{len(target_indexes)}] {infinitive} ...", end="", flush=True)
+                    note = "batched"
+                    try:
+                        if result is None:
+                            # Not answered (or answered badly) in the batch: ask for this verb alone.
+                            if len(batch_indexes) > 1:
+                                requeued_count += 1
+                                note = "re-queued"
+                            else:
+                                note = "single"
+                            result = call_qwen_for_support(verb)
+                        with metrics.timed("write", infinitive):
+                            checkpoint.append({"index": idx, "infinitive": infinitive, **result})
+                        results[idx] = result
+                        success_count += 1
+                        metrics.set_status(infinitive, "ok")
+                        print(f" OK ({note}, checkpointed)")
+                    except Exception as error:
+                        fail_count += 1
+                        metrics.set_status(infinitive, "failed")
+                        dead_letters.record(infinitive, error, index=idx)
+                        # Keep null when failed.
+                        print(" FAIL")
+                        print(f"    reason: {error}")
+                        if isinstance(error, AuthError):
+                            aborted_by = error
+                            break
+                if aborted_by is not None:
+                    break
+    finally:
+        dead_letters.close()
+        # Build the verbs.json-shaped output once, even if the run was interrupted,
+        # streaming the input again instead of holding every verb in memory.
+        write_tagged_output(input_path, output_path, checkpoint_records, results)
+        print(f"\nWrote output file: {output_path}")
+        metrics.finish()
+        for path in output_paths_from_env():
+            metrics.write(path)
+            print(f"Wrote run metrics: {path}")
+
+    if aborted_by is not None:
+        raise RuntimeError(f"Aborted on authentication error (rerun with resume once fixed): {aborted_by}")
 
     print("\nDone.")
     print(f"- total verbs: {total}")
     print(f"- evaluated(has_tr_use=true): {len(target_indexes)}")
+    if resume:
+        print(f"- skipped(already tagged): {skipped_count}")
     print(f"- success: {success_count}")
+    if batch_size > 1:
+        print(f"- re-queued from batches: {requeued_count}")
     print(f"- failed: {fail_count}")
+    if fail_count:
+        print(f"- dead letters: {dead_letter_path}")
+    retry_policy = get_default_retry_policy()
+    if retry_policy.retries:
+        print(f"- retried requests: {retry_policy.retries}")
+    cache = get_default_cache()
+    if cache.mode != "off":
+        print(f"- cache hits/misses: {cache.hits}/{cache.misses}")
     print(f"- output: {output_path}")
 
 
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""compound_tenses.py：haber 变位表与服务端 verbAutoFillService.js 的同名表保持一致。"""
+
+import json
+import os
+import re
+
+import compound_tenses
+
+JS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "services", "verbAutoFillService.js"
+)
+
+
+def load_js_haber_forms() -> dict:
+    """取出 JS 里的 const HABER_FORMS = {...}，把对象字面量（裸 key、单引号）转成 JSON 解析。"""
+    with open(JS_PATH, "r", encoding="utf-8") as f:
+        source = f.read()
+    match = re.search(r"^const HABER_FORMS = (\{.*?^\})", source, re.S | re.M)
+    assert match, "HABER_FORMS not found in verbAutoFillService.js"
+    literal = re.sub(r"'([^']*)'", r'"\1"', match.group(1))
+    literal = re.sub(r"^(\s*)(\w+):", r'\1"\2":', literal, flags=re.M)
+    return json.loads(literal)
+
+
+def test_haber_forms_match_server_table():
+    assert compound_tenses.HABER_FORMS == load_js_haber_forms()
+
+
+def test_subjunctive_future_perfect():
+    verb = {"participle": ["hablado"]}
+    compound_tenses.expand_compound_tenses(verb)
+    tense = verb["compound_subjunctive"]["future_perfect"]
+    assert tense["third_plural"] == ["hubieren hablado"]
+    assert tense["second_singular_vos_form"] == ["hubieres hablado"]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""conjugator.py 的回归测试：词表外的词干变化动词不能被当成规则动词生成。"""
+
+import json
+import os
+
+import pytest
+
+import conjugator
+
+VERBS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "src", "verbs.json")
+
+# 词干变化 / 元音变化动词，但不在 STEM_CHANGE_VERBS 里（拼写上和规则动词分不出来）
+UNLISTED_STEM_CHANGERS = [
+    "rodar", "tentar", "volcar", "soldar", "colegir", "discernir", "concernir",
+    "apacentar", "avergonzar", "degollar", "descollar", "engrosar", "holgar", "trocar",
+    "aterrar", "cimentar", "escarmentar", "incensar", "mentar", "retentar",
+    "reñir", "teñir", "ceñir", "henchir", "investir",
+]
+
+# verbs.json 里的词干变化 / -zco 动词，引擎的简单时态和命令式应与之逐字相同
+HOUSE_STEM_CHANGERS = ["pedir", "soñar", "doler", "atender", "remover", "conocer"]
+
+# 词表外的 -iar / -uar：重音可能移位（reenvío / radiografío），也可能不移位（cambio）
+UNLISTED_ACCENT_CANDIDATES = ["reenviar", "radiografiar", "autografiar", "vidriar", "cablegrafiar", "acuar", "menstruar"]
+
+
+@pytest.mark.parametrize("verb", UNLISTED_STEM_CHANGERS)
+def test_unlisted_stem_changers_go_to_llm(verb):
+    assert conjugator.classify_verb(verb) is None
+    assert conjugator.conjugate(verb) is None
+
+
+@pytest.mark.parametrize("verb", UNLISTED_ACCENT_CANDIDATES)
+def test_unlisted_accent_candidates_go_to_llm(verb):
+    assert conjugator.classify_verb(verb) is None
+
+
+@pytest.mark.parametrize("verb", ["hablar", "comer", "vivir", "pasear", "leer", "parecer", "llevar", "presentar", "estudiar", "averiguar"])
+def test_known_regular_verbs_stay_local(verb):
+    assert conjugator.classify_verb(verb) is not None
+
+
+def _forms(data, mood, tense, person):
+    return data[mood][tense][person]
+
+
+def test_regular_paradigm():
+    data = conjugator.conjugate("hablar")
+    assert _forms(data, "indicative", "present", "first_singular") == ["hablo"]
+    assert _forms(data, "indicative", "present", "second_singular_vos_form") == ["hablás"]
+    assert _forms(data, "subjunctive", "imperfect", "third_plural") == ["hablaran", "hablasen"]
+    assert data["indicative"]["present"]["regular"] is True
+
+
+def test_listed_stem_changers():
+    pensar = conjugator.conjugate("pensar")
+    assert _forms(pensar, "indicative", "present", "first_singular") == ["pienso"]
+    assert _forms(pensar, "indicative", "present", "first_plural") == ["pensamos"]
+    assert pensar["indicative"]["present"]["regular"] is False
+
+    dormir = conjugator.conjugate("dormir")
+    assert _forms(dormir, "indicative", "preterite", "third_singular") == ["durmió"]
+    assert dormir["gerund"] == "durmiendo"
+
+    pedir = conjugator.conjugate("pedir")
+    assert _forms(pedir, "subjunctive", "present", "first_plural") == ["pidamos"]
+
+
+def test_spelling_and_zc_changes():
+    assert _forms(conjugator.conjugate("buscar"), "indicative", "preterite", "first_singular") == ["busqué"]
+    assert _forms(conjugator.conjugate("coger"), "indicative", "present", "first_singular") == ["cojo"]
+    assert _forms(conjugator.conjugate("conocer"), "indicative", "present", "first_singular") == ["conozco"]
+    assert _forms(conjugator.conjugate("construir"), "indicative", "preterite", "third_plural") == ["construyeron"]
+
+
+def test_accent_shift():
+    enviar = conjugator.conjugate("enviar")
+    assert _forms(enviar, "indicative", "present", "first_singular") == ["envío"]
+    assert _forms(enviar, "indicative", "present", "first_plural") == ["enviamos"]
+
+
+def test_vos_spellings_agree():
+    pensar = conjugator.conjugate("pensar")
+    assert _forms(pensar, "subjunctive", "present", "second_singular_vos_form") == ["pensés"]
+    assert _forms(pensar, "imperative", "negative", "second_singular_vos_form") == ["no pensés"]
+
+    dormir = conjugator.conjugate("dormir")
+    assert _forms(dormir, "subjunctive", "present", "second_singular_vos_form") == ["durmás"]
+    assert _forms(dormir, "imperative", "negative", "second_singular_vos_form") == ["no durmás"]
+
+
+@pytest.fixture(scope="module")
+def house_verbs():
+    with open(VERBS_JSON, encoding="utf-8") as f:
+        return {verb["infinitive"]: verb for verb in json.load(f) if not verb.get("is_reflexive")}
+
+
+@pytest.mark.parametrize("verb", HOUSE_STEM_CHANGERS)
+def test_matches_house_data(verb, house_verbs):
+    expected = house_verbs[verb]
+    data = conjugator.conjugate(verb)
+    for mood in ("indicative", "subjunctive"):
+        for tense, tense_obj in data[mood].items():
+            for person, forms in tense_obj.items():
+                if person != "regular":
+                    assert forms == expected[mood][tense][person], (mood, tense, person)
+    assert data["imperative"] == expected["imperative"]
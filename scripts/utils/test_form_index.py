@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""form_index.py：反向索引的构建与查询；折叠 key、近似查询，预计算与现算的删除邻域结果相同。"""
+
+import pytest
+
+import conjugator
+import form_index
+from form_index import FormIndex, edit_distance, fold_form, strip_form
+
+
+def _verb(infinitive: str) -> dict:
+    verb = conjugator.conjugate(infinitive)
+    verb["infinitive"] = infinitive
+    return verb
+
+
+@pytest.fixture(scope="module")
+def verbs():
+    return [_verb("hablar"), _verb("enseñar"), _verb("pensar")]
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["lazy-deletes", "prebuilt-deletes"])
+def index(request, verbs):
+    return FormIndex(form_index.build_index(verbs, fuzzy=request.param))
+
+
+def test_fold_and_strip():
+    assert fold_form("Hubiéramos") == "hubieramos"
+    assert fold_form("NO  hables") == "no hables"
+    assert fold_form("enseñé") == "enseñe"
+    assert fold_form("pingüino") == "pinguino"
+    assert strip_form("Enseñamos") == "ensenamos"
+
+
+def test_edit_distance():
+    assert edit_distance("hablo", "hablo") == 0
+    assert edit_distance("hablo", "hbalo") == 1  # 相邻换位
+    assert edit_distance("hablo", "habló") == 1
+    assert edit_distance("hablo", "hablamos") == 2  # 超过 limit 时返回 limit + 1
+
+
+def test_lookup_folds_case_and_accents(index):
+    slots = {(m["infinitive"], m["mood"], m["tense"], m["person"]) for m in index.lookup("HABLO")}
+    assert ("hablar", "indicative", "present", "first_singular") in slots
+    assert ("hablar", "indicative", "preterite", "third_singular") in slots
+
+    exact = index.lookup("habló", exact=True)
+    assert exact and all(m["form"] == "habló" for m in exact)
+    assert index.infinitives("pienso") == ["pensar"]
+
+
+def test_lookup_compound_and_nonfinite(index):
+    matches = index.lookup("hubieramos hablado")
+    assert {(m["mood"], m["tense"]) for m in matches} == {("compound_subjunctive", "pluperfect")}
+    assert index.lookup("pensando")[0]["mood"] == "nonfinite"
+
+
+def test_write_and_load_round_trip(verbs, tmp_path):
+    path = str(tmp_path / "verbs.forms.json")
+    form_index.write_index(form_index.build_index(verbs), path)
+
+    loaded = FormIndex.load(path)
+    assert loaded.verbs == ["hablar", "enseñar", "pensar"]
+    assert loaded.infinitives("enseñamos") == ["enseñar"]
+
+
+def test_fuzzy_lookup(index):
+    # 把 ñ 打成 n：distance 0
+    no_tilde = index.fuzzy_lookup("ensenamos")
+    assert no_tilde[0]["form"] == "enseñamos" and no_tilde[0]["distance"] == 0
+
+    typo = index.fuzzy_lookup("pienos")
+    assert {m["form"] for m in typo if m["distance"] == 1} >= {"pienso"}
+    assert all(m["distance"] <= form_index.FUZZY_DISTANCE for m in typo)
+    assert index.fuzzy_lookup("zzzzzz") == []
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""llm_backend.py：后端必须实现 complete_with_usage，complete 由基类提供。"""
+
+import pytest
+
+from llm_backend import BaseBackend, DashScopeBackend, OpenAICompatibleBackend
+
+
+class EchoBackend(BaseBackend):
+    name = "echo"
+
+    def complete_with_usage(self, system_prompt, user_prompt, model, label=""):
+        return user_prompt, {"input_tokens": 1, "output_tokens": 1}
+
+
+def test_backend_must_implement_complete_with_usage():
+    class Incomplete(BaseBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        BaseBackend()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_complete_returns_reply_text():
+    backend = EchoBackend()
+    assert backend.complete("sys", "Verb: hablar", "qwen-plus") == "Verb: hablar"
+    assert backend.cache_namespace == "echo"
+
+
+def test_builtin_backends_are_concrete():
+    DashScopeBackend()
+    OpenAICompatibleBackend()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""llm_cache.py：不同后端 / 地址的回复互不命中。"""
+
+from llm_backend import DashScopeBackend, OpenAICompatibleBackend
+from llm_cache import ResponseCache, make_cache_key
+
+MOCK_URL = "http://127.0.0.1:8765/v1/chat/completions"
+
+
+def test_default_backend_key_unchanged():
+    assert DashScopeBackend().cache_namespace == ""
+    assert make_cache_key("qwen-plus", "sys", "user", "") == make_cache_key("qwen-plus", "sys", "user")
+
+
+def test_namespace_changes_key():
+    mock = OpenAICompatibleBackend(url=MOCK_URL).cache_namespace
+    real = OpenAICompatibleBackend().cache_namespace
+    keys = {make_cache_key("qwen-plus", "sys", "user", ns) for ns in ("", mock, real)}
+    assert len(keys) == 3
+
+
+def test_mock_replies_do_not_reach_default_backend(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    mock_cache = ResponseCache(path, namespace=OpenAICompatibleBackend(url=MOCK_URL).cache_namespace)
+    mock_cache.put("qwen-plus", "sys", "user", '{"mock": true}')
+    assert mock_cache.get("qwen-plus", "sys", "user") == '{"mock": true}'
+    mock_cache.close()
+
+    real_cache = ResponseCache(path, namespace=DashScopeBackend().cache_namespace)
+    assert real_cache.get("qwen-plus", "sys", "user") is None
+    real_cache.close()
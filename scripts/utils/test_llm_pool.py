@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""llm_pool.py 的限速器：请求层每次尝试（含 429 之后的重试）都要取令牌。"""
+
+import json
+import time
+
+import pytest
+
+import get_verb
+import llm_pool
+from llm_cache import ResponseCache
+from llm_retry import RetryPolicy, TransientLLMError
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1.0):
+        self.acquired += 1
+
+
+class ThrottledBackend:
+    """前 throttled 次请求返回 429，之后返回 reply。"""
+
+    def __init__(self, reply: dict, throttled: int):
+        self.reply = json.dumps(reply)
+        self.throttled = throttled
+        self.calls = 0
+
+    def complete_with_usage(self, system_prompt, user_prompt, model, label=""):
+        self.calls += 1
+        if self.calls <= self.throttled:
+            raise TransientLLMError("status_code=429, code=Throttling.RateQuota")
+        return self.reply, None
+
+
+def test_token_bucket_paces_requests():
+    bucket = llm_pool.TokenBucket(20)
+    started_at = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    # 第一个令牌是桶里现成的，后两个各等 1/20 秒
+    assert time.monotonic() - started_at >= 0.09
+
+
+def test_set_default_limiter(monkeypatch):
+    monkeypatch.setattr(llm_pool, "_default_limiter", llm_pool.get_default_limiter())
+    limiter = llm_pool.TokenBucket(5)
+    assert llm_pool.set_default_limiter(limiter) is limiter
+    assert llm_pool.get_default_limiter() is limiter
+
+
+@pytest.mark.parametrize("throttled", [0, 2])
+def test_retries_take_tokens(monkeypatch, throttled):
+    limiter = CountingLimiter()
+    backend = ThrottledBackend({"has_tr_use": True, "has_intr_use": True}, throttled)
+    monkeypatch.setattr(get_verb, "get_default_limiter", lambda: limiter)
+    monkeypatch.setattr(get_verb, "get_default_backend", lambda: backend)
+    monkeypatch.setattr(get_verb, "get_default_cache", lambda: ResponseCache(mode="off"))
+    monkeypatch.setattr(get_verb, "get_default_retry_policy", lambda: RetryPolicy(base_delay=0))
+
+    data = get_verb.call_qwen_for_verb("hablar", use_local_engine=True)
+
+    assert data["has_tr_use"] is True
+    assert backend.calls == throttled + 1
+    assert limiter.acquired == backend.calls
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""morph_check.py 与 get_verb.py --cross-check：只有词表条目的 paradigm 才能否决模型的回复。"""
+
+import copy
+import json
+
+import pytest
+
+import conjugator
+import get_verb
+import morph_check
+from llm_cache import ResponseCache
+from llm_retry import MalformedResponseError, RetryPolicy
+
+O_UE = {"name": "o_ue", "stem_change": "o_ue", "accent_shift": False, "zc": False, "vowel_stem": None}
+
+
+def reply_for(verb: str, paradigm: dict = None) -> dict:
+    data = conjugator.generate(verb, paradigm) if paradigm else conjugator.conjugate(verb)
+    data["has_tr_use"] = True
+    data["has_intr_use"] = False
+    return data
+
+
+def test_correct_unlisted_stem_changer_has_no_findings():
+    # rodar 不在词表里：引擎不给形式，正确的 ruedo 也不会被 regular 检查误报
+    assert morph_check.cross_check(reply_for("rodar", O_UE), "rodar") == []
+    assert not morph_check.engine_is_authoritative("rodar")
+
+
+def test_wrong_forms_for_listed_verb_are_flagged():
+    data = reply_for("pensar", morph_check.REGULAR_PARADIGM)
+    findings = morph_check.cross_check(data, "pensar")
+    assert any(f.startswith("indicative.present.first_singular:") for f in findings)
+    assert morph_check.engine_is_authoritative("pensar")
+
+
+def test_regular_flag_contradiction():
+    data = reply_for("hablar")
+    data["indicative"]["present"]["regular"] = False
+    assert morph_check.cross_check(data, "hablar") == [
+        "indicative.present.regular: false, but forms equal the regular paradigm"
+    ]
+
+
+class FakeBackend:
+    def __init__(self, reply: dict):
+        self.reply = json.dumps(reply, ensure_ascii=False)
+        self.calls = 0
+
+    def complete_with_usage(self, system_prompt, user_prompt, model, label=""):
+        self.calls += 1
+        return self.reply, None
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    def install(reply: dict) -> FakeBackend:
+        backend = FakeBackend(reply)
+        monkeypatch.setattr(get_verb, "get_default_backend", lambda: backend)
+        monkeypatch.setattr(get_verb, "get_default_cache", lambda: ResponseCache(mode="off"))
+        monkeypatch.setattr(get_verb, "get_default_retry_policy", lambda: RetryPolicy(max_reprompts=1, base_delay=0))
+        return backend
+
+    morph_check.set_default_findings_report(morph_check.FindingsReport())
+    yield install
+    morph_check.set_default_findings_report(morph_check.FindingsReport())
+
+
+def test_unlisted_verb_keeps_reply_and_reports(fake_llm):
+    reply = reply_for("hablar")
+    reply["indicative"]["present"]["regular"] = False
+    backend = fake_llm(copy.deepcopy(reply))
+
+    data = get_verb.call_qwen_for_verb("hablar", cross_check=True)
+
+    assert backend.calls == 2
+    assert data["indicative"]["present"]["first_singular"] == ["hablo"]
+    assert morph_check.get_default_findings_report().count == 1
+
+
+def test_listed_verb_with_wrong_forms_is_rejected(fake_llm):
+    backend = fake_llm(reply_for("pensar", morph_check.REGULAR_PARADIGM))
+
+    with pytest.raises(MalformedResponseError):
+        get_verb.call_qwen_for_verb("pensar", cross_check=True)
+    assert backend.calls == 2
+    assert morph_check.get_default_findings_report().count == 0
+
+
+def test_listed_verb_regular_flag_only_is_reported(fake_llm):
+    reply = reply_for("llevar")
+    reply["indicative"]["preterite"]["regular"] = False
+    fake_llm(reply)
+
+    data = get_verb.call_qwen_for_verb("llevar", cross_check=True)
+
+    assert data["indicative"]["preterite"]["regular"] is False
+    assert morph_check.get_default_findings_report().count == 1
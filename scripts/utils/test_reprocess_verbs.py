@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""reprocess_verbs.py：重跑幂等、--workers 输出逐字节相同、复合时态的改写单独报告。"""
+
+import json
+import os
+
+import pytest
+
+import reprocess_verbs
+
+VERBS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "src", "verbs.json")
+
+
+@pytest.fixture(scope="module")
+def sample_path(tmp_path_factory):
+    """verbs.json 的前 150 个动词（--workers 2 时分成 3 块），保证包含 ser。"""
+    with open(VERBS_JSON, "r", encoding="utf-8") as f:
+        verbs = json.load(f)
+    sample = verbs[:150]
+    if not any(verb.get("infinitive") == "ser" for verb in sample):
+        sample.append(next(verb for verb in verbs if verb.get("infinitive") == "ser"))
+    path = tmp_path_factory.mktemp("reprocess") / "verbs.json"
+    path.write_text(json.dumps(sample, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_second_run_is_a_no_op(sample_path, tmp_path):
+    first = str(tmp_path / "first.json")
+    second = str(tmp_path / "second.json")
+    reprocess_verbs.reprocess_file(sample_path, first)
+
+    result = reprocess_verbs.reprocess_file(first, second)
+
+    assert result["changed"] == {} and result["compound_rules"] == {}
+    assert result["reformatted"] == [] and result["failed"] == {}
+    assert _read(first) == _read(second)
+
+
+def test_workers_output_is_byte_identical(sample_path, tmp_path):
+    single = str(tmp_path / "single.json")
+    pooled = str(tmp_path / "pooled.json")
+
+    single_result = reprocess_verbs.reprocess_file(sample_path, single, workers=1)
+    pooled_result = reprocess_verbs.reprocess_file(sample_path, pooled, workers=2)
+
+    assert _read(single) == _read(pooled)
+    assert single_result == pooled_result
+
+
+def test_compound_rewrites_are_reported_separately(sample_path):
+    result = reprocess_verbs.reprocess_file(sample_path)
+
+    changes = result["compound_rules"]["ser"]
+    assert "ser" not in result["changed"]
+    assert ("compound_indicative.pluperfect.regular", False, True) in changes
+    assert all(path.startswith("compound_") for path, _, _ in changes)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""tag_pronoun_support.py：supports_* 不是布尔值的回复重新请求，不写缓存。"""
+
+import json
+
+import pytest
+
+import tag_pronoun_support
+from llm_cache import ResponseCache
+from llm_retry import MalformedResponseError, RetryPolicy
+
+GOOD = {"supports_do": True, "supports_io": False, "supports_do_io": False, "confidence": 0.9, "reason": "ok"}
+NULLS = {"supports_do": True, "supports_io": None, "supports_do_io": None, "confidence": 0.2, "reason": "?"}
+
+
+class ScriptedBackend:
+    """按顺序返回预先给定的回复。"""
+
+    def __init__(self, replies):
+        self.replies = [json.dumps(reply) for reply in replies]
+        self.calls = 0
+
+    def complete_with_usage(self, system_prompt, user_prompt, model, label=""):
+        reply = self.replies[min(self.calls, len(self.replies) - 1)]
+        self.calls += 1
+        return reply, None
+
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+
+    def install(*replies) -> ScriptedBackend:
+        backend = ScriptedBackend(replies)
+        monkeypatch.setattr(tag_pronoun_support, "get_default_backend", lambda: backend)
+        monkeypatch.setattr(tag_pronoun_support, "get_default_cache", lambda: cache)
+        monkeypatch.setattr(
+            tag_pronoun_support, "get_default_retry_policy", lambda: RetryPolicy(max_reprompts=1, base_delay=0)
+        )
+        return backend
+
+    yield install
+    cache.close()
+
+
+def test_support_result_errors():
+    assert tag_pronoun_support.support_result_errors(GOOD) == []
+    assert tag_pronoun_support.support_result_errors(NULLS) == [
+        "supports_io is not a bool: None",
+        "supports_do_io is not a bool: None",
+    ]
+    assert tag_pronoun_support.batch_support_errors(["ver", "dar"], {"ver": GOOD}) == ["dar: missing"]
+
+
+def test_null_reply_is_reprompted(llm):
+    backend = llm(NULLS, GOOD)
+    result = tag_pronoun_support.call_qwen_for_support({"infinitive": "ver", "has_tr_use": True})
+    assert backend.calls == 2
+    assert result["supports_io"] is False
+
+
+def test_invalid_reply_is_never_cached(llm):
+    verb = {"infinitive": "ver", "has_tr_use": True}
+    llm(NULLS)
+    with pytest.raises(MalformedResponseError):
+        tag_pronoun_support.call_qwen_for_support(verb)
+
+    # 下次运行不会拿到缓存的坏回复，而是重新请求
+    backend = llm(GOOD)
+    assert tag_pronoun_support.call_qwen_for_support(verb)["supports_do"] is True
+    assert backend.calls == 1
+
+    backend = llm(NULLS)
+    assert tag_pronoun_support.call_qwen_for_support(verb)["supports_do"] is True
+    assert backend.calls == 0
+
+
+def test_batch_reply_with_invalid_verb_is_reprompted(llm):
+    verbs = [{"infinitive": "ver"}, {"infinitive": "dar"}]
+    backend = llm({"ver": GOOD, "dar": NULLS}, {"ver": GOOD, "dar": GOOD})
+    results = tag_pronoun_support.call_qwen_for_support_batch(verbs)
+    assert backend.calls == 2
+    assert [result["supports_do"] for result in results] == [True, True]
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1.0):
+        self.acquired += 1
+
+
+def test_every_attempt_takes_a_token(llm, monkeypatch):
+    limiter = CountingLimiter()
+    monkeypatch.setattr(tag_pronoun_support, "get_default_limiter", lambda: limiter)
+    backend = llm(NULLS, GOOD)
+    tag_pronoun_support.call_qwen_for_support({"infinitive": "ver", "has_tr_use": True})
+    assert backend.calls == 2
+    assert limiter.acquired == 2
+
+    # 缓存命中不发请求，也不取令牌
+    tag_pronoun_support.call_qwen_for_support({"infinitive": "ver", "has_tr_use": True})
+    assert limiter.acquired == 2
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""verb_db_sink.py：get_verb.py 的输出 upsert 到已有动词上，不能冲掉 meaning / supports_*。"""
+
+import copy
+import json
+import os
+import sqlite3
+
+import pytest
+
+import verb_db_sink
+from get_verb import finalize_verb_data
+
+VERBS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "src", "verbs.json")
+
+# 与 server/database/db.js 的表结构相同
+SCHEMA = """
+CREATE TABLE verbs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  infinitive TEXT NOT NULL,
+  meaning TEXT NOT NULL,
+  conjugation_type INTEGER NOT NULL,
+  is_irregular INTEGER DEFAULT 0,
+  is_reflexive INTEGER DEFAULT 0,
+  has_tr_use INTEGER DEFAULT 0,
+  has_intr_use INTEGER DEFAULT 0,
+  supports_do INTEGER,
+  supports_io INTEGER,
+  supports_do_io INTEGER,
+  gerund TEXT,
+  participle TEXT,
+  participle_forms TEXT,
+  lesson_number INTEGER,
+  textbook_volume INTEGER DEFAULT 1,
+  frequency_level INTEGER DEFAULT 1,
+  created_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE TABLE conjugations (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  verb_id INTEGER NOT NULL,
+  tense TEXT NOT NULL,
+  mood TEXT NOT NULL,
+  person TEXT NOT NULL,
+  conjugated_form TEXT NOT NULL,
+  is_irregular INTEGER DEFAULT 0,
+  FOREIGN KEY (verb_id) REFERENCES verbs(id) ON DELETE CASCADE
+);
+"""
+
+GENERATOR_FIELDS = ("translation",) + verb_db_sink.SUPPORT_FIELDS
+
+
+@pytest.fixture
+def house_hablar():
+    with open(VERBS_JSON, "r", encoding="utf-8") as f:
+        return next(verb for verb in json.load(f) if verb["infinitive"] == "hablar")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "vocabulary.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+def _verb_row(db_path: str, infinitive: str) -> tuple:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT meaning, supports_do, supports_io, supports_do_io, has_tr_use, gerund FROM verbs WHERE infinitive = ?",
+            (infinitive,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def get_verb_record(house_verb: dict) -> dict:
+    """同一个动词经 get_verb.py 生成的样子：没有 translation / supports_*。"""
+    raw = {key: value for key, value in copy.deepcopy(house_verb).items() if key not in GENERATOR_FIELDS}
+    return finalize_verb_data(raw, house_verb["infinitive"])
+
+
+def test_generated_record_keeps_meaning_and_support_flags(db_path, house_hablar):
+    with verb_db_sink.VerbDbSink(db_path) as sink:
+        assert sink.upsert(house_hablar) == "inserted"
+    before = _verb_row(db_path, "hablar")
+    assert before[:4] == ("说话，讲话；交谈，聊天；发言，演讲", 0, 1, 0)
+
+    generated = get_verb_record(house_hablar)
+    generated["has_tr_use"] = False
+    with verb_db_sink.VerbDbSink(db_path) as sink:
+        assert sink.upsert(generated) == "updated"
+
+    after = _verb_row(db_path, "hablar")
+    assert after[:4] == before[:4]
+    assert after[4] == 0
+
+
+def test_generated_record_over_identical_row_is_unchanged(db_path, house_hablar):
+    with verb_db_sink.VerbDbSink(db_path) as sink:
+        sink.upsert(house_hablar)
+    with verb_db_sink.VerbDbSink(db_path) as sink:
+        assert sink.upsert(get_verb_record(house_hablar)) == "unchanged"
+
+
+def test_new_generated_record_uses_defaults(db_path, house_hablar):
+    with verb_db_sink.VerbDbSink(db_path) as sink:
+        sink.upsert(get_verb_record(house_hablar))
+    assert _verb_row(db_path, "hablar") == ("hablar", None, None, None, 1, "hablando")
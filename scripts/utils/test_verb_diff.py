@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""verb_diff.py：哈希只看生成的字段，反身动词两种写法对齐，--delta 只写新增和变化的记录。"""
+
+import copy
+import json
+import os
+
+import pytest
+
+import compound_tenses
+import get_verb
+import verb_diff
+
+VERBS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "src", "verbs.json")
+
+
+@pytest.fixture(scope="module")
+def house():
+    """服务端 verbs.json 里的几条记录（带 translation / supports_*，反身动词写成 llamar + is_reflexive）。"""
+    with open(VERBS_JSON, "r", encoding="utf-8") as f:
+        verbs = {verb["infinitive"]: verb for verb in json.load(f)}
+    assert verbs["llamar"]["is_reflexive"] is True
+    return {name: verbs[name] for name in ("hablar", "llamar", "comer", "vivir")}
+
+
+def generated(house_verb: dict) -> dict:
+    """同一个动词经 get_verb.py 生成的样子：没有 translation / supports_*，反身动词写成 llamarse。"""
+    raw = {
+        key: value for key, value in copy.deepcopy(house_verb).items()
+        if key in verb_diff.GENERATED_KEYS and key not in compound_tenses.COMPOUND_MOODS
+    }
+    raw_verb = house_verb["infinitive"] + ("(se)" if house_verb.get("is_reflexive") else "")
+    return get_verb.finalize_verb_data(raw, raw_verb)
+
+
+def _write(path, verbs):
+    path.write_text(json.dumps(verbs, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_generated_keys_match_get_verb():
+    assert list(verb_diff.GENERATED_KEYS) == get_verb.TOP_LEVEL_KEY_ORDER
+
+
+def test_hash_ignores_curated_fields_and_reflexive_spelling(house):
+    for name in ("hablar", "llamar"):
+        record = generated(house[name])
+        assert verb_diff.content_hash(house[name]) == verb_diff.content_hash(record)
+        assert verb_diff.diff_verbs(house[name], record) == []
+    assert generated(house["llamar"])["infinitive"] == "llamarse"
+
+
+def test_hash_covers_generated_content(house):
+    record = generated(house["hablar"])
+    derived = compound_tenses.strip_compound_tenses(copy.deepcopy(record))
+    assert verb_diff.content_hash(derived) == verb_diff.content_hash(record)
+
+    record["indicative"]["present"]["first_singular"] = ["hablé"]
+    assert verb_diff.content_hash(record) != verb_diff.content_hash(house["hablar"])
+    assert verb_diff.diff_verbs(house["hablar"], record) == [
+        ("indicative.present.first_singular", ["hablo"], ["hablé"])
+    ]
+
+
+def test_diff_files_and_delta(house, tmp_path):
+    old_path = _write(tmp_path / "old.json", [house["hablar"], house["llamar"], house["comer"]])
+    llamarse = generated(house["llamar"])
+    llamarse["gerund"] = "llamándose"
+    new_path = _write(tmp_path / "new.json", [generated(house["hablar"]), llamarse, generated(house["vivir"])])
+    delta_path = str(tmp_path / "delta.json")
+
+    result = verb_diff.diff_files(old_path, new_path, delta_path)
+
+    assert result["added"] == ["vivir"]
+    assert result["removed"] == ["comer"]
+    assert result["unchanged"] == 1
+    assert result["changed"] == {"llamarse": [("gerund", "llamando", "llamándose")]}
+    with open(delta_path, "r", encoding="utf-8") as f:
+        delta = json.load(f)
+    # 变化的记录沿用旧文件里的 infinitive，verb_db_sink 才能对上已有的行
+    assert [verb["infinitive"] for verb in delta] == ["llamar", "vivir"]
+    assert delta[0]["gerund"] == "llamándose"
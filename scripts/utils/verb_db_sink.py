@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+把 verbs.json 形状的动词直接 upsert 进服务端词库（server/data/vocabulary.db 的 verbs / conjugations 表），
+不用再复制到 server/src/verbs.json 后清空词库全量重导。
+
+- 字段映射与 server/database/initData.js 的 importFromVerbsJson 相同（中文时态名、人称、多形式用 " | " 合并）
+- 按 infinitive 匹配已有动词：
+  - 新动词：插入 verbs 行和全部变位行（frequency_level / textbook_volume 与初始化时的规则一致）
+  - 已有动词：只 UPDATE 内容有变化的 verbs 列和变位行，变位按 (mood, tense, person) 对齐，
+    不变的行一条都不写，已有行的 id 保持不变；lesson_number / frequency_level 等由后台维护的列不动
+  - 记录里没有来源字段的列不比较也不写：get_verb.py 的输出没有 translation / supports_*，
+    upsert 已有动词时 meaning 和 supports_* 保留词库里的值；新动词按 initData.js 的默认值补齐
+- 复用预编译的语句，每 --batch-size 个动词提交一次事务
+- 没有复合时态的动词（compound_tenses.py strip 过）按 participle 展开后再写
+
+用法：
+    python3 scripts/utils/verb_db_sink.py scripts/output/verbs.json
+    python3 scripts/utils/verb_db_sink.py scripts/output/verbs.json --db server/data/vocabulary.db --dry-run
+    python3 scripts/utils/get_verb.py in.txt out.json --db server/data/vocabulary.db
+"""
+
+import argparse
+import os
+import sqlite3
+
+import compound_tenses
+from json_stream import iter_json_array
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "data", "vocabulary.db"
+)
+DEFAULT_BATCH_SIZE = 200
+
+# 以下映射与 server/database/initData.js 保持一致
+# (verbs.json 的语气, 变位表里的 mood, 时态映射 verbs.json tense -> 变位表 tense)
+MOOD_MAPPINGS = [
+    ("indicative", "陈述式", {
+        "present": "现在时",
+        "imperfect": "未完成过去时",
+        "preterite": "简单过去时",
+        "future": "将来时",
+        "conditional": "条件式",
+    }),
+    ("subjunctive", "虚拟式", {
+        "present": "虚拟现在时",
+        "imperfect": "虚拟过去时",
+        "future": "虚拟将来未完成时",
+    }),
+    ("imperative", "命令式", {
+        "affirmative": "肯定命令式",
+        "negative": "否定命令式",
+    }),
+    ("compound_indicative", "复合陈述式", {
+        "preterite_perfect": "现在完成时",
+        "pluperfect": "过去完成时",
+        "future_perfect": "将来完成时",
+        "conditional_perfect": "条件完成时",
+        "preterite_anterior": "前过去时",
+    }),
+    ("compound_subjunctive", "复合虚拟式", {
+        "preterite_perfect": "虚拟现在完成时",
+        "pluperfect": "虚拟过去完成时",
+        "future_perfect": "虚拟将来完成时",
+    }),
+]
+
+PERSON_MAPPING = {
+    "first_singular": "yo",
+    "second_singular": "tú",
+    "second_singular_vos_form": "vos",
+    "third_singular": "él/ella/usted",
+    "first_plural": "nosotros",
+    "second_plural": "vosotros",
+    "third_plural": "ellos/ellas/ustedes",
+}
+
+HIGH_FREQUENCY_VERBS = {
+    "ser", "estar", "tener", "hacer", "poder", "decir", "ir", "ver", "dar", "saber",
+    "querer", "llegar", "pasar", "deber", "poner", "hablar", "conocer", "vivir", "trabajar", "estudiar",
+}
+
+# 由本脚本维护的 verbs 列（按此顺序比较 / 更新）
+VERB_COLUMNS = (
+    "meaning", "conjugation_type", "is_irregular", "is_reflexive",
+    "has_tr_use", "has_intr_use", "supports_do", "supports_io", "supports_do_io",
+    "gerund", "participle", "participle_forms",
+)
+
+SUPPORT_FIELDS = ("supports_do", "supports_io", "supports_do_io")
+
+
+def to_boolean_int(value, fallback=0):
+    """同 initData.js 的 toBooleanInt。"""
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, (int, float)):
+        return 0 if value == 0 else 1
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("true", "1", "yes", "y"):
+            return 1
+        if normalized in ("false", "0", "no", "n"):
+            return 0
+    return fallback
+
+
+def default_verb_row(infinitive: str) -> dict:
+    """新动词缺少来源字段时各列的取值（同 initData.js：meaning 退回 infinitive，supports_* 为 NULL）。"""
+    row = dict.fromkeys(VERB_COLUMNS)
+    row.update(meaning=infinitive, conjugation_type=1, is_irregular=0, is_reflexive=0, has_tr_use=0, has_intr_use=0)
+    return row
+
+
+def build_verb_row(verb: dict) -> dict:
+    """
+    verbs.json 的一个动词 -> verbs 表的列值（VERB_COLUMNS 的子集）。
+    只包含记录里有来源字段的列，例如没有 translation 就没有 meaning。
+    """
+    infinitive = verb["infinitive"]
+    row = {}
+
+    translation = verb.get("translation")
+    if isinstance(translation, list) and translation:
+        row["meaning"] = "；".join(str(item).replace(",", "，") for item in translation)
+
+    base_infinitive = infinitive[:-2] if infinitive.endswith("se") else infinitive
+    conjugation_type = 1
+    if base_infinitive.endswith("er"):
+        conjugation_type = 2
+    elif base_infinitive.endswith("ir"):
+        conjugation_type = 3
+
+    row["conjugation_type"] = conjugation_type
+
+    indicative = verb.get("indicative")
+    if isinstance(indicative, dict):
+        row["is_irregular"] = int(any(
+            isinstance(tense, dict) and tense.get("regular") is False for tense in indicative.values()
+        ))
+
+    if "is_reflexive" in verb:
+        row["is_reflexive"] = 1 if verb["is_reflexive"] else 0
+    for field in ("has_tr_use", "has_intr_use"):
+        if field in verb:
+            row[field] = to_boolean_int(verb[field], 0)
+    for field in SUPPORT_FIELDS:
+        if field in verb:
+            row[field] = to_boolean_int(verb[field], None)
+    if "gerund" in verb:
+        row["gerund"] = verb["gerund"] or None
+
+    if "participle" in verb:
+        participle = None
+        participle_forms = None
+        raw_participle = verb["participle"]
+        if isinstance(raw_participle, list):
+            valid = [p for p in raw_participle if p]
+            if valid:
+                participle = valid[0]
+                participle_forms = " | ".join(valid)
+        elif raw_participle:
+            participle = participle_forms = raw_participle
+        row["participle"] = participle
+        row["participle_forms"] = participle_forms
+
+    return row
+
+
+def build_conjugation_rows(verb: dict) -> dict:
+    """verbs.json 的一个动词 -> {(mood, tense, person): (conjugated_form, is_irregular)}。"""
+    if not any(verb.get(mood) for mood in compound_tenses.COMPOUND_MOODS):
+        verb = compound_tenses.expand_compound_tenses(dict(verb))
+
+    rows = {}
+    for mood_key, mood_name, tense_mapping in MOOD_MAPPINGS:
+        mood_obj = verb.get(mood_key)
+        if not isinstance(mood_obj, dict):
+            continue
+        for tense_key, tense_data in mood_obj.items():
+            tense_name = tense_mapping.get(tense_key)
+            if tense_name is None or not isinstance(tense_data, dict):
+                continue
+            is_irregular = 1 if tense_data.get("regular") is False else 0
+            for person_key, person_name in PERSON_MAPPING.items():
+                forms = tense_data.get(person_key)
+                if not isinstance(forms, list):
+                    continue
+                valid = [form for form in forms if form]
+                if valid:
+                    rows[(mood_name, tense_name, person_name)] = (" | ".join(valid), is_irregular)
+    return rows
+
+
+class VerbDbSink:
+    """
+    用法：
+        with VerbDbSink(db_path) as sink:
+            for verb in verbs:
+                sink.upsert(verb)
+        print(sink.stats)
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Vocabulary database not found (start the server once to create it): {db_path}")
+        self.batch_size = max(1, int(batch_size))
+        self.dry_run = dry_run
+        self.stats = {
+            "verbs_inserted": 0,
+            "verbs_updated": 0,
+            "verbs_unchanged": 0,
+            "conjugations_inserted": 0,
+            "conjugations_updated": 0,
+            "conjugations_deleted": 0,
+        }
+        self._pending = 0
+        # 手动控制事务，每 batch_size 个动词提交一次
+        self._conn = sqlite3.connect(db_path, isolation_level=None)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        for table in ("verbs", "conjugations"):
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            if not exists:
+                raise RuntimeError(f"Table '{table}' is missing in {db_path}; start the server once to create the schema.")
+        # 与 server/database/db.js 相同的索引，按 verb_id 查变位不用全表扫描
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_conjugations_verb ON conjugations(verb_id)")
+        self._verb_ids = {}
+        for verb_id, infinitive in self._conn.execute("SELECT id, infinitive FROM verbs ORDER BY id"):
+            self._verb_ids.setdefault(infinitive, verb_id)
+        self._conn.execute("BEGIN")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._conn is not None:
+            # 之前的批次已提交，只丢弃当前批次
+            self._conn.execute("ROLLBACK")
+            self._conn.close()
+            self._conn = None
+
+    def _commit_batch(self):
+        self._pending = 0
+        if self.dry_run:
+            # dry run 全程一个事务，结束时回滚
+            return
+        self._conn.execute("COMMIT")
+        self._conn.execute("BEGIN")
+
+    def upsert(self, verb: dict) -> str:
+        """写入一个动词，返回 inserted / updated / unchanged。"""
+        infinitive = str(verb.get("infinitive", "")).strip()
+        if not infinitive:
+            raise ValueError("Verb without infinitive.")
+        verb = dict(verb, infinitive=infinitive)
+        verb_row = build_verb_row(verb)
+        conjugation_rows = build_conjugation_rows(verb)
+
+        verb_id = self._verb_ids.get(infinitive)
+        if verb_id is None:
+            status = self._insert_verb(infinitive, verb_row, conjugation_rows)
+        else:
+            status = self._update_verb(verb_id, verb_row, conjugation_rows)
+        self.stats[f"verbs_{status}"] += 1
+
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._commit_batch()
+        return status
+
+    def _insert_verb(self, infinitive: str, verb_row: dict, conjugation_rows: dict) -> str:
+        verb_row = {**default_verb_row(infinitive), **verb_row}
+        columns = ("infinitive",) + VERB_COLUMNS + ("frequency_level", "textbook_volume")
+        values = (
+            (infinitive,)
+            + tuple(verb_row[column] for column in VERB_COLUMNS)
+            + (1 if infinitive in HIGH_FREQUENCY_VERBS else 2, 1)
+        )
+        cursor = self._conn.execute(
+            f"INSERT INTO verbs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            values,
+        )
+        verb_id = cursor.lastrowid
+        self._verb_ids[infinitive] = verb_id
+        self._conn.executemany(
+            "INSERT INTO conjugations (verb_id, tense, mood, person, conjugated_form, is_irregular) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (verb_id, tense, mood, person, form, is_irregular)
+                for (mood, tense, person), (form, is_irregular) in conjugation_rows.items()
+            ],
+        )
+        self.stats["conjugations_inserted"] += len(conjugation_rows)
+        return "inserted"
+
+    def _update_verb(self, verb_id: int, verb_row: dict, conjugation_rows: dict) -> str:
+        changed = False
+
+        # 记录里没有的列（例如 get_verb.py 输出里没有的 meaning / supports_*）保持词库里的值
+        columns = [column for column in VERB_COLUMNS if column in verb_row]
+        current = self._conn.execute(
+            f"SELECT {', '.join(columns)} FROM verbs WHERE id = ?", (verb_id,)
+        ).fetchone()
+        changed_columns = [
+            column for column, value in zip(columns, current) if verb_row[column] != value
+        ]
+        if changed_columns:
+            self._conn.execute(
+                f"UPDATE verbs SET {', '.join(f'{column} = ?' for column in changed_columns)} WHERE id = ?",
+                [verb_row[column] for column in changed_columns] + [verb_id],
+            )
+            changed = True
+
+        existing = {}
+        duplicates = []
+        for row_id, mood, tense, person, form, is_irregular in self._conn.execute(
+            "SELECT id, mood, tense, person, conjugated_form, is_irregular "
+            "FROM conjugations WHERE verb_id = ? ORDER BY id",
+            (verb_id,),
+        ):
+            key = (mood, tense, person)
+            if key in existing:
+                duplicates.append(row_id)
+            else:
+                existing[key] = (row_id, (form, is_irregular))
+
+        updates = []
+        inserts = []
+        for key, content in conjugation_rows.items():
+            current_row = existing.pop(key, None)
+            if current_row is None:
+                inserts.append((verb_id, key[1], key[0], key[2]) + content)
+            elif current_row[1] != content:
+                updates.append(content + (current_row[0],))
+        deletes = [(row_id,) for row_id, _ in existing.values()] + [(row_id,) for row_id in duplicates]
+
+        if updates:
+            self._conn.executemany(
+                "UPDATE conjugations SET conjugated_form = ?, is_irregular = ? WHERE id = ?", updates
+            )
+        if inserts:
+            self._conn.executemany(
+                "INSERT INTO conjugations (verb_id, tense, mood, person, conjugated_form, is_irregular) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                inserts,
+            )
+        if deletes:
+            self._conn.executemany("DELETE FROM conjugations WHERE id = ?", deletes)
+
+        self.stats["conjugations_updated"] += len(updates)
+        self.stats["conjugations_inserted"] += len(inserts)
+        self.stats["conjugations_deleted"] += len(deletes)
+        if updates or inserts or deletes:
+            changed = True
+        return "updated" if changed else "unchanged"
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.execute("ROLLBACK" if self.dry_run else "COMMIT")
+        self._conn.close()
+        self._conn = None
+
+
+def upsert_json_file(json_path: str, db_path: str = DEFAULT_DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                     dry_run: bool = False) -> dict:
+    """流式读取 verbs.json 形状的文件并 upsert，返回统计。"""
+    with open(json_path, "r", encoding="utf-8") as f, VerbDbSink(db_path, batch_size, dry_run) as sink:
+        for verb in iter_json_array(f):
+            sink.upsert(verb)
+    return sink.stats
+
+
+def format_stats(stats: dict) -> str:
+    return (
+        f"verbs: {stats['verbs_inserted']} inserted, {stats['verbs_updated']} updated, "
+        f"{stats['verbs_unchanged']} unchanged; conjugations: {stats['conjugations_inserted']} inserted, "
+        f"{stats['conjugations_updated']} updated, {stats['conjugations_deleted']} deleted"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 verbs.json 形状的文件增量写入服务端词库。")
+    parser.add_argument("json_path", help="verbs.json 形状的输入文件")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="词库 SQLite 路径（默认 server/data/vocabulary.db）")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"每个事务包含的动词数（默认 {DEFAULT_BATCH_SIZE}）",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="只统计会改哪些行，不提交")
+    args = parser.parse_args()
+
+    stats = upsert_json_file(args.json_path, args.db, args.batch_size, args.dry_run)
+    print(("[dry run] " if args.dry_run else "") + format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
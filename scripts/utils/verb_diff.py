@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+动词记录的内容哈希 + 两份 verbs.json 之间的增量对比。
+
+内容哈希（content_hash 字段，get_verb.py 写出时自动带上）：
+- sha256(规范化 JSON)[:16]，规范化 = 只取 get_verb.py 生成的字段（GENERATED_KEYS）、key 排序、紧凑分隔符；
+  translation / supports_* 等其他工具维护的字段不参与，生成结果和人工补全过的 verbs.json 可以直接比较
+- 反身动词的 infinitive 统一成 llamarse 的写法（服务端 verbs.json 里也有 llamar + is_reflexive=true）
+- 可推导的复合时态先展开（compound_tenses.py），所以完整输出和 --derived-compound 输出的哈希相同
+- 与字段顺序、缩进无关；任何一个变位形式或标记变了，哈希就变
+
+对比（流式读两个文件，内存只保留 infinitive -> 哈希 和有变化的记录）：
+    python3 scripts/utils/verb_diff.py server/src/verbs.json scripts/output/verbs.json
+    python3 scripts/utils/verb_diff.py old.json new.json --delta /tmp/delta.json --report /tmp/diff.json
+- 按 (非反身不定式, is_reflexive) 对齐，报告新增 / 删除 / 变化的动词，变化细到 语气.时态.人称
+- --delta：只写出新增和变化的记录（verbs.json 形状，新文件里的版本），可直接交给 verb_db_sink.py 或人工审阅；
+  变化的记录沿用旧文件里 infinitive 的写法，verb_db_sink.py 按它对上已有的行
+- --report：机器可读的 JSON 报告
+- 有差异时退出码为 1，方便在脚本里判断
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+
+import compound_tenses
+from json_stream import JsonArrayWriter, iter_json_array
+from morph_check import base_infinitive
+
+HASH_FIELD = "content_hash"
+HASH_LENGTH = 16
+
+# get_verb.py 生成的字段（与 get_verb.TOP_LEVEL_KEY_ORDER 一致），哈希和对比只看这些
+GENERATED_KEYS = (
+    "infinitive",
+    "gerund",
+    "participle",
+    "is_reflexive",
+    "has_tr_use",
+    "has_intr_use",
+    "indicative",
+    "subjunctive",
+    "imperative",
+    "compound_indicative",
+    "compound_subjunctive",
+)
+
+
+def verb_identity(verb: dict) -> tuple:
+    """(非反身不定式, 是否反身)：llamarse 与 llamar + is_reflexive=true 是同一个动词。"""
+    return base_infinitive(verb), bool(verb.get("is_reflexive"))
+
+
+def _canonical(verb: dict) -> dict:
+    canonical = {key: verb[key] for key in GENERATED_KEYS if key in verb}
+    if "infinitive" in canonical:
+        base_verb, is_reflexive = verb_identity(verb)
+        canonical["infinitive"] = base_verb + "se" if is_reflexive else base_verb
+    if not any(key in canonical for key in compound_tenses.COMPOUND_MOODS):
+        canonical = compound_tenses.expand_compound_tenses(canonical)
+    return canonical
+
+
+def content_hash(verb: dict) -> str:
+    payload = json.dumps(_canonical(verb), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+def stamp_content_hash(verb: dict) -> dict:
+    """写入（或覆盖）content_hash，放在最后一个字段。"""
+    verb.pop(HASH_FIELD, None)
+    verb[HASH_FIELD] = content_hash(verb)
+    return verb
+
+
+def refresh_content_hash(verb: dict) -> dict:
+    """记录已带 content_hash 时按当前内容重算（改过字段之后调用）；没带则不加。"""
+    if HASH_FIELD in verb:
+        verb[HASH_FIELD] = content_hash(verb)
+    return verb
+
+
+def diff_verbs(old: dict, new: dict) -> list:
+    """
+    两个同名动词的逐项差异：[(path, old_value, new_value)]。
+    path 形如 "indicative.present.first_singular" / "participle"；缺失的一侧记为 None。
+    """
+    changes = []
+
+    def walk(path, a, b):
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key in list(a) + [k for k in b if k not in a]:
+                walk(f"{path}.{key}" if path else key, a.get(key), b.get(key))
+        elif a != b:
+            changes.append((path, a, b))
+
+    walk("", _canonical(old), _canonical(new))
+    return changes
+
+
+def _name(verb: dict) -> str:
+    return str(verb.get("infinitive", "")).strip()
+
+
+def _iter_file(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for verb in iter_json_array(f):
+            if isinstance(verb, dict):
+                yield verb
+
+
+def diff_files(old_path: str, new_path: str, delta_path: str = None) -> dict:
+    """
+    对比两个 verbs.json 形状的文件，返回
+    {"added": [...], "removed": [...], "changed": {infinitive: [(path, old, new), ...]}, "unchanged": n}。
+    动词按 verb_identity 对齐；added / changed 用新文件里的 infinitive，removed 用旧文件里的。
+    delta_path 给出时，把新增和变化的记录（新文件里的版本）写到该文件。
+    """
+    # identity -> (旧文件里的 infinitive, 哈希)
+    old_hashes = {verb_identity(verb): (_name(verb), content_hash(verb)) for verb in _iter_file(old_path)}
+
+    added = []
+    changed_records = {}
+    seen = set()
+    unchanged = 0
+    delta_file = open(delta_path, "w", encoding="utf-8") if delta_path else None
+    try:
+        writer = JsonArrayWriter(delta_file) if delta_file else None
+        for verb in _iter_file(new_path):
+            identity = verb_identity(verb)
+            seen.add(identity)
+            old_name, old_hash = old_hashes.get(identity, (None, None))
+            if old_hash == content_hash(verb):
+                unchanged += 1
+                continue
+            if old_hash is None:
+                added.append(_name(verb))
+            else:
+                changed_records[identity] = verb
+                if old_name != _name(verb):
+                    verb = dict(verb, infinitive=old_name)
+            if writer is not None:
+                writer.write(verb)
+        if writer is not None:
+            writer.close()
+            delta_file.write("\n")
+    finally:
+        if delta_file is not None:
+            delta_file.close()
+
+    removed = [name for identity, (name, _) in old_hashes.items() if identity not in seen]
+
+    # 第二遍只取出有变化的旧记录做细粒度对比（按新文件里的顺序输出）
+    changed = {}
+    if changed_records:
+        old_records = {}
+        for verb in _iter_file(old_path):
+            identity = verb_identity(verb)
+            if identity in changed_records:
+                old_records.setdefault(identity, verb)
+        for identity, new_verb in changed_records.items():
+            changed[_name(new_verb)] = diff_verbs(old_records[identity], new_verb)
+
+    return {"added": added, "removed": removed, "changed": changed, "unchanged": unchanged}
+
+
+def _short(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def format_report(result: dict) -> str:
+    lines = [
+        f"added {len(result['added'])}, removed {len(result['removed'])}, "
+        f"changed {len(result['changed'])}, unchanged {result['unchanged']}"
+    ]
+    for infinitive in result["added"]:
+        lines.append(f"+ {infinitive}")
+    for infinitive in result["removed"]:
+        lines.append(f"- {infinitive}")
+    for infinitive, changes in result["changed"].items():
+        lines.append(f"~ {infinitive}")
+        for path, old, new in changes:
+            lines.append(f"    {path}: {_short(old)} -> {_short(new)}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比两份 verbs.json，报告并导出有变化的动词。")
+    parser.add_argument("old_path", help="已有的 verbs.json")
+    parser.add_argument("new_path", help="新一轮生成的结果")
+    parser.add_argument("--delta", metavar="PATH", help="只写出新增和变化的记录")
+    parser.add_argument("--report", metavar="PATH", help="把报告写成 JSON")
+    args = parser.parse_args()
+
+    result = diff_files(args.old_path, args.new_path, args.delta)
+    print(format_report(result))
+    if args.report:
+        report = dict(result)
+        report["changed"] = {
+            infinitive: [{"path": path, "old": old, "new": new} for path, old, new in changes]
+            for infinitive, changes in result["changed"].items()
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    if args.delta:
+        print(f"Wrote {len(result['added']) + len(result['changed'])} records to {args.delta}")
+    sys.exit(1 if result["added"] or result["removed"] or result["changed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
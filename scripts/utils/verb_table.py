@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+verbs.json 的紧凑扁平表导出（SQLite 单文件），供服务端启动时直接批量导入，不用 JSON.parse 整个嵌套文档。
+
+表结构（format_version = 1）：
+- meta(key, value)：格式版本、动词数、变位形式数
+- verbs(id, infinitive, gerund, participle, is_reflexive, has_tr_use, has_intr_use,
+        supports_do, supports_io, supports_do_io, translation, extra)
+    participle / translation 是 JSON 数组文本；其余未知顶层字段放进 extra（JSON 对象文本）
+- tenses(id, mood, tense)：(语气, 时态) 去重，每种只存一次
+- slots(id, tense_id, person)：(时态, 人称) 去重，人称 key 只存一次
+- verb_tenses(verb_id, tense_id, regular)：每个动词每个时态的 regular 标记
+- forms(verb_id, slot_id, ord, form)：一行一个变位形式；同一槽位多个形式按 ord 排序；
+    空列表（如 imperative 的 first_singular）记一行 form = NULL，只表示槽位存在
+
+重复出现的语气 / 时态 / 人称名都换成整数 id，变位形式本身是扁平行，
+服务端可以 ATTACH 后用一条 SELECT 按 (verb_id, slot_id, ord) 顺序读完。
+
+用法：
+    python3 scripts/utils/verb_table.py server/src/verbs.json server/src/verbs.table.sqlite
+    python3 scripts/utils/get_verb.py in.txt out.json --table-out out.table.sqlite
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+
+from json_stream import iter_json_array
+
+FORMAT_VERSION = 1
+
+# verbs 表里单独成列的顶层字段；其余字段进 extra
+BOOL_FIELDS = ("is_reflexive", "has_tr_use", "has_intr_use", "supports_do", "supports_io", "supports_do_io")
+SCALAR_FIELDS = ("infinitive", "gerund")
+LIST_FIELDS = ("participle", "translation")
+MOOD_FIELDS = ("indicative", "subjunctive", "imperative", "compound_indicative", "compound_subjunctive")
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE verbs (
+    id INTEGER PRIMARY KEY,
+    infinitive TEXT NOT NULL,
+    gerund TEXT,
+    participle TEXT,
+    is_reflexive INTEGER,
+    has_tr_use INTEGER,
+    has_intr_use INTEGER,
+    supports_do INTEGER,
+    supports_io INTEGER,
+    supports_do_io INTEGER,
+    translation TEXT,
+    extra TEXT
+);
+CREATE TABLE tenses (
+    id INTEGER PRIMARY KEY,
+    mood TEXT NOT NULL,
+    tense TEXT NOT NULL,
+    UNIQUE (mood, tense)
+);
+CREATE TABLE slots (
+    id INTEGER PRIMARY KEY,
+    tense_id INTEGER NOT NULL REFERENCES tenses(id),
+    person TEXT NOT NULL,
+    UNIQUE (tense_id, person)
+);
+CREATE TABLE verb_tenses (
+    verb_id INTEGER NOT NULL REFERENCES verbs(id),
+    tense_id INTEGER NOT NULL REFERENCES tenses(id),
+    regular INTEGER,
+    PRIMARY KEY (verb_id, tense_id)
+) WITHOUT ROWID;
+CREATE TABLE forms (
+    verb_id INTEGER NOT NULL REFERENCES verbs(id),
+    slot_id INTEGER NOT NULL REFERENCES slots(id),
+    ord INTEGER NOT NULL,
+    form TEXT,
+    PRIMARY KEY (verb_id, slot_id, ord)
+) WITHOUT ROWID;
+"""
+
+
+def _to_int_bool(value):
+    if value is None:
+        return None
+    return 1 if value else 0
+
+
+def _from_int_bool(value):
+    return None if value is None else bool(value)
+
+
+def _dumps_or_none(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+class VerbTableWriter:
+    """
+    逐个写入动词，内存只保留去重用的 tense / slot id 映射。
+    写到 <path>.tmp，close() 时提交并替换目标文件；异常退出时丢弃临时文件。
+
+    用法：
+        with VerbTableWriter(path) as table:
+            for verb in verbs:
+                table.write(verb)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._temp_path = path + ".tmp"
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self._temp_path)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript(SCHEMA)
+        self._tense_ids = {}
+        self._slot_ids = {}
+        self.verb_count = 0
+        self.form_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _tense_id(self, mood: str, tense: str) -> int:
+        key = (mood, tense)
+        tense_id = self._tense_ids.get(key)
+        if tense_id is None:
+            tense_id = len(self._tense_ids) + 1
+            self._tense_ids[key] = tense_id
+            self._conn.execute("INSERT INTO tenses (id, mood, tense) VALUES (?, ?, ?)", (tense_id, mood, tense))
+        return tense_id
+
+    def _slot_id(self, tense_id: int, person: str) -> int:
+        key = (tense_id, person)
+        slot_id = self._slot_ids.get(key)
+        if slot_id is None:
+            slot_id = len(self._slot_ids) + 1
+            self._slot_ids[key] = slot_id
+            self._conn.execute("INSERT INTO slots (id, tense_id, person) VALUES (?, ?, ?)", (slot_id, tense_id, person))
+        return slot_id
+
+    def write(self, verb: dict) -> None:
+        if not isinstance(verb, dict):
+            raise ValueError("Each verb must be a JSON object.")
+        verb_id = self.verb_count + 1
+        extra = {
+            key: value for key, value in verb.items()
+            if key not in SCALAR_FIELDS and key not in BOOL_FIELDS
+            and key not in LIST_FIELDS and key not in MOOD_FIELDS
+        }
+        self._conn.execute(
+            "INSERT INTO verbs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                verb_id,
+                str(verb.get("infinitive", "")),
+                verb.get("gerund"),
+                _dumps_or_none(verb.get("participle")),
+                *(_to_int_bool(verb.get(key)) for key in BOOL_FIELDS),
+                _dumps_or_none(verb.get("translation")),
+                _dumps_or_none(extra) if extra else None,
+            ),
+        )
+
+        tense_rows = []
+        form_rows = []
+        form_count = 0
+        for mood in MOOD_FIELDS:
+            mood_obj = verb.get(mood)
+            if not isinstance(mood_obj, dict):
+                continue
+            for tense, tense_obj in mood_obj.items():
+                if not isinstance(tense_obj, dict):
+                    continue
+                tense_id = self._tense_id(mood, tense)
+                tense_rows.append((verb_id, tense_id, _to_int_bool(tense_obj.get("regular"))))
+                for person, forms in tense_obj.items():
+                    if person == "regular" or not isinstance(forms, list):
+                        continue
+                    slot_id = self._slot_id(tense_id, person)
+                    if not forms:
+                        form_rows.append((verb_id, slot_id, 0, None))
+                        continue
+                    for ord_, form in enumerate(forms):
+                        form_rows.append((verb_id, slot_id, ord_, form))
+                        form_count += 1
+
+        self._conn.executemany("INSERT INTO verb_tenses VALUES (?, ?, ?)", tense_rows)
+        self._conn.executemany("INSERT INTO forms VALUES (?, ?, ?, ?)", form_rows)
+        self.verb_count += 1
+        self.form_count += form_count
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("format_version", str(FORMAT_VERSION)),
+                ("verb_count", str(self.verb_count)),
+                ("form_count", str(self.form_count)),
+            ],
+        )
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        os.replace(self._temp_path, self.path)
+
+    def abort(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.close()
+        self._conn = None
+        os.remove(self._temp_path)
+
+
+def export_verbs(verbs, path: str) -> int:
+    """把动词对象序列写成扁平表，返回动词数。"""
+    with VerbTableWriter(path) as table:
+        for verb in verbs:
+            table.write(verb)
+    return table.verb_count
+
+
+def export_json_file(json_path: str, table_path: str) -> int:
+    """流式读取 verbs.json 形状的文件并导出，不整体加载。"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        return export_verbs(iter_json_array(f), table_path)
+
+
+def iter_table_verbs(path: str):
+    """按导出顺序还原动词对象（嵌套结构，与 verbs.json 等价；时态内 regular 放在最前）。"""
+    conn = sqlite3.connect(path)
+    try:
+        version = conn.execute("SELECT value FROM meta WHERE key = 'format_version'").fetchone()
+        if version is None or int(version[0]) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported verb table format: {version[0] if version else 'missing'}")
+        tenses = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT id, mood, tense FROM tenses")}
+        slots = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT id, tense_id, person FROM slots")}
+        tense_rows = conn.execute("SELECT verb_id, tense_id, regular FROM verb_tenses ORDER BY verb_id, tense_id")
+        form_rows = conn.execute("SELECT verb_id, slot_id, form FROM forms ORDER BY verb_id, slot_id, ord")
+        next_tense = next(tense_rows, None)
+        next_form = next(form_rows, None)
+
+        for row in conn.execute("SELECT * FROM verbs ORDER BY id"):
+            verb_id = row[0]
+            verb = {"infinitive": row[1], "gerund": row[2]}
+            if row[3] is not None:
+                verb["participle"] = json.loads(row[3])
+            for key, value in zip(BOOL_FIELDS, row[4:10]):
+                verb[key] = _from_int_bool(value)
+            while next_tense is not None and next_tense[0] == verb_id:
+                mood, tense = tenses[next_tense[1]]
+                verb.setdefault(mood, {})[tense] = {"regular": _from_int_bool(next_tense[2])}
+                next_tense = next(tense_rows, None)
+            while next_form is not None and next_form[0] == verb_id:
+                tense_id, person = slots[next_form[1]]
+                mood, tense = tenses[tense_id]
+                forms = verb[mood][tense].setdefault(person, [])
+                if next_form[2] is not None:
+                    forms.append(next_form[2])
+                next_form = next(form_rows, None)
+            if row[10] is not None:
+                verb["translation"] = json.loads(row[10])
+            if row[11] is not None:
+                verb.update(json.loads(row[11]))
+            yield verb
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 verbs.json 导出为紧凑的扁平 SQLite 表。")
+    parser.add_argument("json_path", help="verbs.json 形状的输入文件")
+    parser.add_argument("table_path", help="输出的 SQLite 文件")
+    args = parser.parse_args()
+    count = export_json_file(args.json_path, args.table_path)
+    size_kb = os.path.getsize(args.table_path) / 1024
+    print(f"Exported {count} verbs to {args.table_path} ({size_kb:.0f} KB).")
+
+
+if __name__ == "__main__":
+    main()
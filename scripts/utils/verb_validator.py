@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+动词记录的结构校验：按预先编好的“每个时态 × 人称该有几个形式、长什么样”的表逐项检查，
+不修补任何东西（修补是 normalize_verb_data 的事），只报告问题。
+
+检查项（TENSE_SHAPES 在导入时从规则一次性展开成扁平表）：
+- 顶层：infinitive / gerund 非空字符串，participle 是 1～2 个非空字符串，
+  is_reflexive / has_tr_use / has_intr_use 是 bool（final 阶段）
+- 每个简单时态 / 命令式都在，regular 是 bool，7 个人称都是字符串 list
+- 简单时态每个人称 1～2 个形式；subjunctive.imperfect 恰好 2 个，依次是 -ra 和 -se 形式
+- imperative 的 first_singular 必须为空，其余人称至少 1 个形式
+- 复合时态（final 阶段，有的话）必须与 participle 按 haber 规则推导的结果一致
+- 两个阶段：
+  - raw：模型原始回复（normalize 之前），vos 允许为空（normalize 会用 second_singular 补）
+  - final：写进 verbs.json 的完整记录
+
+用法：
+    errors = validate_verb(raw_data, stage="raw")     # [] 表示通过
+    python3 scripts/utils/verb_validator.py server/src/verbs.json
+"""
+
+import argparse
+import re
+import sys
+import time
+
+import compound_tenses
+from json_stream import iter_json_array
+
+PERSON_KEYS = compound_tenses.PERSON_KEYS
+
+STAGES = ("raw", "final")
+
+# subjunctive.imperfect 的两个形式：-ra / -se 变体（含 -ramos / -semos 等人称词尾）
+RA_FORM = re.compile(r"ra(?:s|mos|is|n)?$")
+SE_FORM = re.compile(r"se(?:s|mos|is|n)?$")
+
+# (语气, 时态) -> 每个人称的 (最少形式数, 最多形式数, 逐个形式的正则或 None)
+_DEFAULT_SLOT = (1, 2, None)
+_TENSE_RULES = {
+    ("indicative", "present"): {},
+    ("indicative", "imperfect"): {},
+    ("indicative", "preterite"): {},
+    ("indicative", "future"): {},
+    ("indicative", "conditional"): {},
+    ("subjunctive", "present"): {},
+    ("subjunctive", "imperfect"): {person: (2, 2, (RA_FORM, SE_FORM)) for person in PERSON_KEYS},
+    ("subjunctive", "future"): {},
+    ("imperative", "affirmative"): {"first_singular": (0, 0, None)},
+    ("imperative", "negative"): {"first_singular": (0, 0, None)},
+}
+
+
+def _compile_shapes(stage: str) -> tuple:
+    shapes = []
+    for (mood, tense), overrides in _TENSE_RULES.items():
+        slots = []
+        for person in PERSON_KEYS:
+            min_forms, max_forms, patterns = overrides.get(person, _DEFAULT_SLOT)
+            if stage == "raw" and person == "second_singular_vos_form":
+                min_forms = 0
+            slots.append((person, min_forms, max_forms, patterns))
+        shapes.append((mood, tense, f"{mood}.{tense}", tuple(slots)))
+    return tuple(shapes)
+
+
+TENSE_SHAPES = {stage: _compile_shapes(stage) for stage in STAGES}
+
+
+def _is_text(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def validate_verb(verb, stage: str = "final") -> list:
+    """返回问题列表（"路径: 描述"），空列表表示通过。"""
+    if not isinstance(verb, dict):
+        return ["<root>: not an object"]
+    errors = []
+    append = errors.append
+
+    if stage == "final" and not _is_text(verb.get("infinitive")):
+        append("infinitive: missing or empty")
+    if not _is_text(verb.get("gerund")):
+        append("gerund: missing or empty")
+    participle = verb.get("participle")
+    if not isinstance(participle, list) or not 1 <= len(participle) <= 2 or not all(map(_is_text, participle)):
+        append(f"participle: expected 1-2 non-empty strings, got {participle!r}")
+    if stage == "final":
+        for key in ("is_reflexive", "has_tr_use", "has_intr_use"):
+            if not isinstance(verb.get(key), bool):
+                append(f"{key}: expected bool, got {verb.get(key)!r}")
+
+    for mood, tense, path, slots in TENSE_SHAPES[stage]:
+        mood_obj = verb.get(mood)
+        tense_obj = mood_obj.get(tense) if isinstance(mood_obj, dict) else None
+        if not isinstance(tense_obj, dict):
+            append(f"{path}: missing")
+            continue
+        if not isinstance(tense_obj.get("regular"), bool):
+            append(f"{path}.regular: expected bool, got {tense_obj.get('regular')!r}")
+        for person, min_forms, max_forms, patterns in slots:
+            forms = tense_obj.get(person)
+            if not isinstance(forms, list):
+                append(f"{path}.{person}: expected a list, got {forms!r}")
+                continue
+            count = len(forms)
+            if count < min_forms or count > max_forms:
+                expected = str(min_forms) if min_forms == max_forms else f"{min_forms}-{max_forms}"
+                append(f"{path}.{person}: expected {expected} forms, got {forms!r}")
+                continue
+            if not all(map(_is_text, forms)):
+                append(f"{path}.{person}: empty or non-string form in {forms!r}")
+                continue
+            if patterns is not None:
+                for form, pattern in zip(forms, patterns):
+                    if not pattern.search(form):
+                        append(f"{path}.{person}: {form!r} does not match /{pattern.pattern}/")
+
+    if stage == "final" and any(mood in verb for mood in compound_tenses.COMPOUND_MOODS):
+        if not compound_tenses.has_derivable_compound_tenses(verb):
+            append("compound tenses: differ from haber + participle rules")
+
+    return errors
+
+
+def validate_file(path: str) -> dict:
+    """校验整个 verbs.json 形状的文件，返回 {infinitive 或 index:N: [问题...]}（只含有问题的动词）。"""
+    report = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for idx, verb in enumerate(iter_json_array(f)):
+            errors = validate_verb(verb, stage="final")
+            if errors:
+                name = verb.get("infinitive") if isinstance(verb, dict) else None
+                report[name or f"index:{idx}"] = errors
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="校验 verbs.json 里每个动词的结构。")
+    parser.add_argument("json_path", help="verbs.json 形状的文件")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    report = validate_file(args.json_path)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+    for name, errors in report.items():
+        print(name)
+        for error in errors:
+            print(f"    {error}")
+    print(f"{len(report)} verbs with problems ({sum(map(len, report.values()))} issues), checked in {elapsed_ms:.0f} ms.")
+    sys.exit(1 if report else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -412,6 +412,7 @@ function initVocabularyDatabase() {
       FOREIGN KEY (verb_id) REFERENCES verbs(id) ON DELETE CASCADE
     )
   `)
+  vocabularyDb.exec(`CREATE INDEX IF NOT EXISTS idx_conjugations_verb ON conjugations(verb_id)`)
 
   // 教材表
   vocabularyDb.exec(`
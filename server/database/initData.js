@@ -1,7 +1,12 @@
 const { vocabularyDb: db } = require('./db')
+const { addCompoundTenses } = require('../services/verbAutoFillService')
+const Database = require('better-sqlite3')
 const fs = require('fs')
 const path = require('path')
 
+// scripts/utils/verb_table.py 导出的扁平表格式版本
+const VERB_TABLE_FORMAT_VERSION = '1'
+
 function toBooleanInt(value, fallback = 0) {
   if (typeof value === 'boolean') return value ? 1 : 0
   if (typeof value === 'number') return value === 0 ? 0 : 1
@@ -26,8 +31,20 @@ function initSampleData() {
 
   console.log('\n📚 开始初始化词库数据...')
   
-  // 从 verbs.json 导入完整词库
   const verbsJsonPath = path.join(__dirname, '../src/verbs.json')
+  const verbTablePath = path.join(__dirname, '../src/verbs.table.sqlite')
+
+  // 优先用 verbs.json 旁边的扁平表（不比 verbs.json 旧时），不用解析整个嵌套 JSON
+  if (isVerbTableUsable(verbTablePath, verbsJsonPath)) {
+    try {
+      importFromVerbTable(verbTablePath)
+      return
+    } catch (error) {
+      console.error('\x1b[31m   ✗ verbs.table.sqlite 导入失败，改用 verbs.json:\x1b[0m', error.message)
+    }
+  }
+
+  // 从 verbs.json 导入完整词库
   if (!fs.existsSync(verbsJsonPath)) {
     console.error('\x1b[31m   ✗ 找不到 verbs.json 文件\x1b[0m')
     return
@@ -40,12 +57,86 @@ function initSampleData() {
   }
 }
 
+function isVerbTableUsable(tablePath, jsonPath) {
+  if (!fs.existsSync(tablePath)) return false
+  if (!fs.existsSync(jsonPath)) return true
+  return fs.statSync(tablePath).mtimeMs >= fs.statSync(jsonPath).mtimeMs
+}
+
 // 从 verbs.json 导入完整词库
 function importFromVerbsJson(filePath) {
   console.log('   📥 从 verbs.json 导入词库...')
-  
-  const verbsData = JSON.parse(fs.readFileSync(filePath, 'utf8'))
-  
+  importVerbs(JSON.parse(fs.readFileSync(filePath, 'utf8')))
+}
+
+// 从 verbs.table.sqlite（scripts/utils/verb_table.py 导出）导入完整词库
+function importFromVerbTable(filePath) {
+  console.log('   📥 从 verbs.table.sqlite 导入词库...')
+  const source = new Database(filePath, { readonly: true, fileMustExist: true })
+  try {
+    const version = source.prepare(`SELECT value FROM meta WHERE key = 'format_version'`).get()
+    if (!version || version.value !== VERB_TABLE_FORMAT_VERSION) {
+      throw new Error(`不支持的扁平表格式版本: ${version ? version.value : '缺失'}`)
+    }
+    importVerbs(iterateVerbTable(source))
+  } finally {
+    source.close()
+  }
+}
+
+function fromIntBool(value) {
+  return value === null ? null : value !== 0
+}
+
+// 按导出顺序把扁平表还原成与 verbs.json 相同形状的动词对象，一次只还原一个
+function* iterateVerbTable(source) {
+  const verbRows = source.prepare('SELECT * FROM verbs ORDER BY id').all()
+  const tenseRows = source.prepare(`
+    SELECT vt.verb_id, t.mood, t.tense, vt.regular
+    FROM verb_tenses vt JOIN tenses t ON t.id = vt.tense_id
+    ORDER BY vt.verb_id, vt.tense_id
+  `).all()
+  const formRows = source.prepare(`
+    SELECT f.verb_id, t.mood, t.tense, s.person, f.form
+    FROM forms f
+    JOIN slots s ON s.id = f.slot_id
+    JOIN tenses t ON t.id = s.tense_id
+    ORDER BY f.verb_id, f.slot_id, f.ord
+  `).iterate()
+
+  let tenseIndex = 0
+  let nextForm = formRows.next()
+  for (const row of verbRows) {
+    const verbData = {
+      infinitive: row.infinitive,
+      gerund: row.gerund,
+      participle: row.participle === null ? null : JSON.parse(row.participle),
+      is_reflexive: fromIntBool(row.is_reflexive),
+      has_tr_use: fromIntBool(row.has_tr_use),
+      has_intr_use: fromIntBool(row.has_intr_use),
+      supports_do: fromIntBool(row.supports_do),
+      supports_io: fromIntBool(row.supports_io),
+      supports_do_io: fromIntBool(row.supports_do_io),
+      translation: row.translation === null ? null : JSON.parse(row.translation)
+    }
+    while (tenseIndex < tenseRows.length && tenseRows[tenseIndex].verb_id === row.id) {
+      const tense = tenseRows[tenseIndex++]
+      if (!verbData[tense.mood]) verbData[tense.mood] = {}
+      verbData[tense.mood][tense.tense] = { regular: fromIntBool(tense.regular) }
+    }
+    while (!nextForm.done && nextForm.value.verb_id === row.id) {
+      const form = nextForm.value
+      const tenseData = verbData[form.mood][form.tense]
+      if (!tenseData[form.person]) tenseData[form.person] = []
+      if (form.form !== null) tenseData[form.person].push(form.form)
+      nextForm = formRows.next()
+    }
+    yield verbData
+  }
+}
+
+// 把 verbs.json 形状的动词对象序列写入词库
+function importVerbs(verbsData) {
   // 简单陈述式时态映射
   const indicativeTenseMapping = {
     'present': '现在时',
@@ -125,6 +216,12 @@ function importFromVerbsJson(filePath) {
   const transaction = db.transaction(() => {
     for (const verbData of verbsData) {
       const infinitive = verbData.infinitive
+
+      // 紧凑导出（scripts/utils/compound_tenses.py strip）只保留分词，复合时态按 haber 规则现场展开
+      if (!verbData.compound_indicative && !verbData.compound_subjunctive
+        && Array.isArray(verbData.participle) && verbData.participle.length > 0) {
+        addCompoundTenses(verbData)
+      }
       
       // 直接从 verbs.json 的 translation 属性读取中文释义
       // 将每个释义中的英文逗号替换为中文逗号，然后用中文分号"；"连接多个释义
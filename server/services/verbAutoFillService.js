@@ -564,5 +564,6 @@ async function generateAutofill(infinitive) {
 module.exports = {
   getConfig,
   validateInfinitive,
-  generateAutofill
+  generateAutofill,
+  addCompoundTenses
 }